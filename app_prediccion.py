@@ -41,11 +41,11 @@ def buscar_cliente_existente(cedula):
         conn = sqlite3.connect(SQLITE_DB)
 
         # Datos del cliente
-        query_cliente = f"SELECT * FROM Cobranza_clientes WHERE cedula = '{cedula}'"
-        df_cliente = pd.read_sql(query_cliente, conn)
+        query_cliente = "SELECT * FROM Cobranza_clientes WHERE cedula = ?"
+        df_cliente = pd.read_sql(query_cliente, conn, params=(cedula,))
 
         # Historial de cartera
-        query_cartera = f"""
+        query_cartera = """
         SELECT
             COUNT(*) as num_prestamos,
             AVG(dias_mora) as dias_mora_promedio,
@@ -53,19 +53,19 @@ def buscar_cliente_existente(cedula):
             SUM(CASE WHEN calificacion = 'A' THEN 1 ELSE 0 END) as prestamos_A,
             SUM(CASE WHEN calificacion = 'E' THEN 1 ELSE 0 END) as prestamos_E
         FROM Cobranza_cartera
-        WHERE cedula_id = '{cedula}'
+        WHERE cedula_id = ?
         """
-        df_cartera = pd.read_sql(query_cartera, conn)
+        df_cartera = pd.read_sql(query_cartera, conn, params=(cedula,))
 
         # Última asesoría
-        query_asesoria = f"""
+        query_asesoria = """
         SELECT score_datacredito
         FROM Cobranza_asesorias
-        WHERE cedula_id = '{cedula}'
+        WHERE cedula_id = ?
         ORDER BY fecha_asesoria DESC
         LIMIT 1
         """
-        df_asesoria = pd.read_sql(query_asesoria, conn)
+        df_asesoria = pd.read_sql(query_asesoria, conn, params=(cedula,))
 
         conn.close()
 
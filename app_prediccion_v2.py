@@ -6,30 +6,25 @@ Interfaz Streamlit mejorada con campos de Datacrédito actuales
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
 import sqlite3
 from pathlib import Path
 
+from src.models.model_bundle import load_model_artifacts
+from src.models.inference import get_predictor
+
 # Configuración
 SQLITE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\credisonar.db"
 MODEL_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\best_model_v2.pkl"
 SCALER_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\scaler_v2.pkl"
 FEATURE_NAMES_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\feature_names_v2.pkl"
+MODEL_BUNDLE_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\best_model_v2.bundle"
 
 # Cargar modelo
 @st.cache_resource
 def cargar_modelo():
-    """Carga el modelo, scaler y feature names"""
-    with open(MODEL_FILE, 'rb') as f:
-        modelo = pickle.load(f)
-
-    with open(SCALER_FILE, 'rb') as f:
-        scaler = pickle.load(f)
-
-    with open(FEATURE_NAMES_FILE, 'rb') as f:
-        feature_names = pickle.load(f)
-
-    return modelo, scaler, feature_names
+    """Carga el modelo, scaler y feature names (del paquete .bundle si existe)"""
+    return load_model_artifacts(MODEL_BUNDLE_FILE, MODEL_FILE, SCALER_FILE, FEATURE_NAMES_FILE,
+                                expected_version='v2')
 
 def conectar_bd():
     """Conecta a la base de datos"""
@@ -40,8 +35,8 @@ def buscar_cliente(cedula):
     conn = conectar_bd()
 
     # Datos del cliente
-    query_cliente = f"SELECT * FROM Cobranza_clientes WHERE cedula = '{cedula}'"
-    df_cliente = pd.read_sql(query_cliente, conn)
+    query_cliente = "SELECT * FROM Cobranza_clientes WHERE cedula = ?"
+    df_cliente = pd.read_sql(query_cliente, conn, params=(cedula,))
 
     if len(df_cliente) == 0:
         conn.close()
@@ -55,7 +50,7 @@ def buscar_cliente(cedula):
     estado_civil = estado_civil_map.get(df_cliente['estado_civil'].iloc[0], 0)
 
     # Datos de cartera
-    query_cartera = f"""
+    query_cartera = """
     SELECT
         COUNT(*) as num_prestamos,
         SUM(CASE WHEN estado = 'C' THEN 1 ELSE 0 END) as cancelados,
@@ -73,31 +68,31 @@ def buscar_cliente(cedula):
         MIN(fecha_desembolso) as fecha_primer_prestamo,
         MAX(fecha_desembolso) as fecha_ultimo_prestamo
     FROM Cobranza_cartera
-    WHERE cedula_id = '{cedula}'
+    WHERE cedula_id = ?
     """
-    df_cartera = pd.read_sql(query_cartera, conn)
+    df_cartera = pd.read_sql(query_cartera, conn, params=(cedula,))
 
     # Datos de pagos
-    query_pagos = f"""
+    query_pagos = """
     SELECT
         COUNT(p.id) as total_pagos,
         SUM(p.valor_pagado) as monto_total_pagado,
         AVG(p.valor_pagado) as promedio_pago
     FROM Cobranza_cartera car
     LEFT JOIN Cobranza_pagos3 p ON car.pagare = p.pagare_id
-    WHERE car.cedula_id = '{cedula}'
+    WHERE car.cedula_id = ?
     """
-    df_pagos = pd.read_sql(query_pagos, conn)
+    df_pagos = pd.read_sql(query_pagos, conn, params=(cedula,))
 
     # Última asesoría
-    query_asesoria = f"""
+    query_asesoria = """
     SELECT vivienda_propia
     FROM Cobranza_asesorias
-    WHERE cedula_id = '{cedula}'
+    WHERE cedula_id = ?
     ORDER BY fecha_asesoria DESC
     LIMIT 1
     """
-    df_asesoria = pd.read_sql(query_asesoria, conn)
+    df_asesoria = pd.read_sql(query_asesoria, conn, params=(cedula,))
 
     conn.close()
 
@@ -173,18 +168,8 @@ def buscar_cliente(cedula):
     return datos_historicos
 
 def predecir_credito(datos, modelo, scaler, feature_names):
-    """Realiza la predicción"""
-    # Crear DataFrame con todas las features
-    df = pd.DataFrame([datos])[feature_names]
-
-    # Escalar
-    datos_scaled = scaler.transform(df)
-
-    # Predecir
-    probabilidad = modelo.predict_proba(datos_scaled)[0][1]
-    decision = modelo.predict(datos_scaled)[0]
-
-    return probabilidad, decision
+    """Realiza la predicción (probabilidad y decisión de una sola evaluación)"""
+    return get_predictor(modelo, scaler, feature_names).predict(datos)
 
 def calcular_monto_sugerido(probabilidad, monto_solicitado, plazo, sueldo_mensual, total_deudas_datacredito, valor_mensual_datacredito):
     """Calcula el monto sugerido a prestar basado en la probabilidad y capacidad de pago"""
@@ -6,7 +6,6 @@ Interfaz reorganizada con flujo lógico: Cliente → Info Actual → Crédito 
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
 import pymysql
 import hashlib
 from pathlib import Path
@@ -19,6 +18,15 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
+from src.db.pool import ConnectionPool
+from src.data.online_features import OnlineFeatureLookup
+from src.db import queries
+from src.db.client_profile import fetch_client_profile
+from src.db.consecutivo import ConsecutivoAllocator, formatear_consecutivo, tabla_consecutivos_faltante
+from src.db.profile_cache import ProfileCache
+from src.models.model_bundle import load_model_artifacts
+from src.models.inference import get_predictor
+
 # Función de utilidad para formatear números con punto como separador de miles
 def fmt(numero):
     """Formatea número con punto (.) como separador de miles - Formato colombiano"""
@@ -29,32 +37,42 @@ BASE_DIR = Path(__file__).parent
 MODEL_FILE = BASE_DIR / "models" / "best_model_v2.pkl"
 SCALER_FILE = BASE_DIR / "models" / "scaler_v2.pkl"
 FEATURE_NAMES_FILE = BASE_DIR / "models" / "feature_names_v2.pkl"
+MODEL_BUNDLE_FILE = BASE_DIR / "models" / "best_model_v2.bundle"
 LOGO_FILE = BASE_DIR / "logo_credi.png"
+FEATURE_STORE_FILE = BASE_DIR / "data" / "feature_store.db"
+
+# Caché de perfiles de cliente (compartida entre sesiones)
+PERFIL_CACHE_MAX = 256
+PERFIL_CACHE_TTL_SEGUNDOS = 300
 
 # Cargar modelo
 @st.cache_resource
 def cargar_modelo():
-    """Carga el modelo, scaler y feature names"""
-    with open(MODEL_FILE, 'rb') as f:
-        modelo = pickle.load(f)
-    with open(SCALER_FILE, 'rb') as f:
-        scaler = pickle.load(f)
-    with open(FEATURE_NAMES_FILE, 'rb') as f:
-        feature_names = pickle.load(f)
-    return modelo, scaler, feature_names
+    """Carga el modelo, scaler y feature names (del paquete .bundle si existe)"""
+    return load_model_artifacts(MODEL_BUNDLE_FILE, MODEL_FILE, SCALER_FILE, FEATURE_NAMES_FILE,
+                                expected_version='v2')
 
-def conectar_bd():
-    """Conecta a la base de datos MySQL (local o Streamlit Cloud)"""
+@st.cache_resource
+def obtener_pool_bd():
+    """Pool de conexiones MySQL compartido por todas las sesiones"""
+    mysql_config = st.secrets["mysql"]
+    parametros = dict(
+        host=mysql_config["host"],
+        port=int(mysql_config.get("port", 3306)),
+        database=mysql_config["database"],
+        user=mysql_config["user"],
+        password=mysql_config["password"]
+    )
+    return ConnectionPool(
+        lambda: pymysql.connect(**parametros),
+        max_size=int(mysql_config.get("pool_size", 5)),
+        max_idle_seconds=int(mysql_config.get("pool_idle_seconds", 300))
+    )
+
+def pool_bd():
+    """Pool MySQL (local o Streamlit Cloud); detiene la app si faltan credenciales"""
     try:
-        mysql_config = st.secrets["mysql"]
-        conn = pymysql.connect(
-            host=mysql_config["host"],
-            port=int(mysql_config.get("port", 3306)),
-            database=mysql_config["database"],
-            user=mysql_config["user"],
-            password=mysql_config["password"]
-        )
-        return conn
+        return obtener_pool_bd()
     except (FileNotFoundError, KeyError) as e:
         st.error("""
         ⚠️ **Error de configuración de base de datos**
@@ -67,24 +85,46 @@ def conectar_bd():
         st.stop()
         return None
 
+def conectar_bd():
+    """
+    Obtiene una conexión del pool MySQL
+    conn.close() la devuelve al pool para reutilizarla
+    """
+    return pool_bd().acquire()
+
+@st.cache_resource
+def obtener_cache_perfiles():
+    """Caché de perfiles de cliente compartida por todas las sesiones"""
+    return ProfileCache(max_size=PERFIL_CACHE_MAX, ttl_seconds=PERFIL_CACHE_TTL_SEGUNDOS)
+
+@st.cache_resource
+def obtener_features_online():
+    """Consulta de features por cédula (feature store local + cálculo al vuelo)"""
+    return OnlineFeatureLookup(FEATURE_STORE_FILE, pool=pool_bd())
+
 def buscar_cliente(cedula):
+    """
+    Busca datos del cliente (primero en la caché de perfiles, luego en la BD)
+    Ver estadísticas con obtener_cache_perfiles().stats()
+    """
+    return obtener_cache_perfiles().get_or_load(cedula, consultar_cliente_bd)
+
+def consultar_cliente_bd(cedula):
     """Busca datos del cliente en la BD"""
     try:
-        conn = conectar_bd()
+        # Todas las consultas del perfil en paralelo sobre el pool
+        perfil = fetch_client_profile(pool_bd(), cedula)
 
         # Datos básicos del cliente
-        query_cliente = f"SELECT * FROM Cobranza_clientes WHERE cedula = '{cedula}'"
-        df_cliente = pd.read_sql(query_cliente, conn)
+        df_cliente = perfil['cliente']
 
         if len(df_cliente) == 0:
-            conn.close()
             return None
 
         # Calcular edad
         fecha_nac = pd.to_datetime(df_cliente['fecha_nacimiento'].iloc[0], errors='coerce')
         if pd.isna(fecha_nac):
             st.error(f"Error: Fecha de nacimiento inválida para cliente {cedula}")
-            conn.close()
             return None
 
         edad = (pd.Timestamp.now() - fecha_nac).days // 365
@@ -100,50 +140,9 @@ def buscar_cliente(cedula):
         # Obtener correo de Cobranza_clientes si existe
         correo = df_cliente['correo'].iloc[0] if 'correo' in df_cliente.columns and pd.notna(df_cliente['correo'].iloc[0]) else ''
 
-        # Datos de cartera (historial)
-        query_cartera = f"""
-    SELECT
-        COUNT(*) as num_prestamos,
-        SUM(CASE WHEN estado = 'C' THEN 1 ELSE 0 END) as cancelados,
-        SUM(CASE WHEN estado = 'A' THEN 1 ELSE 0 END) as activos,
-        AVG(valor_desembolsado) as monto_promedio,
-        MAX(valor_desembolsado) as monto_maximo,
-        MIN(valor_desembolsado) as monto_minimo,
-        AVG(dias_mora) as mora_promedio,
-        MAX(dias_mora) as mora_maximo,
-        SUM(CASE WHEN calificacion = 'A' THEN 1 ELSE 0 END) as calif_A,
-        SUM(CASE WHEN calificacion = 'B' THEN 1 ELSE 0 END) as calif_B,
-        SUM(CASE WHEN calificacion = 'E' THEN 1 ELSE 0 END) as calif_E,
-        SUM(CASE WHEN restructurado = 'S' THEN 1 ELSE 0 END) as restructurados,
-        SUM(CASE WHEN en_juridica = 'S' THEN 1 ELSE 0 END) as juridica,
-        MIN(fecha_desembolso) as fecha_primer_prestamo,
-        MAX(fecha_desembolso) as fecha_ultimo_prestamo
-    FROM Cobranza_cartera
-    WHERE cedula_id = '{cedula}'
-    """
-        df_cartera = pd.read_sql(query_cartera, conn)
-
-        # Datos de pagos
-        query_pagos = f"""
-        SELECT
-            COUNT(p.id) as total_pagos,
-            SUM(p.valor_pagado) as monto_total_pagado,
-            AVG(p.valor_pagado) as promedio_pago
-        FROM Cobranza_cartera car
-        LEFT JOIN Cobranza_pagos3 p ON car.pagare = p.pagare_id
-        WHERE car.cedula_id = '{cedula}'
-        """
-        df_pagos = pd.read_sql(query_pagos, conn)
-
-        # Última asesoría (para obtener contacto y vivienda)
-        query_asesoria = f"""
-        SELECT vivienda_propia, tel_celular, direccion_of, fecha_asesoria
-        FROM Cobranza_asesorias
-        WHERE cedula_id = '{cedula}'
-        ORDER BY fecha_asesoria DESC
-        LIMIT 1
-        """
-        df_asesoria = pd.read_sql(query_asesoria, conn)
+        # Datos de cartera (créditos activos) y última asesoría
+        df_cartera = perfil['cartera']
+        df_asesoria = perfil['asesoria']
 
         # Obtener teléfono, dirección y fecha de asesoría si existe
         telefono = ''
@@ -155,41 +154,11 @@ def buscar_cliente(cedula):
             if pd.notna(df_asesoria['fecha_asesoria'].iloc[0]):
                 fecha_ultima_asesoria = pd.to_datetime(df_asesoria['fecha_asesoria'].iloc[0])
 
-        # Créditos activos en Credisonar (estado = 'A')
-        query_activos = f"""
-        SELECT
-            COUNT(*) as creditos_vigentes,
-            SUM(saldo_capital) as saldo_capital_total,
-            SUM(valor_cuota) as cuota_mensual_total,
-            AVG(valor_desembolsado) as monto_promedio_aprobado,
-            MAX(valor_desembolsado) as monto_maximo_aprobado,
-            GROUP_CONCAT(DISTINCT calificacion) as calificaciones
-        FROM Cobranza_cartera
-        WHERE cedula_id = '{cedula}' AND estado = 'A'
-        """
-        df_activos = pd.read_sql(query_activos, conn)
+        # Créditos activos en Credisonar (estado = 'A') - columnas de la consulta de cartera
+        df_activos = df_cartera
 
         # Historial de préstamos (para mostrar tabla de historia)
-        query_historial_prestamos = f"""
-        SELECT
-            c.pagare,
-            c.fecha_desembolso,
-            MAX(p.fecha_pago) as fecha_ultimo_pago,
-            c.valor_desembolsado as monto_aprobado,
-            MAX(pc.valor_a_pagar) as valor_cuota,
-            c.estado,
-            c.calificacion
-        FROM Cobranza_cartera c
-        LEFT JOIN Cobranza_pagos3 p ON c.pagare = p.pagare_id
-        LEFT JOIN Cobranza_plan_cuotas pc ON c.pagare = pc.pagare_num_id
-        WHERE c.cedula_id = '{cedula}'
-        GROUP BY c.pagare, c.fecha_desembolso, c.valor_desembolsado, c.estado, c.calificacion
-        ORDER BY c.fecha_desembolso DESC
-        LIMIT 10
-        """
-        df_historial_prestamos = pd.read_sql(query_historial_prestamos, conn)
-
-        conn.close()
+        df_historial_prestamos = perfil['historial_prestamos']
 
         # Datos de créditos activos en Credisonar
         creditos_activos = {
@@ -219,38 +188,14 @@ def buscar_cliente(cedula):
             'historial_prestamos': df_historial_prestamos,
         }
 
-        # Historial de créditos
-        if df_cartera['num_prestamos'].iloc[0] > 0:
-            num_prestamos = int(df_cartera['num_prestamos'].iloc[0])
-            fecha_primer = pd.to_datetime(df_cartera['fecha_primer_prestamo'].iloc[0])
-            fecha_ultimo = pd.to_datetime(df_cartera['fecha_ultimo_prestamo'].iloc[0])
-            antiguedad_meses = int((pd.Timestamp.now() - fecha_primer).days / 30)
-            meses_ultimo = int((pd.Timestamp.now() - fecha_ultimo).days / 30)
-
+        # Historial de créditos: vector precalculado del feature store
+        # (mismas fórmulas que el entrenamiento; al vuelo si aún no está materializado)
+        features, meta = obtener_features_online().lookup_with_meta(cedula)
+        cliente['historial_actualizado_en'] = meta['actualizado_en']
+        if features is not None and features['num_prestamos_historicos'] > 0:
             cliente['historial'] = {
                 'vivienda_propia_num': 1 if len(df_asesoria) > 0 and df_asesoria['vivienda_propia'].iloc[0] == 'S' else 0,
-                'num_prestamos_historicos': num_prestamos,
-                'prestamos_cancelados': int(df_cartera['cancelados'].iloc[0]),
-                'prestamos_activos': int(df_cartera['activos'].iloc[0]),
-                'monto_promedio_historico': float(df_cartera['monto_promedio'].iloc[0]),
-                'monto_maximo_historico': float(df_cartera['monto_maximo'].iloc[0]),
-                'monto_minimo_historico': float(df_cartera['monto_minimo'].iloc[0]),
-                'dias_mora_promedio': float(df_cartera['mora_promedio'].iloc[0]),
-                'dias_mora_maximo': float(df_cartera['mora_maximo'].iloc[0]),
-                'prestamos_calificacion_A': int(df_cartera['calif_A'].iloc[0]),
-                'prestamos_calificacion_B': int(df_cartera['calif_B'].iloc[0]),
-                'prestamos_calificacion_E': int(df_cartera['calif_E'].iloc[0]),
-                'prestamos_restructurados': int(df_cartera['restructurados'].iloc[0]),
-                'prestamos_en_juridica': int(df_cartera['juridica'].iloc[0]),
-                'antiguedad_cliente_meses': antiguedad_meses,
-                'meses_desde_ultimo_prestamo': meses_ultimo,
-                'ratio_prestamos_buenos': (int(df_cartera['calif_A'].iloc[0]) + int(df_cartera['calif_B'].iloc[0])) / num_prestamos,
-                'ratio_prestamos_malos': int(df_cartera['calif_E'].iloc[0]) / num_prestamos,
-                'ratio_cancelacion': int(df_cartera['cancelados'].iloc[0]) / num_prestamos,
-                'ratio_activos': int(df_cartera['activos'].iloc[0]) / num_prestamos,
-                'total_pagos_realizados': int(df_pagos['total_pagos'].iloc[0]) if df_pagos['total_pagos'].iloc[0] else 0,
-                'monto_total_pagado': float(df_pagos['monto_total_pagado'].iloc[0]) if df_pagos['monto_total_pagado'].iloc[0] else 0,
-                'promedio_valor_pago': float(df_pagos['promedio_pago'].iloc[0]) if df_pagos['promedio_pago'].iloc[0] else 0,
+                **features,
             }
         else:
             # Cliente sin historial
@@ -266,6 +211,8 @@ def buscar_cliente(cedula):
                 'dias_mora_maximo': 0,
                 'prestamos_calificacion_A': 0,
                 'prestamos_calificacion_B': 0,
+                'prestamos_calificacion_C': 0,
+                'prestamos_calificacion_D': 0,
                 'prestamos_calificacion_E': 0,
                 'prestamos_restructurados': 0,
                 'prestamos_en_juridica': 0,
@@ -296,19 +243,11 @@ def buscar_cliente(cedula):
         st.error(f"❌ Error al buscar cliente: {str(e)}")
         import traceback
         st.code(traceback.format_exc())
-        try:
-            conn.close()
-        except:
-            pass
         return None
 
 def predecir_credito(datos, modelo, scaler, feature_names):
-    """Realiza la predicción"""
-    df = pd.DataFrame([datos])[feature_names]
-    datos_scaled = scaler.transform(df)
-    probabilidad = modelo.predict_proba(datos_scaled)[0][1]
-    decision = modelo.predict(datos_scaled)[0]
-    return probabilidad, decision
+    """Realiza la predicción (probabilidad y decisión de una sola evaluación)"""
+    return get_predictor(modelo, scaler, feature_names).predict(datos)
 
 def calcular_monto_sugerido(probabilidad, monto_solicitado, plazo, sueldo_mensual, total_deudas_datacredito, valor_mensual_datacredito):
     """Calcula el monto sugerido basado en probabilidad y capacidad de pago"""
@@ -339,28 +278,8 @@ def obtener_historial_pdfs_cliente(cedula):
     Obtiene el historial de PDFs generados para un cliente
     """
     try:
-        conn = conectar_bd()
-
-        query = f"""
-        SELECT
-            consecutivo,
-            fecha_generacion,
-            decision,
-            monto_solicitado,
-            monto_aprobado,
-            score_datacredito,
-            ingresos_reportados,
-            egresos_reportados,
-            probabilidad,
-            nivel_riesgo
-        FROM Cobranza_pdf_evaluaciones
-        WHERE cedula = '{cedula}'
-        ORDER BY fecha_generacion DESC
-        LIMIT 10
-        """
-
-        df_pdfs = pd.read_sql(query, conn)
-        conn.close()
+        with conectar_bd() as conn:
+            df_pdfs = queries.run_query(conn, queries.HISTORIAL_PDFS, (cedula,))
 
         return df_pdfs
 
@@ -368,32 +287,38 @@ def obtener_historial_pdfs_cliente(cedula):
         # Si la tabla no existe o hay error, retornar DataFrame vacío
         return pd.DataFrame()
 
+@st.cache_resource
+def obtener_asignador_consecutivos():
+    """Asignador de consecutivos compartido por todas las sesiones"""
+    mysql_config = st.secrets["mysql"]
+    return ConsecutivoAllocator(pool_bd(), block_size=int(mysql_config.get("consecutivo_bloque", 1)))
+
 def obtener_siguiente_consecutivo():
     """
     Obtiene el siguiente número de consecutivo para el PDF
     Formato: YYYY-NNNNN (ej: 2026-00001)
     """
     try:
-        conn = conectar_bd()
-        cursor = conn.cursor()
+        # Reserva atómica en Cobranza_pdf_consecutivos (sin carreras entre analistas)
+        return obtener_asignador_consecutivos().next()
+    except Exception as e:
+        if not tabla_consecutivos_faltante(e):
+            # Sin la reserva atómica no hay garantía de números únicos: no emitir el PDF
+            st.error(f"❌ Error al reservar consecutivo: {str(e)}")
+            st.stop()
+        # Tabla de consecutivos aún no creada (scripts/create_consecutivo_sequence.sql)
 
+    try:
         # Obtener año actual
         anio_actual = datetime.now().year
 
         # Buscar el último consecutivo del año actual
-        query = f"""
-        SELECT consecutivo
-        FROM Cobranza_pdf_evaluaciones
-        WHERE consecutivo LIKE '{anio_actual}-%'
-        ORDER BY id DESC
-        LIMIT 1
-        """
-        cursor.execute(query)
-        resultado = cursor.fetchone()
-
-        if resultado:
+        with conectar_bd() as conn:
+            df_ultimo = queries.run_query(conn, queries.ULTIMO_CONSECUTIVO, (f"{anio_actual}-%",))
+
+        if len(df_ultimo) > 0:
             # Extraer el número del consecutivo anterior
-            ultimo_consecutivo = resultado[0]
+            ultimo_consecutivo = df_ultimo['consecutivo'].iloc[0]
             ultimo_numero = int(ultimo_consecutivo.split('-')[1])
             nuevo_numero = ultimo_numero + 1
         else:
@@ -401,10 +326,7 @@ def obtener_siguiente_consecutivo():
             nuevo_numero = 1
 
         # Formatear como YYYY-NNNNN
-        consecutivo = f"{anio_actual}-{nuevo_numero:05d}"
-
-        cursor.close()
-        conn.close()
+        consecutivo = formatear_consecutivo(anio_actual, nuevo_numero)
 
         return consecutivo
 
@@ -427,15 +349,6 @@ def guardar_registro_pdf(consecutivo, cedula, nombre_cliente, decision, monto_so
     """
     try:
         conn = conectar_bd()
-        cursor = conn.cursor()
-
-        query = """
-        INSERT INTO Cobranza_pdf_evaluaciones
-        (consecutivo, cedula, nombre_cliente, fecha_generacion, decision,
-         monto_solicitado, monto_aprobado, probabilidad, nivel_riesgo,
-         score_datacredito, ingresos_reportados, egresos_reportados, concepto_oficina, hash_pdf)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
 
         valores = (
             consecutivo,
@@ -454,16 +367,22 @@ def guardar_registro_pdf(consecutivo, cedula, nombre_cliente, decision, monto_so
             hash_pdf
         )
 
-        cursor.execute(query, valores)
+        queries.execute(conn, queries.INSERTAR_REGISTRO_PDF, valores)
         conn.commit()
 
-        cursor.close()
         conn.close()
 
+        # El perfil en caché ya no refleja la nueva evaluación
+        obtener_cache_perfiles().invalidate(cedula)
+
         return True
 
     except Exception as e:
         st.error(f"Error al guardar registro del PDF: {str(e)}")
+        try:
+            conn.close()
+        except:
+            pass
         return False
 
 def generar_pdf(cliente, datos_financieros, resultado_evaluacion, consecutivo="", concepto_oficina=""):
@@ -803,6 +722,8 @@ if 'cliente' in st.session_state and st.session_state['cliente']:
                 st.metric("Mora Máxima", f"{cliente['historial']['dias_mora_maximo']:.0f} días")
             with col_h4:
                 st.metric("Calificación A", cliente['historial']['prestamos_calificacion_A'])
+            if cliente.get('historial_actualizado_en'):
+                st.caption(f"Historial calculado el {cliente['historial_actualizado_en']}")
 
             # Alertas de riesgo
             if cliente['historial']['dias_mora_maximo'] > 90:
@@ -0,0 +1,48 @@
+"""
+Convierte los artefactos pickle del modelo v2 (modelo, scaler y feature
+names) en un único paquete .bundle, sin reentrenar
+
+Uso:
+    python scripts/build_model_bundle.py
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.models.model_bundle import load_bundle, write_bundle
+
+# Configuración (mismos archivos que usan las apps)
+MODEL_DIR = Path(__file__).parent.parent / "models"
+MODEL_FILE = MODEL_DIR / "best_model_v2.pkl"
+SCALER_FILE = MODEL_DIR / "scaler_v2.pkl"
+FEATURE_NAMES_FILE = MODEL_DIR / "feature_names_v2.pkl"
+MODEL_BUNDLE_FILE = MODEL_DIR / "best_model_v2.bundle"
+
+def construir_paquete():
+    """Genera el paquete a partir de los tres pickles"""
+    print("\n>> Generando paquete del modelo v2...")
+
+    artefactos = {}
+    for nombre, archivo in (('model', MODEL_FILE), ('scaler', SCALER_FILE), ('feature_names', FEATURE_NAMES_FILE)):
+        if not archivo.exists():
+            print(f"[ERROR] No se encontro: {archivo}")
+            print("Ejecuta primero: train_model_v2.py")
+            return
+        with open(archivo, 'rb') as f:
+            artefactos[nombre] = pickle.load(f)
+
+    feature_names = artefactos.pop('feature_names')
+    manifiesto = write_bundle(MODEL_BUNDLE_FILE, artefactos, version='v2', feature_names=feature_names,
+                              metadata={'modelo': type(artefactos['model']).__name__, 'origen': 'pickles v2'})
+
+    # Verificar que el paquete abre
+    paquete = load_bundle(MODEL_BUNDLE_FILE, expected_version='v2')
+    print(f"  [OK] Paquete guardado en: {MODEL_BUNDLE_FILE}")
+    print(f"  [OK] Objetos: {', '.join(paquete.names())} ({len(feature_names)} features)")
+    print(f"  [OK] Arreglos con memory-map: "
+          f"{sum(len(objeto['buffers']) for objeto in manifiesto['objects'].values())}")
+
+if __name__ == "__main__":
+    construir_paquete()
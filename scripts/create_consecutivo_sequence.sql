@@ -0,0 +1,21 @@
+-- Contador de consecutivos de PDF por año
+-- Ejecutar este script en la base de datos de producción (después de create_pdf_registry.sql)
+-- La app reserva números con un INSERT ... ON DUPLICATE KEY UPDATE atómico sobre esta tabla
+
+CREATE TABLE IF NOT EXISTS Cobranza_pdf_consecutivos (
+    anio INT NOT NULL PRIMARY KEY COMMENT 'Año del consecutivo',
+    ultimo INT NOT NULL COMMENT 'Último número reservado del año'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Contador de consecutivos de PDFs por año';
+
+-- Inicializar con los consecutivos ya emitidos (se ignoran los TEMP)
+INSERT INTO Cobranza_pdf_consecutivos (anio, ultimo)
+SELECT
+    CAST(SUBSTRING_INDEX(consecutivo, '-', 1) AS UNSIGNED) AS anio,
+    MAX(CAST(SUBSTRING_INDEX(consecutivo, '-', -1) AS UNSIGNED)) AS ultimo
+FROM Cobranza_pdf_evaluaciones
+WHERE consecutivo REGEXP '^[0-9]{4}-[0-9]+$'
+GROUP BY CAST(SUBSTRING_INDEX(consecutivo, '-', 1) AS UNSIGNED)
+ON DUPLICATE KEY UPDATE ultimo = GREATEST(ultimo, VALUES(ultimo));
+
+-- Verificar
+SELECT * FROM Cobranza_pdf_consecutivos ORDER BY anio;
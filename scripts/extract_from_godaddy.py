@@ -3,11 +3,17 @@ Script para extraer datos directamente desde MySQL (GoDaddy) a SQLite
 Mucho más confiable que parsear el archivo SQL
 """
 
-import pandas as pd
 import mysql.connector
 import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.db.delta_sync import DeltaSync
+from src.db.extractor import QueuedWriter, check_key
+from src.db.local_db import finalize
+
 # Configuración SQLite
 SQLITE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\credisonar.db"
 
@@ -21,6 +27,38 @@ TABLAS = [
     'Cobranza_plan_de_pagos'
 ]
 
+# Clave de cada tabla para la lectura por páginas (keyset), los checkpoints y
+# la reconciliación. Antes de copiar se verifica en MySQL que exista y sea
+# única (PRIMARY KEY o UNIQUE); clientes y cartera se referencian por cédula y
+# pagaré (cartera.cedula_id, pagos3.pagare_id)
+CLAVES_PRIMARIAS = {
+    'Cobranza_clientes': 'cedula',
+    'Cobranza_asesorias': 'id',
+    'Cobranza_cartera': 'pagare',
+    'Cobranza_pagos3': 'id',
+    'Cobranza_plan_cuotas_online': 'id',
+    'Cobranza_plan_de_pagos': 'id',
+}
+
+# Lectura por páginas de clave primaria (memoria constante por tabla)
+FILAS_POR_PAGINA = 10000
+FILAS_POR_LOTE = 2000
+
+# Sincronización incremental: columna de última modificación por tabla (si la
+# tiene); las tablas sin columna traen las filas nuevas por clave y las
+# actualizadas por la reconciliación
+COLUMNAS_MODIFICACION = {}
+
+# Reconciliación por checksums (detecta filas actualizadas y borradas).
+# 0 = en cada corrida: una corrida normal refleja los cambios como la copia
+# completa de antes; sólo viajan los resúmenes por bloque y las filas distintas
+RECONCILIAR_CADA_DIAS = 0
+CLAVES_POR_BLOQUE = 1000
+
+# Tablas extraídas en paralelo (cada una con su propia conexión a MySQL);
+# todas escriben a SQLite a través de un único hilo escritor
+TRABAJADORES = 4
+
 def conectar_mysql():
     """
     Conecta a MySQL en GoDaddy
@@ -47,55 +85,107 @@ def conectar_mysql():
         print("3. Verificar host, user, password")
         return None
 
-def extraer_tablas():
+def sincronizar_tabla(tabla, writer, reanudar=True, reconciliar=None):
     """
-    Extrae todas las tablas de MySQL a SQLite
-    """
-    print("\n>> Extrayendo datos desde GoDaddy MySQL...\n")
+    Sincroniza una tabla con su propia conexión a MySQL
 
-    # Conectar a MySQL
+    Returns:
+        (registros traídos, líneas de resumen)
+    """
     mysql_conn = conectar_mysql()
     if not mysql_conn:
-        return
+        raise ConnectionError("Sin conexión a MySQL")
+
+    lineas = []
+    clave = CLAVES_PRIMARIAS[tabla]
+    try:
+        # Falla antes de copiar si la clave no existe o no es única
+        clave_entera = check_key(mysql_conn, tabla, clave)
+
+        with DeltaSync(mysql_conn, page_size=FILAS_POR_PAGINA, fetch_size=FILAS_POR_LOTE,
+                       block_size=CLAVES_POR_BLOQUE, writer=writer) as extractor:
+            if not clave_entera:
+                # Sin clave entera no hay reconciliación por bloques: la primera
+                # copia (o una interrumpida) es completa; después se relee la tabla
+                # comparando checksums y sólo se escribe lo que cambió
+                checkpoint = writer.checkpoint(tabla)
+                if reanudar and checkpoint is not None and checkpoint[2]:
+                    resultado = extractor.rescan(tabla, key=clave)
+                    lineas.append(f"  [OK] {resultado['filas_leidas']:,} registros releídos (clave {clave}): "
+                                  f"{resultado['filas_reescritas']:,} nuevos o modificados, "
+                                  f"{resultado['filas_borradas']:,} borrados en {resultado['segundos']:.1f}s")
+                    return resultado['filas_reescritas'], lineas
+                continuar = reanudar and checkpoint is not None
+                resultado = extractor.extract(tabla, key=clave, resume=continuar)
+                lineas.append(f"  [OK] {resultado['filas_copiadas']:,} registros copiados "
+                              f"(copia completa, clave {clave}) en {resultado['segundos']:.1f}s")
+                return resultado['filas_copiadas'], lineas
+
+            resultado = extractor.sync(tabla, key=clave,
+                                       modified_column=COLUMNAS_MODIFICACION.get(tabla), resume=reanudar)
+            lineas.append(f"  [OK] {resultado['filas_nuevas']:,} registros nuevos, "
+                          f"{resultado['filas_modificadas']:,} modificados en {resultado['segundos']:.1f}s")
+            registros = resultado['filas_nuevas'] + resultado['filas_modificadas']
+
+            if reconciliar or (reconciliar is None and extractor.reconciliation_due(tabla, RECONCILIAR_CADA_DIAS)):
+                resultado = extractor.reconcile(tabla, key=clave)
+                lineas.append(f"  [OK] Reconciliada: {resultado['bloques_distintos']:,} de {resultado['bloques']:,} "
+                              f"bloques distintos, {resultado['filas_actualizadas']:,} actualizados, "
+                              f"{resultado['filas_borradas']:,} borrados en {resultado['segundos']:.1f}s")
+    finally:
+        mysql_conn.close()
+
+    return registros, lineas
+
+def extraer_tablas(reanudar=True, reconciliar=None, trabajadores=TRABAJADORES):
+    """
+    Sincroniza todas las tablas de MySQL a SQLite por streaming
+
+    Args:
+        reanudar: Si True, cada tabla continúa desde su último checkpoint
+            (una corrida interrumpida no vuelve a empezar) y sólo trae filas
+            nuevas o modificadas; si False, copia todo desde cero
+        reconciliar: True = reconciliar todas las tablas, False = nunca,
+            None = las que no se reconcilian hace RECONCILIAR_CADA_DIAS días
+        trabajadores: Tablas a extraer al mismo tiempo
+    """
+    print("\n>> Extrayendo datos desde GoDaddy MySQL...\n")
 
     # Crear directorio SQLite
     Path(SQLITE_DB).parent.mkdir(parents=True, exist_ok=True)
 
-    # Conectar a SQLite
-    sqlite_conn = sqlite3.connect(SQLITE_DB)
-
     total_registros = 0
 
-    for tabla in TABLAS:
-        try:
-            print(f">> Extrayendo: {tabla}...")
-
-            # Leer tabla desde MySQL con pandas
-            df = pd.read_sql(f"SELECT * FROM {tabla}", mysql_conn)
-
-            print(f"  >> {len(df):,} registros encontrados")
-
-            # Guardar en SQLite
-            df.to_sql(tabla, sqlite_conn, if_exists='replace', index=False)
-
-            print(f"  [OK] {len(df):,} registros importados a SQLite")
-            total_registros += len(df)
-
-        except Exception as e:
-            print(f"  [ERROR] Error con {tabla}: {e}")
-            continue
-
-    # Cerrar conexiones
-    mysql_conn.close()
-    sqlite_conn.close()
+    with QueuedWriter(SQLITE_DB) as writer, ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        futuros = {
+            pool.submit(sincronizar_tabla, tabla, writer, reanudar, reconciliar): tabla
+            for tabla in TABLAS
+        }
+        for futuro in as_completed(futuros):
+            tabla = futuros[futuro]
+            print(f">> {tabla}:")
+            try:
+                registros, lineas = futuro.result()
+                for linea in lineas:
+                    print(linea)
+                total_registros += registros
+
+            except Exception as e:
+                print(f"  [ERROR] Error con {tabla}: {e}")
+                print("  [INFO] Vuelve a ejecutar el script para continuar desde el último checkpoint")
+                continue
 
     print(f"\n[COMPLETADO] Extraccion completada!")
     print(f">> Total de registros: {total_registros:,}")
     print(f">> Base de datos SQLite: {SQLITE_DB}")
 
+    # Índices de feature engineering y estadísticas del planificador
+    sqlite_conn = sqlite3.connect(SQLITE_DB)
+    creados = finalize(sqlite_conn)
+    print(f">> Indices creados: {', '.join(creados) if creados else 'ninguno (ya existian)'}; ANALYZE actualizado")
+
     # Mostrar resumen
     print("\n>> Resumen de tablas:")
-    sqlite_conn = sqlite3.connect(SQLITE_DB)
     cursor = sqlite_conn.cursor()
 
     for tabla in TABLAS:
@@ -127,11 +217,15 @@ def test_conexion():
         print("\n[ERROR] No se pudo conectar. Revisa las credenciales.")
 
 if __name__ == "__main__":
-    import sys
-
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         # Modo test: solo probar conexión
         test_conexion()
+    elif len(sys.argv) > 1 and sys.argv[1] == "full":
+        # Extraer todas las tablas desde cero (ignora los checkpoints)
+        extraer_tablas(reanudar=False)
+    elif len(sys.argv) > 1 and sys.argv[1] == "reconciliar":
+        # Sincronizar y reconciliar todas las tablas aunque no toque
+        extraer_tablas(reconciliar=True)
     else:
-        # Modo normal: extraer todas las tablas
+        # Modo normal: traer filas nuevas y reconciliar las modificadas/borradas
         extraer_tablas()
@@ -6,13 +6,20 @@ Combina datos de múltiples tablas y crea variables derivadas
 import pandas as pd
 import numpy as np
 import sqlite3
+import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.data import dataset_io
+
 # Configuración
 SQLITE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\credisonar.db"
 OUTPUT_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\data\dataset_ml.csv"
 
+# Versión del conjunto de features (se guarda en el dataset Arrow)
+FEATURE_VERSION = 'v1'
+
 def conectar_sqlite():
     """Conecta a la BD SQLite local"""
     return sqlite3.connect(SQLITE_DB)
@@ -245,6 +252,16 @@ def guardar_dataset(df):
     df.to_csv(OUTPUT_FILE, index=False)
 
     print(f"  [OK] Dataset guardado en: {OUTPUT_FILE}")
+
+    # Guardar Arrow (columnar, tipos reducidos, lectura con memory-map)
+    if dataset_io.arrow_available():
+        arrow_file = dataset_io.arrow_path(OUTPUT_FILE)
+        dataset_io.write_dataset(df, arrow_file, metadata={
+            'feature_version': FEATURE_VERSION, 'generador': 'feature_engineering.py'
+        })
+        print(f"  [OK] Dataset columnar guardado en: {arrow_file}")
+    else:
+        print("  [INFO] pyarrow no instalado: solo se genero el CSV")
     print(f"  [OK] {len(df)} registros, {len(df.columns)} columnas")
 
     return OUTPUT_FILE
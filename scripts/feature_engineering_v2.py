@@ -6,12 +6,22 @@ Incluye más features y mejor manejo de datos para evitar overfitting
 import pandas as pd
 import numpy as np
 import sqlite3
+import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.data import dataset_io
+from src.data.feature_store import FeatureStore
+
 # Configuración
 SQLITE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\credisonar.db"
 OUTPUT_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\data\dataset_ml_v2.csv"
+FEATURE_STORE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\feature_store.db"
+
+# Versión del conjunto de features (se guarda en el dataset Arrow; los
+# entrenadores rechazan un dataset de otra versión)
+FEATURE_VERSION = 'v2'
 
 def conectar_sqlite():
     """Conecta a la BD SQLite local"""
@@ -104,133 +114,37 @@ def extraer_features_asesorias():
     print(f"  [OK] {len(df)} asesorias procesadas")
     return df
 
-def extraer_features_historial_cartera():
-    """Extrae features del historial de cartera del cliente"""
-    print("\n>> Extrayendo features de historial de cartera...")
-
-    conn = conectar_sqlite()
-    query = """
-    SELECT
-        cedula_id,
-        COUNT(*) as num_prestamos_historicos,
-        SUM(CASE WHEN estado = 'C' THEN 1 ELSE 0 END) as prestamos_cancelados,
-        SUM(CASE WHEN estado = 'A' THEN 1 ELSE 0 END) as prestamos_activos,
-        AVG(valor_desembolsado) as monto_promedio_historico,
-        MAX(valor_desembolsado) as monto_maximo_historico,
-        MIN(valor_desembolsado) as monto_minimo_historico,
-        AVG(dias_mora) as dias_mora_promedio,
-        MAX(dias_mora) as dias_mora_maximo,
-        SUM(CASE WHEN calificacion = 'A' THEN 1 ELSE 0 END) as prestamos_calificacion_A,
-        SUM(CASE WHEN calificacion = 'B' THEN 1 ELSE 0 END) as prestamos_calificacion_B,
-        SUM(CASE WHEN calificacion = 'C' THEN 1 ELSE 0 END) as prestamos_calificacion_C,
-        SUM(CASE WHEN calificacion = 'D' THEN 1 ELSE 0 END) as prestamos_calificacion_D,
-        SUM(CASE WHEN calificacion = 'E' THEN 1 ELSE 0 END) as prestamos_calificacion_E,
-        SUM(CASE WHEN restructurado = 'S' THEN 1 ELSE 0 END) as prestamos_restructurados,
-        SUM(CASE WHEN en_juridica = 'S' THEN 1 ELSE 0 END) as prestamos_en_juridica,
-        MIN(fecha_desembolso) as fecha_primer_prestamo,
-        MAX(fecha_desembolso) as fecha_ultimo_prestamo
-    FROM Cobranza_cartera
-    GROUP BY cedula_id
+def extraer_features_feature_store(tipo_cedula=None):
     """
-    df = pd.read_sql(query, conn)
-    conn.close()
+    Historial de cartera, comportamiento de pago y variable objetivo desde el
+    feature store, refrescado antes con los cambios de la base local
 
-    df.columns = ['cedula', 'num_prestamos_historicos', 'prestamos_cancelados',
-                  'prestamos_activos', 'monto_promedio_historico', 'monto_maximo_historico',
-                  'monto_minimo_historico', 'dias_mora_promedio', 'dias_mora_maximo',
-                  'prestamos_calificacion_A', 'prestamos_calificacion_B', 'prestamos_calificacion_C',
-                  'prestamos_calificacion_D', 'prestamos_calificacion_E', 'prestamos_restructurados',
-                  'prestamos_en_juridica', 'fecha_primer_prestamo', 'fecha_ultimo_prestamo']
-
-    # Calcular antigüedad como cliente (en meses)
-    df['fecha_primer_prestamo'] = pd.to_datetime(df['fecha_primer_prestamo'])
-    df['fecha_ultimo_prestamo'] = pd.to_datetime(df['fecha_ultimo_prestamo'])
-    hoy = pd.Timestamp.now()
-    df['antiguedad_cliente_meses'] = ((hoy - df['fecha_primer_prestamo']).dt.days / 30).astype(int)
-    df['meses_desde_ultimo_prestamo'] = ((hoy - df['fecha_ultimo_prestamo']).dt.days / 30).astype(int)
-
-    # Ratios importantes
-    df['ratio_prestamos_buenos'] = (df['prestamos_calificacion_A'] + df['prestamos_calificacion_B']) / df['num_prestamos_historicos']
-    df['ratio_prestamos_malos'] = (df['prestamos_calificacion_D'] + df['prestamos_calificacion_E']) / df['num_prestamos_historicos']
-    df['ratio_cancelacion'] = df['prestamos_cancelados'] / df['num_prestamos_historicos']
-    df['ratio_activos'] = df['prestamos_activos'] / df['num_prestamos_historicos']
-
-    # Eliminar fechas (ya usadas para cálculos)
-    df = df.drop(['fecha_primer_prestamo', 'fecha_ultimo_prestamo'], axis=1)
-
-    print(f"  [OK] {len(df)} historiales procesados")
-    return df
-
-def extraer_features_comportamiento_pago():
-    """Extrae features del comportamiento de pago"""
-    print("\n>> Extrayendo features de comportamiento de pago...")
-
-    conn = conectar_sqlite()
-
-    # Obtener información de pagos por préstamo
-    query = """
-    SELECT
-        car.cedula_id,
-        car.pagare,
-        COUNT(p.id) as num_pagos,
-        SUM(p.valor_pagado) as total_pagado,
-        AVG(p.valor_pagado) as promedio_valor_pago,
-        MIN(p.fecha_pago) as fecha_primer_pago,
-        MAX(p.fecha_pago) as fecha_ultimo_pago
-    FROM Cobranza_cartera car
-    LEFT JOIN Cobranza_pagos3 p ON car.pagare = p.pagare_id
-    GROUP BY car.cedula_id, car.pagare
+    La app lee los mismos agregados (OnlineFeatureLookup): entrenamiento y
+    predicción usan un solo código de agregación
     """
-    df_pagos = pd.read_sql(query, conn)
-
-    # Agrupar por cliente
-    df = df_pagos.groupby('cedula_id').agg({
-        'num_pagos': 'sum',
-        'total_pagado': 'sum',
-        'promedio_valor_pago': 'mean'
-    }).reset_index()
-
-    df.columns = ['cedula', 'total_pagos_realizados', 'monto_total_pagado', 'promedio_valor_pago']
-
-    conn.close()
-
-    print(f"  [OK] {len(df)} comportamientos procesados")
-    return df
-
-def crear_variable_objetivo():
-    """Crea la variable objetivo (target) basada en el comportamiento"""
-    print("\n>> Creando variable objetivo...")
-
-    conn = conectar_sqlite()
-
-    # Criterio mejorado: Buenos pagadores =
-    # - Todos los préstamos con calificación A o B
-    # - Días de mora máximo <= 30
-    # - No tiene préstamos en jurídica
-    query = """
-    SELECT
-        cedula_id as cedula,
-        CASE
-            WHEN MAX(dias_mora) <= 30 AND
-                 SUM(CASE WHEN calificacion IN ('A', 'B') THEN 1 ELSE 0 END) = COUNT(*) AND
-                 SUM(CASE WHEN en_juridica = 'S' THEN 1 ELSE 0 END) = 0
-            THEN 1
-            ELSE 0
-        END as es_buen_pagador
-    FROM Cobranza_cartera
-    GROUP BY cedula_id
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-
-    buenos = df[df['es_buen_pagador'] == 1]
-    malos = df[df['es_buen_pagador'] == 0]
-
-    print(f"  [OK] Variable objetivo creada:")
-    print(f"      - Buenos pagadores: {len(buenos)} ({len(buenos)/len(df)*100:.1f}%)")
-    print(f"      - Malos pagadores: {len(malos)} ({len(malos)/len(df)*100:.1f}%)")
-
-    return df
+    print("\n>> Refrescando feature store incremental...")
+
+    with FeatureStore(FEATURE_STORE_DB) as store:
+        conn = conectar_sqlite()
+        try:
+            resumen = store.refresh(conn)
+        finally:
+            conn.close()
+        print(f"  [OK] {resumen['filas_cartera']} filas de cartera, {resumen['filas_pagos']} pagos/pagarés, "
+              f"{resumen['cedulas_recalculadas']} clientes recalculados")
+
+        df_historial = store.features_historial()
+        df_pagos = store.features_pagos()
+        df_target = store.target()
+
+    # El store guarda la cédula como texto: alinear con la tabla de clientes
+    if tipo_cedula is not None:
+        for df in (df_historial, df_pagos, df_target):
+            df['cedula'] = df['cedula'].astype(tipo_cedula)
+
+    buenos = (df_target['es_buen_pagador'] == 1).sum()
+    print(f"  [OK] {len(df_historial)} historiales, buenos pagadores: {buenos} ({buenos/len(df_target)*100:.1f}%)")
+    return df_historial, df_pagos, df_target
 
 def combinar_features():
     """Combina todas las features en un solo dataset"""
@@ -241,9 +155,7 @@ def combinar_features():
     # Extraer todas las features
     df_clientes = extraer_features_clientes()
     df_asesorias = extraer_features_asesorias()
-    df_historial = extraer_features_historial_cartera()
-    df_pagos = extraer_features_comportamiento_pago()
-    df_target = crear_variable_objetivo()
+    df_historial, df_pagos, df_target = extraer_features_feature_store(df_clientes['cedula'].dtype)
 
     # Combinar todo
     print("\n>> Combinando features...")
@@ -276,6 +188,16 @@ def guardar_dataset(df):
     df.to_csv(OUTPUT_FILE, index=False)
 
     print(f"  [OK] Dataset guardado en: {OUTPUT_FILE}")
+
+    # Guardar Arrow (columnar, tipos reducidos, lectura con memory-map)
+    if dataset_io.arrow_available():
+        arrow_file = dataset_io.arrow_path(OUTPUT_FILE)
+        dataset_io.write_dataset(df, arrow_file, metadata={
+            'feature_version': FEATURE_VERSION, 'generador': 'feature_engineering_v2.py'
+        })
+        print(f"  [OK] Dataset columnar guardado en: {arrow_file}")
+    else:
+        print("  [INFO] pyarrow no instalado: solo se genero el CSV")
     print(f"  [OK] {len(df)} registros, {len(df.columns)} columnas")
 
     return OUTPUT_FILE
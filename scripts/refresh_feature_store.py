@@ -0,0 +1,61 @@
+"""
+Refresco del feature store incremental (correrlo después de cada extracción)
+Aplica sólo las filas nuevas, modificadas o borradas de Cobranza_cartera y
+Cobranza_pagos3 que registró la extracción en la base local y recalcula esas
+cédulas
+
+Uso:
+    python scripts/refresh_feature_store.py          # incremental
+    python scripts/refresh_feature_store.py full     # reconstruir desde cero
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.data.feature_store import FeatureStore
+
+# Configuración
+SQLITE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\credisonar.db"
+FEATURE_STORE_DB = r"c:\Desarrollos\projectos2026\proyecto1ML\data\feature_store.db"
+
+# Columna de última modificación de Cobranza_cartera para la marca de agua.
+# None = registro de cambios de la extracción (la tabla no tiene esa columna; 'id'
+# no sirve: sólo detecta préstamos nuevos, no cambios de estado, mora o calificación)
+COLUMNA_CARTERA = None
+
+def refrescar(full=False):
+    """Refresca el feature store desde la BD SQLite local"""
+    if not Path(SQLITE_DB).exists():
+        print(f"\n[ERROR] No se encontro la base de datos: {SQLITE_DB}")
+        print("Ejecuta primero: extract_from_godaddy.py")
+        return
+
+    print(f"\n>> Refrescando feature store ({'completo' if full else 'incremental'})...")
+    inicio = time.time()
+
+    conn = sqlite3.connect(SQLITE_DB)
+    try:
+        with FeatureStore(FEATURE_STORE_DB, columna_cartera=COLUMNA_CARTERA) as store:
+            resumen = store.refresh(conn, full=full)
+            if resumen.get('reconstruido'):
+                print("  [OK] Store reconstruido completo")
+            print(f"  [OK] Filas de cartera aplicadas: {resumen['filas_cartera']:,}")
+            if COLUMNA_CARTERA is None:
+                print(f"  [OK] Pagarés con pagos actualizados: {resumen['filas_pagos']:,}")
+                print(f"  [OK] Registro de cambios aplicado hasta: {store.watermark('cambios')}")
+            else:
+                print(f"  [OK] Pagos nuevos aplicados: {resumen['filas_pagos']:,}")
+                print(f"  [OK] Marca de agua cartera: {store.watermark('Cobranza_cartera')}")
+            print(f"  [OK] Clientes recalculados: {resumen['cedulas_recalculadas']:,}")
+            print(f"  [OK] Marca de agua pagos: {store.watermark('Cobranza_pagos3')}")
+    finally:
+        conn.close()
+
+    print(f"\n[COMPLETADO] Feature store actualizado en {time.time() - inicio:.1f}s")
+    print(f">> {FEATURE_STORE_DB}")
+
+if __name__ == "__main__":
+    refrescar(full=len(sys.argv) > 1 and sys.argv[1] == "full")
@@ -6,6 +6,7 @@ Entrena y compara múltiples modelos para predicción de buenos pagadores
 import pandas as pd
 import numpy as np
 import pickle
+import sys
 from pathlib import Path
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import StandardScaler
@@ -18,8 +19,12 @@ from sklearn.metrics import (
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.data.dataset_io import load_training_data
+
 # Configuración
 DATA_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\data\dataset_ml.csv"
+FEATURE_VERSION = 'v1'  # Versión de features esperada en el dataset Arrow
 MODEL_DIR = r"c:\Desarrollos\projectos2026\proyecto1ML\models"
 SCALER_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\scaler_real.pkl"
 BEST_MODEL_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\best_model_real.pkl"
@@ -27,8 +32,8 @@ BEST_MODEL_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\best_model_r
 def cargar_datos():
     """Carga el dataset procesado"""
     print("\n>> Cargando datos...")
-    df = pd.read_sql(DATA_FILE)
-    print(f"  [OK] {len(df)} registros cargados")
+    df, ruta = load_training_data(DATA_FILE, expected_version=FEATURE_VERSION)
+    print(f"  [OK] {len(df)} registros cargados ({Path(ruta).name})")
     return df
 
 def preparar_datos(df):
@@ -248,7 +253,7 @@ def main():
 
     try:
         # Cargar y preparar datos
-        df = pd.read_csv(DATA_FILE)
+        df = cargar_datos()
         X, y = preparar_datos(df)
 
         # Dividir datos
@@ -6,6 +6,7 @@ Usa técnicas avanzadas para evitar overfitting y generalizar mejor
 import pandas as pd
 import numpy as np
 import pickle
+import sys
 from pathlib import Path
 from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.preprocessing import StandardScaler
@@ -18,12 +19,18 @@ from sklearn.metrics import (
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.data.dataset_io import load_training_data
+from src.models.model_bundle import write_bundle
+
 # Configuración
 DATA_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\data\dataset_ml_v2.csv"
+FEATURE_VERSION = 'v2'  # Versión de features esperada en el dataset Arrow
 MODEL_DIR = r"c:\Desarrollos\projectos2026\proyecto1ML\models"
 SCALER_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\scaler_v2.pkl"
 BEST_MODEL_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\best_model_v2.pkl"
 FEATURE_NAMES_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\feature_names_v2.pkl"
+MODEL_BUNDLE_FILE = r"c:\Desarrollos\projectos2026\proyecto1ML\models\best_model_v2.bundle"
 
 def preparar_datos(df):
     """Prepara los datos para entrenamiento"""
@@ -233,7 +240,7 @@ def seleccionar_mejor_modelo(resultados):
 
     return mejor_nombre, mejor_resultado['modelo']
 
-def guardar_modelo(modelo, nombre, feature_names):
+def guardar_modelo(modelo, nombre, feature_names, scaler):
     """Guarda el mejor modelo"""
     print(f"\n>> Guardando modelo...")
 
@@ -250,6 +257,11 @@ def guardar_modelo(modelo, nombre, feature_names):
 
     print(f"  [OK] Feature names guardados en: {FEATURE_NAMES_FILE}")
 
+    # Paquete único (modelo + scaler + orden de features) que cargan las apps
+    write_bundle(MODEL_BUNDLE_FILE, {'model': modelo, 'scaler': scaler}, version='v2',
+                 feature_names=feature_names, metadata={'modelo': nombre, 'dataset': DATA_FILE})
+    print(f"  [OK] Paquete del modelo guardado en: {MODEL_BUNDLE_FILE}")
+
     # Guardar info del modelo
     info_file = Path(MODEL_DIR) / "model_info_v2.txt"
     with open(info_file, 'w') as f:
@@ -298,8 +310,8 @@ def main():
 
     try:
         # Cargar y preparar datos
-        df = pd.read_csv(DATA_FILE)
-        print(f"\n[INFO] Dataset cargado: {len(df)} registros")
+        df, ruta = load_training_data(DATA_FILE, expected_version=FEATURE_VERSION)
+        print(f"\n[INFO] Dataset cargado: {len(df)} registros ({Path(ruta).name})")
 
         X, y = preparar_datos(df)
 
@@ -319,7 +331,7 @@ def main():
         mejor_nombre, mejor_modelo = seleccionar_mejor_modelo(resultados)
 
         # Guardar modelo
-        guardar_modelo(mejor_modelo, mejor_nombre, X.columns.tolist())
+        guardar_modelo(mejor_modelo, mejor_nombre, X.columns.tolist(), scaler)
 
         # Analizar importancia de features
         analizar_importancia_features(mejor_modelo, X.columns.tolist())
@@ -331,6 +343,7 @@ def main():
         print(f"  - Modelo: {BEST_MODEL_FILE}")
         print(f"  - Scaler: {SCALER_FILE}")
         print(f"  - Features: {FEATURE_NAMES_FILE}")
+        print(f"  - Paquete: {MODEL_BUNDLE_FILE}")
         print(f"\nProximo paso: Crear/actualizar interfaz de prediccion")
 
     except Exception as e:
@@ -0,0 +1,150 @@
+"""
+Micro-batching de evaluaciones individuales
+Las solicitudes concurrentes a /evaluar se juntan en lotes (hasta max_batch o
+max_wait_ms) que se puntúan con una sola llamada vectorizada; cada solicitud
+recibe su fila del resultado
+
+Adaptativo: si no hay lotes en curso el primero sale sin esperar (con poca
+carga no se agrega latencia); con lotes en curso las solicitudes se acumulan
+hasta que se libera un lugar, así que el tamaño del lote crece con la carga
+"""
+
+import asyncio
+
+from src.api.serving import PoolSaturadoError
+
+
+class MicroBatcher:
+    """
+    Agrupa solicitudes individuales en lotes
+
+    Uso (desde el event loop):
+        batcher = MicroBatcher(puntuar, max_batch=64, max_wait_ms=2)
+        resultado = await batcher.submit(datos)
+
+    `puntuar` es una corrutina que recibe la lista de registros y retorna un
+    dict de listas (una posición por registro), como puntuar_lote.
+    """
+
+    def __init__(self, puntuar, max_batch=64, max_wait_ms=2.0, max_in_flight=1, max_queue=1024):
+        """
+        Args:
+            puntuar: Corrutina lista de registros -> dict de listas
+            max_batch: Registros máximos por lote
+            max_wait_ms: Espera máxima para completar un lote (con lotes en curso)
+            max_in_flight: Lotes puntuándose a la vez (ej: procesos de scoring)
+            max_queue: Solicitudes esperando lote antes de rechazar (backpressure)
+        """
+        if max_batch < 1 or max_in_flight < 1 or max_queue < 1:
+            raise ValueError("max_batch, max_in_flight y max_queue deben ser al menos 1")
+
+        self.puntuar = puntuar
+        self.max_batch = int(max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_in_flight = int(max_in_flight)
+        self.max_queue = int(max_queue)
+
+        self._cola = []          # [(registro, future)]
+        self._en_vuelo = 0
+        self._tareas = set()     # Lotes en curso (referencia para que no se recolecten)
+        self._loop = None        # Event loop de la cola (se fija en el primer submit)
+        self._despachador = None
+
+        self._lotes = 0
+        self._registros = 0
+        self._rechazadas = 0
+
+    async def submit(self, registro):
+        """
+        Encola un registro y espera su resultado
+
+        Raises:
+            PoolSaturadoError: Si ya hay max_queue solicitudes esperando lote
+        """
+        if len(self._cola) >= self.max_queue:
+            self._rechazadas += 1
+            raise PoolSaturadoError(f"Cola de evaluación llena ({self.max_queue} solicitudes)")
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._hay_cola = asyncio.Event()
+            self._lote_lleno = asyncio.Event()
+            self._hay_lugar = asyncio.Event()
+            self._hay_lugar.set()
+            self._despachador = None
+        if self._despachador is None or self._despachador.done():
+            self._despachador = loop.create_task(self._despachar())
+
+        future = loop.create_future()
+        self._cola.append((registro, future))
+        self._hay_cola.set()
+        if len(self._cola) >= self.max_batch:
+            self._lote_lleno.set()
+        return await future
+
+    async def _despachar(self):
+        """Arma lotes mientras haya solicitudes"""
+        while True:
+            await self._hay_cola.wait()
+
+            # Con lotes en curso se espera a llenar el lote (hasta max_wait)
+            if self._en_vuelo and len(self._cola) < self.max_batch:
+                self._lote_lleno.clear()
+                try:
+                    await asyncio.wait_for(self._lote_lleno.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            # Sin lugar para otro lote: seguir acumulando hasta que se libere
+            while self._en_vuelo >= self.max_in_flight:
+                self._hay_lugar.clear()
+                await self._hay_lugar.wait()
+
+            lote, self._cola = self._cola[:self.max_batch], self._cola[self.max_batch:]
+            if not self._cola:
+                self._hay_cola.clear()
+            self._en_vuelo += 1
+            tarea = asyncio.create_task(self._puntuar(lote))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def _puntuar(self, lote):
+        """Puntúa un lote y entrega a cada solicitud su fila"""
+        try:
+            columnas = await self.puntuar([registro for registro, _ in lote])
+        except Exception as e:
+            for _, future in lote:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for i, (_, future) in enumerate(lote):
+                if not future.done():  # La solicitud pudo haberse cancelado
+                    future.set_result({columna: valores[i] for columna, valores in columnas.items()})
+            self._lotes += 1
+            self._registros += len(lote)
+        finally:
+            self._en_vuelo -= 1
+            self._hay_lugar.set()
+
+    async def close(self):
+        """Detiene el despachador (las solicitudes ya en lote terminan)"""
+        if self._despachador is not None and not self._despachador.done():
+            self._despachador.cancel()
+            try:
+                await self._despachador
+            except asyncio.CancelledError:
+                pass
+        self._despachador = None
+        if self._tareas:
+            await asyncio.gather(*self._tareas, return_exceptions=True)
+
+    def stats(self):
+        """Estado del micro-batching (para /health)"""
+        return {
+            'en_cola': len(self._cola),
+            'lotes_en_curso': self._en_vuelo,
+            'lotes': self._lotes,
+            'promedio_por_lote': round(self._registros / self._lotes, 2) if self._lotes else 0.0,
+            'rechazadas': self._rechazadas,
+        }
@@ -4,9 +4,11 @@ Endpoints para evaluar solicitudes de crédito
 """
 
 from fastapi import FastAPI, HTTPException
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
@@ -16,6 +18,10 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.models.credit_model import CreditScoringModel
 from src.data.data_processor import CreditDataProcessor
+from src.models.scoring_policy import get_scoring_policy
+from src.models.prediction_cache import PredictionCache
+from src.api.serving import ServingConfig, ScoringPool, PoolSaturadoError
+from src.api.batching import MicroBatcher
 
 # Inicializar FastAPI
 app = FastAPI(
@@ -33,9 +39,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paquete con modelo y procesador (CreditScoringModel.save(..., processor=...))
+MODEL_BUNDLE_FILE = "models/credit_model.bundle"
+
 # Cargar modelo y procesador (en producción, cargar desde archivos)
 modelo = None
 procesador = None
+plan_inferencia = None
+
+# Máximo de clientes por solicitud de evaluación en lote
+MAX_CLIENTES_LOTE = 10000
+
+# Procesos de scoring y cola máxima (config/config.yaml, api.serving)
+serving_config = ServingConfig.from_config()
+pool_scoring = ScoringPool(serving_config)
+batcher = None
+
+# Resultados de /evaluar por solicitud (misma solicitud = mismo resultado
+# mientras no cambien el modelo ni la política de scoring)
+PREDICCION_CACHE_MAX = 10000
+cache_predicciones = PredictionCache(max_size=PREDICCION_CACHE_MAX)
 
 
 # Modelos Pydantic para request/response
@@ -101,18 +124,48 @@ class EvaluacionResponse(BaseModel):
     explicacion: List[str] = Field(..., description="Factores que influyen")
 
 
+class LoteInput(BaseModel):
+    """Lote de clientes a evaluar (se validan uno por uno)"""
+    clientes: List[Any] = Field(
+        ..., description=f"Clientes con el mismo formato de /evaluar (máximo {MAX_CLIENTES_LOTE})"
+    )
+    factores_shap: int = Field(0, ge=0, le=10, description="Factores SHAP por cliente (0 = sin explicación SHAP)")
+
+
+class ResultadoLote(BaseModel):
+    """Resultado de un cliente dentro del lote"""
+    indice: int = Field(..., description="Posición del cliente en el lote")
+    evaluacion: Optional[EvaluacionResponse] = Field(None, description="Evaluación si el cliente es válido")
+    error: Optional[str] = Field(None, description="Errores de validación del cliente")
+    factores_shap: Optional[List[Dict[str, Any]]] = Field(None, description="Factores SHAP principales (si se pidieron)")
+
+
+class LoteResponse(BaseModel):
+    """Respuesta de la evaluación en lote"""
+    total: int = Field(..., description="Clientes recibidos")
+    evaluados: int = Field(..., description="Clientes evaluados")
+    errores: int = Field(..., description="Clientes con errores de validación")
+    resultados: List[ResultadoLote] = Field(..., description="Resultados en el mismo orden del lote")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Carga el modelo al iniciar la API"""
-    global modelo, procesador
+    global modelo, procesador, plan_inferencia, batcher
     try:
         modelo = CreditScoringModel(model_type='xgboost')
         procesador = CreditDataProcessor()
 
-        # Intentar cargar modelo pre-entrenado
+        # Intentar cargar modelo pre-entrenado (paquete único si existe)
         try:
-            modelo.load("models/credit_model.pkl")
-            procesador.load("models/data_processor.pkl")
+            if Path(MODEL_BUNDLE_FILE).exists():
+                modelo.load(MODEL_BUNDLE_FILE)
+                procesador.load(MODEL_BUNDLE_FILE)
+            else:
+                modelo.load("models/credit_model.pkl")
+                procesador.load("models/data_processor.pkl")
+            plan_inferencia = procesador.compile_inference_plan()
+            version_cache()  # Modelo nuevo: la caché de predicciones empieza vacía
             print("✅ Modelo y procesador cargados exitosamente")
         except FileNotFoundError:
             print("⚠️ Advertencia: Modelo no encontrado. Ejecutar entrenamiento primero.")
@@ -120,6 +173,165 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Error al cargar modelo: {e}")
 
+    # Con el modelo ya cargado: los procesos de scoring lo heredan al hacer fork
+    pool_scoring.start()
+    if serving_config.batching:
+        batcher = MicroBatcher(
+            puntuar_en_pool,
+            max_batch=serving_config.max_batch,
+            max_wait_ms=serving_config.max_wait_ms,
+            max_in_flight=max(serving_config.scoring_workers, 1),
+            max_queue=serving_config.max_queue
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detiene el micro-batching y los procesos de scoring"""
+    if batcher is not None:
+        await batcher.close()
+    pool_scoring.shutdown()
+
+
+def calcular_monto_maximo(decisiones, montos_solicitados):
+    """Monto máximo recomendado según la decisión (vectorizado)"""
+    decisiones = np.asarray(decisiones)
+    montos_solicitados = np.asarray(montos_solicitados, dtype=float)
+    return np.select(
+        [decisiones == 'APROBAR', decisiones == 'REVISAR MANUAL'],
+        [montos_solicitados, montos_solicitados * 0.7],
+        default=0.0
+    )
+
+
+def generar_explicacion(cliente: ClienteInput):
+    """Factores que influyen en la evaluación del cliente"""
+    explicacion = []
+    if cliente.pagos_puntuales_pct > 0.8:
+        explicacion.append(f"✓ Buen historial ({cliente.pagos_puntuales_pct:.0%} puntualidad)")
+    elif cliente.pagos_puntuales_pct < 0.6:
+        explicacion.append(f"✗ Bajo historial ({cliente.pagos_puntuales_pct:.0%})")
+
+    if cliente.ingreso_mensual > 20000:
+        explicacion.append("✓ Ingreso estable")
+    elif cliente.ingreso_mensual < 10000:
+        explicacion.append("⚠ Ingreso bajo")
+
+    if cliente.ratio_deuda_ingreso > 0.5:
+        explicacion.append("⚠ Alto endeudamiento")
+
+    if cliente.dias_atraso_promedio > 15:
+        explicacion.append(f"✗ Atrasos ({cliente.dias_atraso_promedio} días)")
+
+    return explicacion if explicacion else ["Análisis estándar"]
+
+
+def puntuar_cliente(datos):
+    """
+    Preprocesa y puntúa un cliente (corre en un proceso del pool de scoring)
+
+    Returns:
+        dict de predict_complete más monto_maximo_recomendado y
+        version_politica (política con que se decidió, vista por este proceso)
+    """
+    if plan_inferencia is not None:
+        # Ruta rápida: vector escalado directo, sin pandas
+        X = plan_inferencia.transform(datos).reshape(1, -1)
+    else:
+        # Convertir a DataFrame
+        df = pd.DataFrame([datos])
+
+        # Preprocesar
+        df_processed = procesador.preprocess(df, fit=False)
+        X = procesador.scale_features(df_processed, fit=False)
+
+    # Predecir (con una sola política: la que se reporta en el resultado)
+    politica = modelo.scoring_policy
+    resultado = modelo.predict_complete(X, politica)[0]
+    resultado['version_politica'] = politica.version
+
+    # Monto máximo
+    resultado['monto_maximo_recomendado'] = float(
+        calcular_monto_maximo([resultado['decision']], [datos['monto_solicitado']])[0]
+    )
+    return resultado
+
+
+def puntuar_lote(registros, factores_shap=0):
+    """
+    Preprocesa y puntúa un lote de clientes ya validados en una sola pasada
+    (corre en un proceso del pool de scoring)
+
+    Args:
+        registros: Lista de dicts de clientes validados
+        factores_shap: Factores SHAP por cliente (0 = sin explicación SHAP)
+
+    Returns:
+        dict de listas (una posición por cliente)
+    """
+    if plan_inferencia is not None:
+        # Ruta rápida: matriz escalada directa, sin pandas
+        X = plan_inferencia.transform_many(registros)
+    else:
+        # Un solo DataFrame para todo el lote
+        df = pd.DataFrame.from_records(registros)
+
+        # Preprocesar y escalar en una sola pasada
+        df_processed = procesador.preprocess(df, fit=False)
+        X = procesador.scale_features(df_processed, fit=False)
+    politica = modelo.scoring_policy
+    predicciones = modelo.predict_columnar(X, politica)
+
+    montos_max = calcular_monto_maximo(
+        predicciones['decision'].to_numpy(),
+        [datos['monto_solicitado'] for datos in registros]
+    )
+    columnas = {columna: predicciones[columna].tolist() for columna in predicciones.columns}
+    columnas['monto_maximo_recomendado'] = montos_max.tolist()
+    columnas['version_politica'] = [politica.version] * len(registros)
+    if factores_shap:
+        # Una sola llamada a SHAP para todo el lote
+        columnas['factores_shap'] = modelo.explain_batch(
+            X, top_k=factores_shap,
+            feature_names=plan_inferencia.feature_names if plan_inferencia is not None else None
+        )
+    return columnas
+
+
+def version_cache():
+    """
+    Versión de la caché de predicciones: modelo cargado + política vigente
+    (el resultado incluye decisión y tasa, que dependen de la política)
+
+    Si cambió desde la última consulta, la caché se vacía.
+
+    Returns:
+        Versión de la política vigente en este proceso: un resultado sólo se
+        guarda si el proceso de scoring lo decidió con esa misma política
+        (cada proceso relee el YAML con su propio intervalo)
+    """
+    politica = get_scoring_policy()
+    cache_predicciones.set_model_version(f"{modelo.version}|{politica.version}")
+    return politica.version
+
+
+async def puntuar_en_pool(registros):
+    """Un lote del micro-batching, puntuado en el pool de scoring"""
+    return await pool_scoring.run(puntuar_lote, registros)
+
+
+def cola_llena(error: PoolSaturadoError):
+    """503 con Retry-After cuando el pool de scoring no admite más solicitudes"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+
+
+def formatear_errores(error: ValidationError):
+    """Resume los errores de validación de pydantic en una línea"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
 
 @app.get("/")
 def read_root():
@@ -129,7 +341,9 @@ def read_root():
         "version": "1.0.0",
         "endpoints": {
             "POST /evaluar": "Evaluar solicitud de crédito",
+            "POST /evaluar/lote": "Evaluar un lote de solicitudes en una sola pasada",
             "GET /health": "Estado de la API",
+            "GET /politica": "Política de scoring vigente",
             "GET /docs": "Documentación"
         }
     }
@@ -144,67 +358,142 @@ def health_check():
     return {
         "status": "healthy" if (modelo_ok and procesador_ok) else "unhealthy",
         "modelo_cargado": modelo_ok,
-        "procesador_cargado": procesador_ok
+        "procesador_cargado": procesador_ok,
+        "pool_scoring": pool_scoring.stats(),
+        "micro_batching": batcher.stats() if batcher is not None else None,
+        "cache_predicciones": cache_predicciones.stats()
     }
 
 
+@app.get("/politica")
+def politica_scoring():
+    """Umbrales y tasas vigentes (se recargan al cambiar config/config.yaml)"""
+    return get_scoring_policy().to_dict()
+
+
 @app.post("/evaluar", response_model=EvaluacionResponse)
-def evaluar_credito(cliente: ClienteInput):
+async def evaluar_credito(cliente: ClienteInput):
     """Evalúa una solicitud de crédito"""
     if modelo is None or modelo.model is None:
         raise HTTPException(status_code=503, detail="Modelo no disponible")
 
-    try:
-        # Convertir a DataFrame
-        df = pd.DataFrame([cliente.dict()])
+    datos = cliente.dict()
 
-        # Preprocesar
-        df_processed = procesador.preprocess(df, fit=False)
-        X = procesador.scale_features(df_processed, fit=False)
+    # Solicitud repetida: sin preprocesar ni evaluar el modelo
+    version_politica = version_cache()
+    clave = cache_predicciones.record_key(datos)
+    resultado = cache_predicciones.get(clave)
+
+    if resultado is None:
+        try:
+            if batcher is not None:
+                # Se puntúa junto con las demás solicitudes concurrentes
+                resultado = await batcher.submit(datos)
+            else:
+                resultado = await pool_scoring.run(puntuar_cliente, datos)
+        except PoolSaturadoError as e:
+            raise cola_llena(e)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+        if resultado.get('version_politica') == version_politica:
+            cache_predicciones.put(clave, resultado)
+
+    return EvaluacionResponse(
+        score=resultado['score'],
+        probabilidad_default=resultado['probabilidad_default'],
+        decision=resultado['decision'],
+        tasa_sugerida=resultado['tasa_sugerida'],
+        monto_maximo_recomendado=resultado['monto_maximo_recomendado'],
+        confianza=resultado['confianza'],
+        explicacion=generar_explicacion(cliente)
+    )
+
+
+def validar_lote(clientes):
+    """
+    Valida cliente por cliente
+
+    Returns:
+        (resultados con los errores ya anotados, clientes válidos, sus índices)
+    """
+    resultados = [ResultadoLote(indice=i) for i in range(len(clientes))]
+    validos = []
+    indices_validos = []
+    for i, datos in enumerate(clientes):
+        if not isinstance(datos, dict):
+            resultados[i].error = "El cliente debe ser un objeto JSON"
+            continue
+        try:
+            validos.append(ClienteInput(**datos))
+            indices_validos.append(i)
+        except ValidationError as e:
+            resultados[i].error = formatear_errores(e)
+    return resultados, validos, indices_validos
+
+
+@app.post("/evaluar/lote", response_model=LoteResponse)
+async def evaluar_lote(lote: LoteInput):
+    """
+    Evalúa un lote de solicitudes en una sola pasada vectorizada
 
-        # Predecir
-        resultado = modelo.predict_complete(X)[0]
-
-        # Monto máximo
-        if resultado['decision'] == 'APROBAR':
-            monto_max = cliente.monto_solicitado
-        elif resultado['decision'] == 'REVISAR MANUAL':
-            monto_max = cliente.monto_solicitado * 0.7
-        else:
-            monto_max = 0.0
-
-        # Explicación
-        explicacion = []
-        if cliente.pagos_puntuales_pct > 0.8:
-            explicacion.append(f"✓ Buen historial ({cliente.pagos_puntuales_pct:.0%} puntualidad)")
-        elif cliente.pagos_puntuales_pct < 0.6:
-            explicacion.append(f"✗ Bajo historial ({cliente.pagos_puntuales_pct:.0%})")
-
-        if cliente.ingreso_mensual > 20000:
-            explicacion.append("✓ Ingreso estable")
-        elif cliente.ingreso_mensual < 10000:
-            explicacion.append("⚠ Ingreso bajo")
-
-        if cliente.ratio_deuda_ingreso > 0.5:
-            explicacion.append("⚠ Alto endeudamiento")
-
-        if cliente.dias_atraso_promedio > 15:
-            explicacion.append(f"✗ Atrasos ({cliente.dias_atraso_promedio} días)")
-
-        return EvaluacionResponse(
-            score=resultado['score'],
-            probabilidad_default=resultado['probabilidad_default'],
-            decision=resultado['decision'],
-            tasa_sugerida=resultado['tasa_sugerida'],
-            monto_maximo_recomendado=monto_max,
-            confianza=resultado['confianza'],
-            explicacion=explicacion if explicacion else ["Análisis estándar"]
+    Cada cliente se valida por separado: los inválidos se reportan con su
+    error sin detener la evaluación del resto del lote.
+    """
+    if modelo is None or modelo.model is None:
+        raise HTTPException(status_code=503, detail="Modelo no disponible")
+
+    if len(lote.clientes) > MAX_CLIENTES_LOTE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote excede el máximo de {MAX_CLIENTES_LOTE} clientes"
         )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    # Validar fuera del event loop (hasta MAX_CLIENTES_LOTE modelos pydantic)
+    resultados, validos, indices_validos = await run_in_threadpool(validar_lote, lote.clientes)
+
+    if validos:
+        try:
+            predicciones = await pool_scoring.run(
+                puntuar_lote, [cliente.dict() for cliente in validos], lote.factores_shap
+            )
+        except PoolSaturadoError as e:
+            raise cola_llena(e)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+        columnas = zip(
+            indices_validos,
+            validos,
+            predicciones['score'],
+            predicciones['probabilidad_default'],
+            predicciones['decision'],
+            predicciones['tasa_sugerida'],
+            predicciones['monto_maximo_recomendado'],
+            predicciones['confianza']
+        )
+        for i, cliente, score, proba, decision, tasa, monto_max, confianza in columnas:
+            resultados[i].evaluacion = EvaluacionResponse(
+                score=score,
+                probabilidad_default=proba,
+                decision=decision,
+                tasa_sugerida=tasa,
+                monto_maximo_recomendado=monto_max,
+                confianza=confianza,
+                explicacion=generar_explicacion(cliente)
+            )
+        if lote.factores_shap:
+            for i, factores in zip(indices_validos, predicciones['factores_shap']):
+                resultados[i].factores_shap = factores
+
+    return LoteResponse(
+        total=len(lote.clientes),
+        evaluados=len(validos),
+        errores=len(lote.clientes) - len(validos),
+        resultados=resultados
+    )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Un proceso HTTP; el scoring se reparte en serving_config.scoring_workers procesos
+    uvicorn.run(app, host=serving_config.host, port=serving_config.port)
@@ -0,0 +1,181 @@
+"""
+Modo de servicio multiproceso de la API
+El scoring (CPU) corre en un pool de procesos creado por fork después de
+cargar el modelo: los procesos heredan modelo y procesador ya cargados
+(páginas compartidas copy-on-write, y las del paquete .bundle por
+memory-map). El proceso HTTP sólo valida y serializa; si la cola de scoring
+está llena responde 503 en lugar de acumular solicitudes (backpressure)
+
+Configuración en config/config.yaml, sección api.serving
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:  # PyYAML es opcional: sin él se usa la configuración por defecto
+    yaml = None
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "config.yaml"
+
+
+class PoolSaturadoError(Exception):
+    """La cola de scoring está llena: el cliente debe reintentar más tarde"""
+
+
+class ServingConfig:
+    """Parámetros del modo de servicio (sección api.serving del YAML)"""
+
+    def __init__(self, scoring_workers=None, max_pending=None, host="0.0.0.0", port=8000,
+                 batching=True, max_batch=64, max_wait_ms=2.0, max_queue=1024, source=None):
+        """
+        Args:
+            scoring_workers: Procesos de scoring (None = uno por núcleo;
+                0 = scoring en hilos del mismo proceso, sin fork)
+            max_pending: Solicitudes en cola o en curso antes de responder
+                503 (None = 4 por proceso de scoring)
+            host, port: Dirección de escucha de uvicorn
+            batching: Juntar las llamadas concurrentes a /evaluar en lotes
+            max_batch: Registros máximos por lote
+            max_wait_ms: Espera máxima para completar un lote
+            max_queue: Solicitudes esperando lote antes de responder 503
+            source: Origen de la configuración (ruta del YAML) para diagnóstico
+        """
+        if scoring_workers is None:
+            scoring_workers = os.cpu_count() or 1
+        if max_pending is None:
+            max_pending = 4 * max(scoring_workers, 1)
+        if scoring_workers < 0:
+            raise ValueError("scoring_workers no puede ser negativo")
+        if max_pending < 1:
+            raise ValueError("max_pending debe ser al menos 1")
+
+        self.scoring_workers = int(scoring_workers)
+        self.max_pending = int(max_pending)
+        self.host = host
+        self.port = int(port)
+        self.batching = bool(batching)
+        self.max_batch = int(max_batch)
+        self.max_wait_ms = float(max_wait_ms)
+        self.max_queue = int(max_queue)
+        self.source = source
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_CONFIG_PATH):
+        """Lee api.serving del YAML; sin PyYAML o sin archivo usa los valores por defecto"""
+        if yaml is None or not Path(path).exists():
+            return cls()
+
+        with open(path, encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+        serving = (config.get('api') or {}).get('serving') or {}
+        batching = serving.get('batching') or {}
+        return cls(
+            scoring_workers=serving.get('scoring_workers'),
+            max_pending=serving.get('max_pending'),
+            host=serving.get('host', "0.0.0.0"),
+            port=serving.get('port', 8000),
+            batching=batching.get('enabled', True),
+            max_batch=batching.get('max_batch', 64),
+            max_wait_ms=batching.get('max_wait_ms', 2.0),
+            max_queue=batching.get('max_queue', 1024),
+            source=str(path)
+        )
+
+
+def _listo(_):
+    """Tarea vacía para forzar el fork de los procesos al arrancar"""
+    return os.getpid()
+
+
+class ScoringPool:
+    """
+    Pool de procesos de scoring con cola acotada
+
+    Uso (desde el event loop):
+        pool = ScoringPool(config)
+        pool.start()          # después de cargar el modelo
+        resultado = await pool.run(funcion, argumentos)
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._completadas = 0
+        self._rechazadas = 0
+
+    @property
+    def en_proceso(self):
+        """True si el scoring corre en procesos separados (fork)"""
+        return self._executor is not None
+
+    def start(self):
+        """
+        Crea los procesos de scoring
+
+        Llamar después de cargar el modelo: con fork los procesos heredan
+        todo lo cargado. Los procesos se crean aquí (no en la primera
+        solicitud) para que todos vean el mismo estado.
+        """
+        if self.config.scoring_workers == 0:
+            return
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            # Windows: sin fork cada proceso tendría que volver a cargar el modelo
+            print("⚠️ fork no disponible: el scoring corre en hilos del mismo proceso")
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.config.scoring_workers,
+            mp_context=multiprocessing.get_context('fork')
+        )
+        list(self._executor.map(_listo, range(self.config.scoring_workers)))
+        print(f"✅ Pool de scoring: {self.config.scoring_workers} procesos, cola máxima {self.config.max_pending}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, funcion, *args):
+        """
+        Ejecuta funcion(*args) en el pool (o en un hilo si no hay procesos)
+
+        Raises:
+            PoolSaturadoError: Si ya hay max_pending solicitudes en cola o en curso
+        """
+        with self._lock:
+            if self._pendientes >= self.config.max_pending:
+                self._rechazadas += 1
+                raise PoolSaturadoError(
+                    f"Cola de scoring llena ({self.config.max_pending} solicitudes en curso)"
+                )
+            self._pendientes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            resultado = await loop.run_in_executor(self._executor, funcion, *args)
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+        with self._lock:
+            self._completadas += 1
+        return resultado
+
+    def stats(self):
+        """Estado del pool (para /health)"""
+        with self._lock:
+            return {
+                'procesos': self.config.scoring_workers if self.en_proceso else 0,
+                'en_cola': self._pendientes,
+                'max_en_cola': self.config.max_pending,
+                'completadas': self._completadas,
+                'rechazadas': self._rechazadas,
+            }
@@ -7,6 +7,11 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import joblib
+from pathlib import Path
+
+from src.data.dataset_io import read_dataset
+from src.data.inference_plan import InferencePlan
+from src.models.model_bundle import BUNDLE_SUFFIX, is_bundle, load_bundle, write_bundle
 
 
 class CreditDataProcessor:
@@ -16,10 +21,11 @@ class CreditDataProcessor:
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.feature_names = None
+        self.medians = None  # Medianas de entrenamiento para imputar faltantes
 
     def load_data(self, file_path):
-        """Carga datos desde archivo CSV"""
-        df = pd.read_csv(file_path)
+        """Carga datos desde archivo CSV o Arrow (.arrow, con memory-map)"""
+        df = read_dataset(file_path)
         print(f"✅ Datos cargados: {df.shape[0]} registros, {df.shape[1]} columnas")
         return df
 
@@ -50,18 +56,24 @@ class CreditDataProcessor:
                     df[col] = self.label_encoders[col].fit_transform(df[col].astype(str))
                 else:
                     if col in self.label_encoders:
-                        # Manejar valores no vistos
-                        df[col] = df[col].apply(
-                            lambda x: x if x in self.label_encoders[col].classes_
-                            else self.label_encoders[col].classes_[0]
-                        )
-                        df[col] = self.label_encoders[col].transform(df[col].astype(str))
+                        # Manejar valores no vistos (vectorizado para lotes)
+                        classes = self.label_encoders[col].classes_
+                        valores = df[col].astype(str)
+                        valores = valores.where(valores.isin(classes), classes[0])
+                        df[col] = self.label_encoders[col].transform(valores)
 
         # Feature engineering
         df = self.create_features(df)
 
-        # Manejar valores faltantes
-        df = df.fillna(df.median(numeric_only=True))
+        # Manejar valores faltantes con las medianas de entrenamiento
+        # (mismo resultado en lote y en un solo cliente)
+        if fit:
+            self.medians = df.median(numeric_only=True)
+        if self.medians is not None:
+            df = df.fillna(self.medians)
+        else:
+            # Procesador guardado sin medianas (versión anterior)
+            df = df.fillna(df.median(numeric_only=True))
 
         return df
 
@@ -141,24 +153,56 @@ class CreditDataProcessor:
 
         return X_train, X_test, y_train, y_test
 
-    def save(self, path):
-        """Guarda el procesador para usar en producción"""
-        joblib.dump({
+    def compile_inference_plan(self):
+        """
+        Exporta un plan de inferencia compilado (sin pandas) para un solo cliente
+
+        Returns:
+            InferencePlan equivalente a preprocess + scale_features
+        """
+        return InferencePlan.from_processor(self)
+
+    def bundle_objects(self):
+        """Objetos del procesador para un paquete .bundle (el orden de features va en el manifiesto)"""
+        return {
             'scaler': self.scaler,
             'label_encoders': self.label_encoders,
-            'feature_names': self.feature_names
-        }, path)
+            'medians': self.medians
+        }
+
+    def save(self, path, version='1'):
+        """Guarda el procesador para usar en producción (.bundle = paquete con memory-map)"""
+        if Path(path).suffix == BUNDLE_SUFFIX:
+            write_bundle(path, self.bundle_objects(), version=version, feature_names=self.feature_names)
+        else:
+            joblib.dump({
+                'scaler': self.scaler,
+                'label_encoders': self.label_encoders,
+                'feature_names': self.feature_names,
+                'medians': self.medians
+            }, path)
         print(f"💾 Procesador guardado en: {path}")
 
     def load(self, path):
-        """Carga el procesador entrenado"""
-        data = joblib.load(path)
+        """Carga el procesador entrenado (joblib o paquete .bundle)"""
+        if is_bundle(path):
+            bundle = load_bundle(path)
+            data = {
+                'scaler': bundle['scaler'],
+                'label_encoders': bundle.get('label_encoders', {}),
+                'feature_names': bundle.feature_names,
+                'medians': bundle.get('medians')
+            }
+        else:
+            data = joblib.load(path)
         self.scaler = data['scaler']
         self.label_encoders = data['label_encoders']
         self.feature_names = data['feature_names']
+        self.medians = data.get('medians')
+        if self.medians is None:
+            print("⚠️ Procesador sin medianas de entrenamiento: se imputará con la mediana del lote")
         print(f"✅ Procesador cargado desde: {path}")
 
-
 if __name__ == "__main__":
     # Ejemplo de uso
     processor = CreditDataProcessor()
@@ -0,0 +1,145 @@
+"""
+Lectura/escritura del dataset de entrenamiento en formato columnar
+Arrow IPC (sin compresión): el archivo se abre con memory-map y las columnas
+numéricas pasan a pandas sin copiarse; el esquema y los tipos reducidos se
+guardan en el archivo junto con un bloque de metadatos (versión de features)
+
+pyarrow es opcional: sin él se sigue usando el CSV
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow es opcional: sin él sólo se lee/escribe CSV
+    pa = None
+
+
+ARROW_SUFFIX = '.arrow'
+
+# Clave del bloque de metadatos en el esquema Arrow
+METADATA_KEY = b'credisonar'
+
+
+def arrow_available():
+    return pa is not None
+
+
+def arrow_path(csv_path):
+    """Ruta del archivo Arrow hermano de un CSV (dataset_ml_v2.csv → dataset_ml_v2.arrow)"""
+    return Path(csv_path).with_suffix(ARROW_SUFFIX)
+
+
+def downcast(df):
+    """
+    Reduce los tipos numéricos sin perder información
+
+    Enteros al tipo entero más pequeño que los contiene; flotantes a float32
+    sólo si todos sus valores se representan exactamente (así el modelo ve
+    los mismos números que con el CSV).
+    """
+    df = df.copy()
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+        if pd.api.types.is_integer_dtype(serie):
+            df[columna] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie):
+            valores = serie.to_numpy(dtype=np.float64)
+            reducidos = valores.astype(np.float32)
+            if np.array_equal(reducidos.astype(np.float64), valores, equal_nan=True):
+                df[columna] = reducidos
+    return df
+
+
+def write_dataset(df, path, metadata=None):
+    """
+    Guarda el dataset en Arrow IPC con esquema explícito y metadatos
+
+    Args:
+        df: DataFrame del dataset
+        path: Archivo destino (.arrow)
+        metadata: dict adicional (ej: {'feature_version': 'v2'})
+
+    Returns:
+        dict con el bloque de metadatos guardado
+    """
+    if pa is None:
+        raise ImportError("pyarrow no está instalado: no se puede escribir el dataset Arrow")
+
+    df = downcast(df.reset_index(drop=True))
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    bloque = {
+        'creado_en': datetime.now().isoformat(timespec='seconds'),
+        'filas': len(df),
+        'columnas': {campo.name: str(campo.type) for campo in schema},
+        **(metadata or {}),
+    }
+    schema = schema.with_metadata({**(schema.metadata or {}), METADATA_KEY: json.dumps(bloque).encode('utf-8')})
+    tabla = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporal = path.with_name(path.name + '.tmp')
+    with pa.OSFile(str(temporal), 'wb') as sink, pa.ipc.new_file(sink, tabla.schema) as writer:
+        writer.write_table(tabla)
+    temporal.replace(path)  # Los lectores nunca ven un archivo a medio escribir
+    return bloque
+
+
+def read_metadata(path):
+    """Bloque de metadatos de un dataset Arrow (sin leer los datos)"""
+    if pa is None:
+        raise ImportError("pyarrow no está instalado: no se puede leer el dataset Arrow")
+    with pa.memory_map(str(path), 'r') as source:
+        schema = pa.ipc.open_file(source).schema
+    return json.loads((schema.metadata or {}).get(METADATA_KEY, b'{}'))
+
+
+def read_dataset(path, expected_version=None):
+    """
+    Carga el dataset (Arrow con memory-map, o CSV según la extensión)
+
+    Args:
+        path: Archivo .arrow o .csv
+        expected_version: Si se indica, feature_version del archivo Arrow debe coincidir
+
+    Returns:
+        DataFrame
+    """
+    path = Path(path)
+    if path.suffix != ARROW_SUFFIX:
+        return pd.read_csv(path)
+
+    if pa is None:
+        raise ImportError("pyarrow no está instalado: no se puede leer el dataset Arrow")
+    with pa.memory_map(str(path), 'r') as source:
+        tabla = pa.ipc.open_file(source).read_all()
+
+    bloque = json.loads((tabla.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    if expected_version is not None and bloque.get('feature_version') != expected_version:
+        raise ValueError(f"Dataset con versión de features {bloque.get('feature_version')!r}, "
+                         f"se esperaba {expected_version!r}: regenere el dataset")
+
+    # split_blocks evita consolidar columnas en un bloque (una copia menos)
+    return tabla.to_pandas(split_blocks=True)
+
+
+def load_training_data(csv_path, expected_version=None):
+    """
+    Dataset de entrenamiento: el Arrow hermano del CSV si existe (y pyarrow
+    está instalado), si no el CSV
+
+    Returns:
+        (DataFrame, ruta leída)
+    """
+    ruta = arrow_path(csv_path)
+    if pa is None or not ruta.exists():
+        ruta = Path(csv_path)
+    return read_dataset(ruta, expected_version), ruta
@@ -0,0 +1,686 @@
+"""
+Feature store incremental para Credit Scoring
+Guarda en SQLite local una copia de los préstamos, los pagos agregados por
+pagaré y los agregados por cédula. Cada refresco aplica sólo las filas de
+Cobranza_cartera y los pagos de Cobranza_pagos3 que cambiaron (según el
+registro de cambios de la extracción, o por una columna de última
+modificación si la tabla la tiene) y recalcula únicamente las cédulas afectadas
+"""
+
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.db import queries
+
+
+DEFAULT_STORE_PATH = Path(__file__).parent.parent.parent / "data" / "feature_store.db"
+
+# Columnas de Cobranza_cartera que usan los agregados
+CARTERA_COLUMNS = ('id', 'cedula_id', 'pagare', 'estado', 'valor_desembolsado', 'dias_mora',
+                   'calificacion', 'restructurado', 'en_juridica', 'fecha_desembolso')
+
+# Features que se leen del store (mismas columnas que feature_engineering_v2.py)
+HISTORIAL_COLUMNS = ['cedula', 'num_prestamos_historicos', 'prestamos_cancelados',
+                     'prestamos_activos', 'monto_promedio_historico', 'monto_maximo_historico',
+                     'monto_minimo_historico', 'dias_mora_promedio', 'dias_mora_maximo',
+                     'prestamos_calificacion_A', 'prestamos_calificacion_B', 'prestamos_calificacion_C',
+                     'prestamos_calificacion_D', 'prestamos_calificacion_E', 'prestamos_restructurados',
+                     'prestamos_en_juridica']
+
+PAGOS_COLUMNS = ['cedula', 'total_pagos_realizados', 'monto_total_pagado', 'promedio_valor_pago']
+
+# Agregados por pagaré calculados en la base origen (misma forma que fs_pagos_prestamo);
+# {filtro} restringe a los pagarés con cambios
+PAGOS_POR_PAGARE = """
+SELECT
+    pagare_id as pagare,
+    COUNT(*) as num_pagos,
+    COUNT(valor_pagado) as num_valores,
+    SUM(valor_pagado) as total_pagado,
+    MIN(fecha_pago) as fecha_primer_pago,
+    MAX(fecha_pago) as fecha_ultimo_pago,
+    MAX(id) as ultimo_id
+FROM Cobranza_pagos3
+WHERE pagare_id IS NOT NULL{filtro}
+GROUP BY pagare_id
+"""
+
+# Tablas origen cuyo registro de cambios consume el store
+TABLAS_ORIGEN = ('Cobranza_cartera', 'Cobranza_pagos3')
+
+# Máximo de parámetros por sentencia IN (...) en SQLite
+_IN_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fs_cartera (
+    id INTEGER PRIMARY KEY,
+    cedula TEXT NOT NULL,
+    pagare TEXT,
+    estado TEXT,
+    valor_desembolsado REAL,
+    dias_mora REAL,
+    calificacion TEXT,
+    restructurado TEXT,
+    en_juridica TEXT,
+    fecha_desembolso TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fs_cartera_cedula ON fs_cartera (cedula);
+CREATE INDEX IF NOT EXISTS idx_fs_cartera_pagare ON fs_cartera (pagare);
+
+CREATE TABLE IF NOT EXISTS fs_pagos_prestamo (
+    pagare TEXT PRIMARY KEY,
+    num_pagos INTEGER NOT NULL,
+    num_valores INTEGER NOT NULL,
+    total_pagado REAL,
+    fecha_primer_pago TEXT,
+    fecha_ultimo_pago TEXT
+);
+
+-- Pagaré de cada pago (para saber qué pagarés recalcular si un pago cambia o se borra)
+CREATE TABLE IF NOT EXISTS fs_pagos (
+    id INTEGER PRIMARY KEY,
+    pagare TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fs_clientes (
+    cedula TEXT PRIMARY KEY,
+    num_prestamos_historicos INTEGER,
+    prestamos_cancelados INTEGER,
+    prestamos_activos INTEGER,
+    monto_promedio_historico REAL,
+    monto_maximo_historico REAL,
+    monto_minimo_historico REAL,
+    dias_mora_promedio REAL,
+    dias_mora_maximo REAL,
+    prestamos_calificacion_A INTEGER,
+    prestamos_calificacion_B INTEGER,
+    prestamos_calificacion_C INTEGER,
+    prestamos_calificacion_D INTEGER,
+    prestamos_calificacion_E INTEGER,
+    prestamos_restructurados INTEGER,
+    prestamos_en_juridica INTEGER,
+    fecha_primer_prestamo TEXT,
+    fecha_ultimo_prestamo TEXT,
+    total_pagos_realizados INTEGER,
+    monto_total_pagado REAL,
+    promedio_valor_pago REAL,
+    actualizado_en TEXT
+);
+
+CREATE TABLE IF NOT EXISTS fs_marcas_agua (
+    tabla TEXT PRIMARY KEY,
+    columna TEXT NOT NULL,
+    valor
+);
+"""
+
+# Agregados por cédula (los leen el entrenamiento, feature_engineering_v2.py, y la
+# app): historial de cartera + comportamiento de pago, sobre las tablas locales
+AGREGAR_CLIENTES = """
+SELECT
+    c.cedula,
+    COUNT(*) as num_prestamos_historicos,
+    SUM(CASE WHEN c.estado = 'C' THEN 1 ELSE 0 END) as prestamos_cancelados,
+    SUM(CASE WHEN c.estado = 'A' THEN 1 ELSE 0 END) as prestamos_activos,
+    AVG(c.valor_desembolsado) as monto_promedio_historico,
+    MAX(c.valor_desembolsado) as monto_maximo_historico,
+    MIN(c.valor_desembolsado) as monto_minimo_historico,
+    AVG(c.dias_mora) as dias_mora_promedio,
+    MAX(c.dias_mora) as dias_mora_maximo,
+    SUM(CASE WHEN c.calificacion = 'A' THEN 1 ELSE 0 END) as prestamos_calificacion_A,
+    SUM(CASE WHEN c.calificacion = 'B' THEN 1 ELSE 0 END) as prestamos_calificacion_B,
+    SUM(CASE WHEN c.calificacion = 'C' THEN 1 ELSE 0 END) as prestamos_calificacion_C,
+    SUM(CASE WHEN c.calificacion = 'D' THEN 1 ELSE 0 END) as prestamos_calificacion_D,
+    SUM(CASE WHEN c.calificacion = 'E' THEN 1 ELSE 0 END) as prestamos_calificacion_E,
+    SUM(CASE WHEN c.restructurado = 'S' THEN 1 ELSE 0 END) as prestamos_restructurados,
+    SUM(CASE WHEN c.en_juridica = 'S' THEN 1 ELSE 0 END) as prestamos_en_juridica,
+    MIN(c.fecha_desembolso) as fecha_primer_prestamo,
+    MAX(c.fecha_desembolso) as fecha_ultimo_prestamo,
+    COALESCE(SUM(p.num_pagos), 0) as total_pagos_realizados,
+    COALESCE(SUM(p.total_pagado), 0) as monto_total_pagado,
+    AVG(p.total_pagado / p.num_valores) as promedio_valor_pago,
+    ? as actualizado_en
+FROM fs_cartera c
+LEFT JOIN fs_pagos_prestamo p ON c.pagare = p.pagare
+WHERE c.cedula IN ({marcadores})
+GROUP BY c.cedula
+"""
+
+SUMAR_PAGOS = """
+INSERT INTO fs_pagos_prestamo
+    (pagare, num_pagos, num_valores, total_pagado, fecha_primer_pago, fecha_ultimo_pago)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(pagare) DO UPDATE SET
+    num_pagos = num_pagos + excluded.num_pagos,
+    num_valores = num_valores + excluded.num_valores,
+    total_pagado = CASE
+        WHEN total_pagado IS NULL THEN excluded.total_pagado
+        WHEN excluded.total_pagado IS NULL THEN total_pagado
+        ELSE total_pagado + excluded.total_pagado END,
+    fecha_primer_pago = COALESCE(MIN(fecha_primer_pago, excluded.fecha_primer_pago),
+                                 fecha_primer_pago, excluded.fecha_primer_pago),
+    fecha_ultimo_pago = COALESCE(MAX(fecha_ultimo_pago, excluded.fecha_ultimo_pago),
+                                 fecha_ultimo_pago, excluded.fecha_ultimo_pago)
+"""
+
+
+def _sqlite_value(value):
+    """Valor apto para sqlite3 (fechas como texto ISO, NaN como NULL)"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+def _chunks(values, size=_IN_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class FeatureStore:
+    """
+    Agregados de cartera y pagos por cédula, actualizados de forma incremental
+
+    Detección de cambios:
+        - Sin columna_cartera (por defecto): la base origen es la copia
+          SQLite de la extracción, que registra en _extraccion_cambios cada
+          clave insertada, modificada (checksum distinto) o borrada. El
+          refresco lee sólo las claves registradas después de la última
+          aplicada, trae esas filas de cartera y re-agrega sólo los pagarés
+          de los pagos registrados; luego recalcula sus cédulas. Capta
+          cambios en el lugar (estado, dias_mora, calificación, en_juridica),
+          correcciones y borrados. Si una tabla se reemplazó completa (copia
+          desde cero o importación de un dump) o la base no tiene registro de
+          cambios, el store se reconstruye.
+        - Con columna_cartera (columna de última modificación de
+          Cobranza_cartera): la cartera trae sólo las filas con marca >= la
+          última aplicada y los pagos sólo los id nuevos (se suman una vez).
+          No detecta borrados ni correcciones de pagos ya aplicados.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, columna_cartera=None):
+        """
+        Args:
+            path: Archivo SQLite del feature store
+            columna_cartera: Columna de última modificación de Cobranza_cartera
+                para la marca de agua (None = registro de cambios de la extracción)
+        """
+        if columna_cartera == 'id':
+            raise ValueError(
+                "La marca de agua de Cobranza_cartera debe ser una columna de última "
+                "modificación: 'id' sólo detecta préstamos nuevos (usar None para el registro de cambios)"
+            )
+        self.path = Path(path)
+        self.columna_cartera = columna_cartera
+        if str(path) != ':memory:':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ========== MARCAS DE AGUA ==========
+
+    def watermark(self, tabla):
+        """Último valor aplicado de la tabla origen (None si nunca se refrescó)"""
+        fila = self.conn.execute("SELECT valor FROM fs_marcas_agua WHERE tabla = ?", (tabla,)).fetchone()
+        return None if fila is None else fila[0]
+
+    def last_refresh(self):
+        """Fecha y hora del último refresco completo (None si nunca se refrescó)"""
+        valor = self.watermark('refresco')
+        return None if valor is None else datetime.fromisoformat(valor)
+
+    def _set_watermark(self, tabla, columna, valor):
+        self.conn.execute(
+            "INSERT INTO fs_marcas_agua (tabla, columna, valor) VALUES (?, ?, ?) "
+            "ON CONFLICT(tabla) DO UPDATE SET columna = excluded.columna, valor = excluded.valor",
+            (tabla, columna, _sqlite_value(valor))
+        )
+
+    def _set_refreshed(self):
+        """Marca el store como al día (todas las filas reflejan la base origen a esta hora)"""
+        self._set_watermark('refresco', 'completado_en', datetime.now().isoformat(sep=' ', timespec='seconds'))
+
+    # ========== APLICAR CAMBIOS ==========
+
+    def apply_cartera(self, df):
+        """
+        Inserta o reemplaza filas de Cobranza_cartera (columnas CARTERA_COLUMNS)
+
+        Returns:
+            set de cédulas afectadas (incluye la cédula anterior si cambió)
+        """
+        if len(df) == 0:
+            return set()
+
+        ids = [int(i) for i in df['id']]
+        afectadas = set()
+        for chunk in _chunks(ids):
+            marcadores = ','.join('?' * len(chunk))
+            filas = self.conn.execute(f"SELECT cedula FROM fs_cartera WHERE id IN ({marcadores})", chunk)
+            afectadas.update(fila[0] for fila in filas)
+
+        filas = [
+            tuple(_sqlite_value(valor) for valor in fila)
+            for fila in df[list(CARTERA_COLUMNS)].itertuples(index=False, name=None)
+        ]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fs_cartera (id, cedula, pagare, estado, valor_desembolsado, dias_mora, "
+            "calificacion, restructurado, en_juridica, fecha_desembolso) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            filas
+        )
+        afectadas.update(str(cedula) for cedula in df['cedula_id'])
+        return afectadas
+
+    def apply_pagos(self, df):
+        """
+        Suma pagos nuevos de Cobranza_pagos3 (columnas id, pagare_id, valor_pagado, fecha_pago)
+
+        Cada pago debe aplicarse una sola vez (la marca de agua por id lo garantiza).
+
+        Returns:
+            set de cédulas afectadas (las de los pagarés ya conocidos)
+        """
+        if len(df) == 0:
+            return set()
+
+        df = df.assign(fecha_pago=df['fecha_pago'].map(_sqlite_value))
+        por_pagare = df.groupby('pagare_id', sort=False).agg(
+            num_pagos=('id', 'count'),
+            num_valores=('valor_pagado', 'count'),
+            total_pagado=('valor_pagado', lambda v: v.sum() if v.notna().any() else None),
+            fecha_primer_pago=('fecha_pago', 'min'),
+            fecha_ultimo_pago=('fecha_pago', 'max'),
+        )
+        self.conn.executemany(SUMAR_PAGOS, [
+            (str(pagare),) + tuple(_sqlite_value(valor) for valor in fila)
+            for pagare, fila in zip(por_pagare.index, por_pagare.itertuples(index=False, name=None))
+        ])
+
+        afectadas = set()
+        pagares = [str(pagare) for pagare in por_pagare.index]
+        for chunk in _chunks(pagares):
+            marcadores = ','.join('?' * len(chunk))
+            filas = self.conn.execute(f"SELECT DISTINCT cedula FROM fs_cartera WHERE pagare IN ({marcadores})", chunk)
+            afectadas.update(fila[0] for fila in filas)
+        return afectadas
+
+    def recompute(self, cedulas):
+        """Recalcula los agregados de las cédulas indicadas desde las tablas locales"""
+        actualizado_en = datetime.now().isoformat(sep=' ', timespec='seconds')
+        columnas = None
+        for chunk in _chunks(sorted(cedulas)):
+            marcadores = ','.join('?' * len(chunk))
+            cursor = self.conn.execute(AGREGAR_CLIENTES.format(marcadores=marcadores), [actualizado_en] + chunk)
+            if columnas is None:
+                columnas = [desc[0] for desc in cursor.description]
+            filas = cursor.fetchall()
+
+            # Cédulas que ya no tienen préstamos
+            self.conn.execute(f"DELETE FROM fs_clientes WHERE cedula IN ({marcadores})", chunk)
+            self.conn.executemany(
+                f"INSERT INTO fs_clientes ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+                filas
+            )
+
+    # ========== REFRESCO DESDE LA BASE ORIGEN ==========
+
+    def _changelog(self, conn_origen):
+        """
+        Época y último seq del registro de cambios de la base origen
+
+        Returns:
+            (época, seq) o None si la base no tiene registro de cambios
+        """
+        if not queries.is_sqlite(conn_origen):
+            return None
+        existe = conn_origen.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '_extraccion_registro'"
+        ).fetchone()
+        if existe is None:
+            return None
+        epoca = conn_origen.execute("SELECT epoca FROM _extraccion_registro WHERE id = 1").fetchone()
+        seq = conn_origen.execute("SELECT MAX(seq) FROM _extraccion_cambios").fetchone()[0]
+        return (epoca[0] if epoca else None), (seq or 0)
+
+    def _changed_keys(self, conn_origen, tabla, desde, hasta):
+        """
+        Claves de la tabla registradas en (desde, hasta]
+
+        Returns:
+            lista de claves, o None si la tabla se reemplazó completa
+        """
+        claves = []
+        for (clave,) in conn_origen.execute(
+            "SELECT DISTINCT clave FROM _extraccion_cambios WHERE tabla = ? AND seq > ? AND seq <= ?",
+            (tabla, desde, hasta)
+        ):
+            if clave is None:
+                return None
+            claves.append(clave)
+        return claves
+
+    def _cartera_key(self, conn_origen):
+        """Columna con que la extracción registra los cambios de Cobranza_cartera"""
+        fila = None
+        if conn_origen.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '_extraccion_checkpoints'"
+        ).fetchone():
+            fila = conn_origen.execute(
+                "SELECT columna_clave FROM _extraccion_checkpoints WHERE tabla = 'Cobranza_cartera'"
+            ).fetchone()
+        columna = fila[0] if fila else 'id'
+        if columna not in ('id', 'pagare'):
+            raise ValueError(f"Clave de extracción de Cobranza_cartera no soportada: {columna}")
+        return columna
+
+    def _set_pagos(self, pagos):
+        """Guarda el pagaré de cada pago (filas (id, pagaré))"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fs_pagos (id, pagare) VALUES (?, ?)",
+            [(int(i), str(pagare)) for i, pagare in pagos if pagare is not None]
+        )
+
+    def _aggregate_pagos(self, conn_origen, pagares=None):
+        """
+        Reemplaza los agregados de los pagarés indicados (None = todos)
+        calculándolos en la base origen
+
+        Returns:
+            último id de pago visto (None si no hay pagos)
+        """
+        if pagares is None:
+            self.conn.execute("DELETE FROM fs_pagos_prestamo")
+            lotes = [None]
+        else:
+            lotes = list(_chunks(pagares))
+
+        columnas = ['pagare', 'num_pagos', 'num_valores', 'total_pagado', 'fecha_primer_pago', 'fecha_ultimo_pago']
+        ultimo_id = None
+        for chunk in lotes:
+            if chunk is None:
+                query = queries.Query('fs_pagos_por_pagare', PAGOS_POR_PAGARE.format(filtro=''))
+            else:
+                marcadores = ','.join('?' * len(chunk))
+                self.conn.execute(f"DELETE FROM fs_pagos_prestamo WHERE pagare IN ({marcadores})", chunk)
+                query = queries.Query(f'fs_pagos_por_pagare_{len(chunk)}', PAGOS_POR_PAGARE.format(
+                    filtro=f" AND pagare_id IN ({', '.join(['%s'] * len(chunk))})"))
+            df = queries.run_query(conn_origen, query, () if chunk is None else tuple(chunk))
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO fs_pagos_prestamo ({', '.join(columnas)}) VALUES (?, ?, ?, ?, ?, ?)",
+                [(str(fila[0]),) + tuple(_sqlite_value(valor) for valor in fila[1:])
+                 for fila in df[columnas].itertuples(index=False, name=None)]
+            )
+            if len(df) > 0:
+                ultimo_id = max(int(df['ultimo_id'].max()), ultimo_id or 0)
+        return ultimo_id
+
+    def _rebuild(self, conn_origen):
+        """
+        Reconstruye el store completo desde la base origen (sin confirmar)
+
+        Returns:
+            (cédulas recalculadas, filas de cartera, pagarés agregados)
+        """
+        self.conn.execute("DELETE FROM fs_cartera")
+        self.conn.execute("DELETE FROM fs_pagos")
+        self.conn.execute("DELETE FROM fs_clientes")
+
+        sql = f"SELECT {', '.join(CARTERA_COLUMNS)} FROM Cobranza_cartera"
+        df_cartera = queries.run_query(conn_origen, queries.Query('fs_cartera_completa', sql))
+        afectadas = self.apply_cartera(df_cartera)
+
+        ultimo_id = self._aggregate_pagos(conn_origen)
+        if ultimo_id is not None:
+            self._set_watermark('Cobranza_pagos3', 'id', ultimo_id)
+        query = queries.Query('fs_pagos_pagare', "SELECT id, pagare_id FROM Cobranza_pagos3 WHERE pagare_id IS NOT NULL")
+        self._set_pagos(queries.run_query(conn_origen, query).itertuples(index=False, name=None))
+
+        self.recompute(afectadas)
+        pagares = self.conn.execute("SELECT COUNT(*) FROM fs_pagos_prestamo").fetchone()[0]
+        return afectadas, len(df_cartera), pagares
+
+    def _apply_cartera_keys(self, conn_origen, columna, claves):
+        """
+        Aplica las filas de Cobranza_cartera con las claves indicadas: las que
+        siguen en la base origen se reemplazan y las demás se borran
+
+        Returns:
+            set de cédulas afectadas
+        """
+        afectadas = set()
+        for chunk in _chunks(claves):
+            query = queries.Query(f'fs_cartera_claves_{len(chunk)}',
+                                  f"SELECT {', '.join(CARTERA_COLUMNS)} FROM Cobranza_cartera "
+                                  f"WHERE {columna} IN ({', '.join(['%s'] * len(chunk))})")
+            df = queries.run_query(conn_origen, query, tuple(chunk))
+
+            marcadores = ','.join('?' * len(chunk))
+            vigentes = {int(i) for i in df['id']}
+            for id_local, cedula in self.conn.execute(
+                    f"SELECT id, cedula FROM fs_cartera WHERE {columna} IN ({marcadores})", chunk).fetchall():
+                if id_local not in vigentes:
+                    self.conn.execute("DELETE FROM fs_cartera WHERE id = ?", (id_local,))
+                    afectadas.add(cedula)
+            afectadas |= self.apply_cartera(df)
+        return afectadas
+
+    def _apply_pagos_keys(self, conn_origen, ids):
+        """
+        Re-agrega los pagarés de los pagos con los ids indicados (su pagaré
+        anterior y el actual: cubre pagos nuevos, corregidos, movidos y borrados)
+
+        Returns:
+            (cédulas afectadas, pagarés re-agregados)
+        """
+        pagares = set()
+        for chunk in _chunks(ids):
+            marcadores = ','.join('?' * len(chunk))
+            pagares.update(fila[0] for fila in self.conn.execute(
+                f"SELECT pagare FROM fs_pagos WHERE id IN ({marcadores})", chunk))
+            self.conn.execute(f"DELETE FROM fs_pagos WHERE id IN ({marcadores})", chunk)
+
+            query = queries.Query(f'fs_pagos_ids_{len(chunk)}',
+                                  f"SELECT id, pagare_id FROM Cobranza_pagos3 "
+                                  f"WHERE id IN ({', '.join(['%s'] * len(chunk))})")
+            actuales = list(queries.run_query(conn_origen, query, tuple(chunk)).itertuples(index=False, name=None))
+            self._set_pagos(actuales)
+            pagares.update(str(pagare) for _, pagare in actuales if pagare is not None)
+
+        ultimo_id = self._aggregate_pagos(conn_origen, sorted(pagares))
+        if ultimo_id is not None and ultimo_id > (self.watermark('Cobranza_pagos3') or 0):
+            self._set_watermark('Cobranza_pagos3', 'id', ultimo_id)
+
+        afectadas = set()
+        for chunk in _chunks(sorted(pagares)):
+            marcadores = ','.join('?' * len(chunk))
+            filas = self.conn.execute(f"SELECT DISTINCT cedula FROM fs_cartera WHERE pagare IN ({marcadores})", chunk)
+            afectadas.update(fila[0] for fila in filas)
+        return afectadas, len(pagares)
+
+    def _refresh_changelog(self, conn_origen, full):
+        """Refresco desde el registro de cambios de la extracción (ver la clase)"""
+        registro = self._changelog(conn_origen)
+        marca = self.watermark('cambios')
+        epoca, _, desde = (marca or '').partition(':')
+
+        cambios = None
+        if registro is None:
+            print("⚠️ La base origen no tiene registro de cambios: reconstruyendo el feature store completo")
+        elif not full and marca is not None and epoca == registro[0]:
+            desde = int(desde)
+            cambios = {tabla: self._changed_keys(conn_origen, tabla, desde, registro[1]) for tabla in TABLAS_ORIGEN}
+            if any(claves is None for claves in cambios.values()):
+                cambios = None  # Tabla reemplazada: sus claves anteriores no sirven
+
+        try:
+            if cambios is None:
+                afectadas, filas_cartera, pagares = self._rebuild(conn_origen)
+            else:
+                columna = self._cartera_key(conn_origen)
+
+                # Pagos primero: las cédulas de pagarés de préstamos borrados se
+                # buscan antes de quitar esos préstamos de fs_cartera
+                afectadas, pagares = self._apply_pagos_keys(conn_origen, cambios['Cobranza_pagos3'])
+                afectadas |= self._apply_cartera_keys(conn_origen, columna, cambios['Cobranza_cartera'])
+                self.recompute(afectadas)
+                filas_cartera = len(cambios['Cobranza_cartera'])
+
+            if registro is not None:
+                self._set_watermark('cambios', 'seq', f"{registro[0]}:{registro[1]}")
+            self._set_refreshed()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        return {
+            'reconstruido': cambios is None,
+            'filas_cartera': filas_cartera,
+            'filas_pagos': pagares,
+            'cedulas_recalculadas': len(afectadas),
+        }
+
+    def refresh(self, conn_origen, full=False):
+        """
+        Aplica los cambios de la base origen (registro de cambios o marca de agua)
+
+        Args:
+            conn_origen: Conexión DB-API a la base origen (la copia SQLite de
+                la extracción; sin registro de cambios se reconstruye completo)
+            full: Si True, descarta el store y lo reconstruye completo
+
+        Returns:
+            dict con filas/pagarés aplicados y cédulas recalculadas
+        """
+        if full:
+            self.conn.executescript(
+                "DELETE FROM fs_cartera; DELETE FROM fs_pagos_prestamo; DELETE FROM fs_pagos; "
+                "DELETE FROM fs_clientes; DELETE FROM fs_marcas_agua;"
+            )
+
+        if self.columna_cartera is None:
+            return self._refresh_changelog(conn_origen, full)
+
+        # Cartera: filas modificadas desde la marca de agua (>= para no perder
+        # filas con la misma marca; el reemplazo por id es idempotente)
+        col = self.columna_cartera
+        marca = self.watermark('Cobranza_cartera')
+        sql = f"SELECT {', '.join(CARTERA_COLUMNS + ((col,) if col not in CARTERA_COLUMNS else ()))} FROM Cobranza_cartera"
+        if marca is not None:
+            sql += f" WHERE {col} >= %s"
+        df_cartera = queries.run_query(conn_origen, queries.Query('fs_cartera_delta', sql),
+                                       () if marca is None else (marca,))
+
+        # Pagos: sólo los ids nuevos (se suman)
+        marca_pagos = self.watermark('Cobranza_pagos3')
+        if marca_pagos is None and self.conn.execute("SELECT 1 FROM fs_pagos_prestamo LIMIT 1").fetchone():
+            raise ValueError("fs_pagos_prestamo tiene datos sin marca de agua de pagos: refrescar con full=True")
+        sql = "SELECT id, pagare_id, valor_pagado, fecha_pago FROM Cobranza_pagos3"
+        if marca_pagos is not None:
+            sql += " WHERE id > %s"
+        df_pagos = queries.run_query(conn_origen, queries.Query('fs_pagos_delta', sql),
+                                     () if marca_pagos is None else (marca_pagos,))
+
+        try:
+            afectadas = self.apply_cartera(df_cartera)
+            afectadas |= self.apply_pagos(df_pagos)
+            self.recompute(afectadas)
+
+            if len(df_cartera) > 0:
+                self._set_watermark('Cobranza_cartera', col, df_cartera[col].max())
+            if len(df_pagos) > 0:
+                self._set_watermark('Cobranza_pagos3', 'id', df_pagos['id'].max())
+            self._set_refreshed()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        return {
+            'filas_cartera': len(df_cartera),
+            'filas_pagos': len(df_pagos),
+            'cedulas_recalculadas': len(afectadas),
+        }
+
+    # ========== LECTURA ==========
+
+    def load_aggregates(self, cedulas=None):
+        """Agregados guardados (todas las cédulas o las indicadas)"""
+        if cedulas is None:
+            return pd.read_sql("SELECT * FROM fs_clientes", self.conn)
+        partes = []
+        for chunk in _chunks(str(c) for c in cedulas):
+            marcadores = ','.join('?' * len(chunk))
+            partes.append(pd.read_sql(f"SELECT * FROM fs_clientes WHERE cedula IN ({marcadores})",
+                                      self.conn, params=chunk))
+        if not partes:
+            return pd.read_sql("SELECT * FROM fs_clientes WHERE 0", self.conn)
+        return pd.concat(partes, ignore_index=True)
+
+    def features_historial(self, cedulas=None, hoy=None):
+        """Features de historial de cartera por cédula (antigüedades a la fecha hoy)"""
+        return derive_historial(self.load_aggregates(cedulas), hoy)
+
+    def features_pagos(self, cedulas=None):
+        """Features de comportamiento de pago por cédula"""
+        df = self.load_aggregates(cedulas)
+        return df[PAGOS_COLUMNS].copy()
+
+    def target(self, cedulas=None):
+        """
+        Variable objetivo: buen pagador si todos sus préstamos tienen
+        calificación A o B, la mora máxima es <= 30 días y ninguno está en jurídica
+        """
+        df = self.load_aggregates(cedulas)
+        # MAX(dias_mora) NULL (sin mora registrada) no cumple la condición, igual que en SQL
+        es_bueno = (
+            (df['dias_mora_maximo'] <= 30)
+            & ((df['prestamos_calificacion_A'] + df['prestamos_calificacion_B']) == df['num_prestamos_historicos'])
+            & (df['prestamos_en_juridica'] == 0)
+        )
+        return pd.DataFrame({'cedula': df['cedula'], 'es_buen_pagador': es_bueno.astype(int)})
+
+
+def derive_historial(df, hoy=None):
+    """
+    Features de historial a partir de los agregados de fs_clientes
+
+    Las antigüedades dependen de la fecha de consulta, por eso se calculan al
+    leer y no se guardan.
+    """
+    hoy = pd.Timestamp.now() if hoy is None else pd.Timestamp(hoy)
+    features = df[HISTORIAL_COLUMNS].copy()
+
+    # Antigüedad
+    fecha_primer = pd.to_datetime(df['fecha_primer_prestamo'])
+    fecha_ultimo = pd.to_datetime(df['fecha_ultimo_prestamo'])
+    features['antiguedad_cliente_meses'] = ((hoy - fecha_primer).dt.days / 30).astype(int)
+    features['meses_desde_ultimo_prestamo'] = ((hoy - fecha_ultimo).dt.days / 30).astype(int)
+
+    # Ratios
+    num = features['num_prestamos_historicos']
+    features['ratio_prestamos_buenos'] = (features['prestamos_calificacion_A'] + features['prestamos_calificacion_B']) / num
+    features['ratio_prestamos_malos'] = (features['prestamos_calificacion_D'] + features['prestamos_calificacion_E']) / num
+    features['ratio_cancelacion'] = features['prestamos_cancelados'] / num
+    features['ratio_activos'] = features['prestamos_activos'] / num
+    return features
@@ -0,0 +1,184 @@
+"""
+Plan de inferencia compilado para Credit Scoring
+Convierte los datos de un cliente directamente en un vector escalado,
+sin pasar por pandas
+"""
+
+import numpy as np
+
+
+# Features derivadas que produce CreditDataProcessor.create_features
+# (cada una con las columnas crudas que necesita)
+DERIVED_FEATURES = {
+    'ratio_monto_ingreso': ('monto_solicitado', 'ingreso_mensual'),
+    'ratio_prestamos_pagados': ('prestamos_pagados_completos', 'prestamos_anteriores'),
+    'pago_mensual_estimado': ('monto_solicitado', 'plazo_meses'),
+    'ratio_pago_ingreso': ('monto_solicitado', 'plazo_meses', 'ingreso_mensual'),
+    'es_cliente_nuevo': ('antiguedad_cliente_meses',),
+    'estabilidad_laboral': ('antiguedad_trabajo_meses',),
+}
+
+
+def _derived_value(name, datos):
+    """Calcula una feature derivada con las mismas fórmulas de create_features"""
+    datos = {key: (np.nan if datos[key] is None else datos[key]) for key in DERIVED_FEATURES[name]}
+    if name == 'ratio_monto_ingreso':
+        return datos['monto_solicitado'] / (datos['ingreso_mensual'] + 1)
+    if name == 'ratio_prestamos_pagados':
+        return datos['prestamos_pagados_completos'] / (datos['prestamos_anteriores'] + 1)
+    if name == 'pago_mensual_estimado':
+        return datos['monto_solicitado'] / datos['plazo_meses']
+    if name == 'ratio_pago_ingreso':
+        return (datos['monto_solicitado'] / datos['plazo_meses']) / (datos['ingreso_mensual'] + 1)
+    if name == 'es_cliente_nuevo':
+        return int(datos['antiguedad_cliente_meses'] < 6)
+    if name == 'estabilidad_laboral':
+        return int(datos['antiguedad_trabajo_meses'] > 24)
+    raise KeyError(name)
+
+
+class InferencePlan:
+    """
+    Plan de inferencia precompilado a partir de un CreditDataProcessor ajustado
+
+    Usa diccionarios categoría→código y arreglos de media/escala precalculados
+    para producir el mismo vector que preprocess + scale_features.
+    """
+
+    def __init__(self, feature_names, category_codes, mean, scale, fill_values=None):
+        """
+        Args:
+            feature_names: Orden de columnas usado en entrenamiento
+            category_codes: {columna: {categoría: código}} de los LabelEncoder
+            mean: Medias del scaler (alineadas con feature_names)
+            scale: Escalas del scaler (alineadas con feature_names)
+            fill_values: Medianas de entrenamiento para imputar faltantes
+                (alineadas con feature_names, NaN si no hay mediana)
+        """
+        self.feature_names = list(feature_names)
+        self.category_codes = {col: dict(codes) for col, codes in category_codes.items()}
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.fill_values = None if fill_values is None else np.ascontiguousarray(fill_values, dtype=np.float64)
+
+        if self.mean.shape != (len(self.feature_names),) or self.scale.shape != self.mean.shape:
+            raise ValueError("mean/scale no coinciden con el número de features")
+        if self.fill_values is not None and self.fill_values.shape != self.mean.shape:
+            raise ValueError("fill_values no coincide con el número de features")
+
+        # Pasos precompilados: (índice, columna)
+        self._raw_steps = []
+        self._categorical_steps = []
+        self._derived_steps = []
+        for i, name in enumerate(self.feature_names):
+            if name in self.category_codes:
+                self._categorical_steps.append((i, name, self.category_codes[name]))
+            elif name in DERIVED_FEATURES:
+                self._derived_steps.append((i, name))
+            else:
+                self._raw_steps.append((i, name))
+
+    @classmethod
+    def from_processor(cls, processor):
+        """Compila el plan desde un CreditDataProcessor ya ajustado"""
+        scaler = processor.scaler
+        if not hasattr(scaler, 'n_features_in_'):
+            raise ValueError("El procesador no está ajustado (scaler sin entrenar)")
+
+        if hasattr(scaler, 'feature_names_in_'):
+            feature_names = list(scaler.feature_names_in_)
+        elif processor.feature_names is not None:
+            feature_names = list(processor.feature_names)
+        else:
+            raise ValueError("El procesador no tiene nombres de features")
+
+        n = len(feature_names)
+        mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None and scaler.with_mean else np.zeros(n)
+        scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n)
+
+        category_codes = {
+            col: {str(cls_): code for code, cls_ in enumerate(encoder.classes_)}
+            for col, encoder in processor.label_encoders.items()
+            if col in feature_names
+        }
+
+        fill_values = None
+        if getattr(processor, 'medians', None) is not None:
+            fill_values = processor.medians.reindex(feature_names).to_numpy(dtype=np.float64)
+
+        return cls(feature_names, category_codes, mean, scale, fill_values)
+
+    def required_inputs(self):
+        """Columnas crudas que debe traer cada cliente"""
+        columnas = {name for _, name in self._raw_steps}
+        columnas.update(name for _, name, _ in self._categorical_steps)
+        for _, name in self._derived_steps:
+            columnas.update(DERIVED_FEATURES[name])
+        return sorted(columnas)
+
+    def transform(self, datos, out=None):
+        """
+        Convierte los datos de un cliente en el vector escalado
+
+        Args:
+            datos: dict con los datos crudos (ej: ClienteInput.dict())
+            out: Buffer float64 opcional de tamaño n_features para reutilizar
+
+        Returns:
+            np.ndarray float64 contiguo en el orden de entrenamiento
+        """
+        x = np.empty(len(self.feature_names), dtype=np.float64) if out is None else out
+
+        try:
+            for i, name in self._raw_steps:
+                x[i] = datos[name]
+            for i, name, codes in self._categorical_steps:
+                # Valores no vistos → primera clase (código 0), igual que preprocess
+                x[i] = codes.get(str(datos[name]), 0)
+            for i, name in self._derived_steps:
+                x[i] = _derived_value(name, datos)
+        except KeyError as e:
+            raise ValueError(f"Falta la columna requerida: {e.args[0]}") from None
+
+        # Imputar faltantes con las medianas de entrenamiento
+        if self.fill_values is not None:
+            faltantes = np.isnan(x)
+            if faltantes.any():
+                x[faltantes] = self.fill_values[faltantes]
+
+        np.subtract(x, self.mean, out=x)
+        np.divide(x, self.scale, out=x)
+        return x
+
+    def transform_many(self, registros, out=None):
+        """
+        Convierte varios clientes en la matriz escalada (una fila por cliente)
+
+        Args:
+            registros: Lista de dicts con los datos crudos
+            out: Buffer float64 opcional de (al menos) len(registros) × n_features
+
+        Returns:
+            np.ndarray float64 (len(registros), n_features)
+        """
+        n = len(registros)
+        X = np.empty((n, len(self.feature_names)), dtype=np.float64) if out is None else out[:n]
+        for fila, datos in enumerate(registros):
+            self.transform(datos, out=X[fila])
+        return X
+
+    def to_dict(self):
+        """Exporta el plan a tipos simples (para serializar)"""
+        return {
+            'feature_names': list(self.feature_names),
+            'category_codes': {col: dict(codes) for col, codes in self.category_codes.items()},
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'fill_values': None if self.fill_values is None else self.fill_values.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstruye un plan exportado con to_dict"""
+        return cls(data['feature_names'], data['category_codes'], data['mean'], data['scale'],
+                   data.get('fill_values'))
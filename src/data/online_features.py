@@ -0,0 +1,139 @@
+"""
+Consulta en línea de features por cédula
+Lee el vector precalculado del feature store (una fila por clave primaria);
+sólo si el cliente aún no está materializado lo calcula al vuelo con el mismo
+código de agregación del store: entrenamiento y app usan las mismas fórmulas.
+La fecha de cálculo de cada vector se entrega como metadato
+"""
+
+import threading
+
+import pandas as pd
+
+from src.data.feature_store import (
+    CARTERA_COLUMNS, DEFAULT_STORE_PATH, HISTORIAL_COLUMNS, PAGOS_COLUMNS,
+    FeatureStore, derive_historial,
+)
+from src.db import queries
+
+
+CARTERA_CLIENTE = queries.Query('fs_cartera_cliente', f"""
+SELECT {', '.join(CARTERA_COLUMNS)}
+FROM Cobranza_cartera
+WHERE cedula_id = %s
+""")
+
+PAGOS_CLIENTE = queries.Query('fs_pagos_cliente', """
+SELECT id, pagare_id, valor_pagado, fecha_pago
+FROM Cobranza_pagos3
+WHERE pagare_id IN (SELECT pagare FROM Cobranza_cartera WHERE cedula_id = %s)
+""")
+
+# Features que entrega lookup() (sin la cédula)
+FEATURE_NAMES = (
+    HISTORIAL_COLUMNS[1:]
+    + ['antiguedad_cliente_meses', 'meses_desde_ultimo_prestamo',
+       'ratio_prestamos_buenos', 'ratio_prestamos_malos', 'ratio_cancelacion', 'ratio_activos']
+    + PAGOS_COLUMNS[1:]
+)
+
+
+def _python_value(value):
+    """
+    Tipos nativos (Streamlit no acepta escalares de NumPy)
+    Faltantes → 0, igual que combinar_features al armar el dataset de entrenamiento
+    """
+    if value is None or pd.isna(value):
+        return 0
+    return value.item() if hasattr(value, 'item') else value
+
+
+class OnlineFeatureLookup:
+    """
+    Features de historial y pagos de un cliente para la app
+
+    Args:
+        store_path: Archivo del feature store (lo refresca refresh_feature_store.py)
+        pool: ConnectionPool de la base origen para clientes no materializados
+            (None = sólo el store)
+
+    Las filas del store se entregan aunque el último refresco sea antiguo:
+    la antigüedad se informa (actualizado_en de lookup_with_meta,
+    ultimo_refresco de stats) en lugar de recalcular cada consulta
+    """
+
+    def __init__(self, store_path=DEFAULT_STORE_PATH, pool=None):
+        self.store = FeatureStore(store_path)
+        self.pool = pool
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.store_hits = 0
+        self.computed = 0
+
+    def _from_store(self, cedula):
+        """Agregados materializados del cliente (vacío si no está en el store)"""
+        with self._lock:
+            return self.store.load_aggregates([cedula])
+
+    def _compute(self, cedula):
+        """Agregados del cliente calculados al vuelo desde la base origen"""
+        with self.pool.connection() as conn:
+            df_cartera = queries.run_query(conn, CARTERA_CLIENTE, (cedula,))
+            df_pagos = queries.run_query(conn, PAGOS_CLIENTE, (cedula,))
+
+        # Store temporal en memoria: mismas sentencias de agregación que el store
+        with FeatureStore(':memory:') as temporal:
+            afectadas = temporal.apply_cartera(df_cartera) | temporal.apply_pagos(df_pagos)
+            temporal.recompute(afectadas)
+            return temporal.load_aggregates([cedula])
+
+    def lookup_with_meta(self, cedula, hoy=None):
+        """
+        Features del cliente y de dónde salieron
+
+        Returns:
+            (features, meta): features es un dict {feature: valor} con
+            FEATURE_NAMES, o None si el cliente no tiene préstamos; meta es un
+            dict con origen ('store', 'calculada' o None) y actualizado_en
+            (fecha y hora en que se calcularon los agregados)
+        """
+        cedula = str(cedula).strip()
+        agregados = self._from_store(cedula)
+        origen = 'store'
+        if len(agregados) > 0:
+            with self._lock:
+                self.store_hits += 1
+        elif self.pool is not None:
+            agregados = self._compute(cedula)
+            origen = 'calculada'
+            with self._lock:
+                self.computed += 1
+
+        if len(agregados) == 0:
+            return None, {'origen': None, 'actualizado_en': None}
+
+        fila = derive_historial(agregados, hoy).iloc[0].to_dict()
+        fila.update(agregados[PAGOS_COLUMNS].iloc[0].to_dict())
+        features = {nombre: _python_value(fila[nombre]) for nombre in FEATURE_NAMES}
+        return features, {'origen': origen, 'actualizado_en': agregados['actualizado_en'].iloc[0]}
+
+    def lookup(self, cedula, hoy=None):
+        """
+        Features del cliente
+
+        Returns:
+            dict {feature: valor} con FEATURE_NAMES, o None si el cliente no
+            tiene préstamos
+        """
+        return self.lookup_with_meta(cedula, hoy)[0]
+
+    def stats(self):
+        """Origen de las consultas atendidas y último refresco del store"""
+        with self._lock:
+            refrescado = self.store.last_refresh()
+            return {
+                'desde_store': self.store_hits,
+                'calculadas': self.computed,
+                'ultimo_refresco': None if refrescado is None else refrescado.isoformat(sep=' '),
+            }
@@ -0,0 +1 @@
+# Database access module
@@ -0,0 +1,64 @@
+"""
+Consulta del perfil de un cliente (datos básicos, cartera, asesoría e historial)
+Las consultas independientes se ejecutan en paralelo sobre conexiones del pool,
+así la latencia la marca la consulta más lenta y no la suma de todas
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.db import queries
+
+
+PROFILE_QUERIES = {
+    'cliente': queries.CLIENTE,
+    'cartera': queries.CARTERA,
+    'asesoria': queries.ASESORIA,
+    'historial_prestamos': queries.HISTORIAL_PRESTAMOS,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Hilos compartidos para las consultas del perfil"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=len(PROFILE_QUERIES) * 2,
+                                               thread_name_prefix='perfil-cliente')
+    return _executor
+
+
+def _run_query(pool, query, cedula):
+    with pool.connection() as conn:
+        return queries.run_query(conn, query, (cedula,))
+
+
+def fetch_client_profile(pool, cedula, parallel=True):
+    """
+    Ejecuta todas las consultas del perfil de un cliente
+
+    Args:
+        pool: ConnectionPool de la base de datos
+        cedula: Cédula del cliente
+        parallel: Si True, las consultas corren en paralelo (una conexión cada una)
+
+    Returns:
+        dict {nombre: DataFrame} con las claves de PROFILE_QUERIES
+    """
+    if not parallel:
+        with pool.connection() as conn:
+            return {
+                nombre: queries.run_query(conn, query, (cedula,))
+                for nombre, query in PROFILE_QUERIES.items()
+            }
+
+    executor = _get_executor()
+    futures = {
+        nombre: executor.submit(_run_query, pool, query, cedula)
+        for nombre, query in PROFILE_QUERIES.items()
+    }
+    return {nombre: future.result() for nombre, future in futures.items()}
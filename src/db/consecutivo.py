@@ -0,0 +1,130 @@
+"""
+Asignación de consecutivos de PDF (formato YYYY-NNNNN)
+Cada número sale de un contador por año en la tabla Cobranza_pdf_consecutivos,
+que se incrementa con una sola sentencia atómica: no hay SELECT + incremento
+en Python, así que dos analistas nunca reciben el mismo número
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+
+from src.db import queries
+
+
+# MySQL: LAST_INSERT_ID(expr) deja el nuevo valor del contador en la sesión,
+# así se reserva el bloque y se lee el resultado sin volver a tocar la fila
+RESERVAR_MYSQL = queries.Query('reservar_consecutivos', """
+INSERT INTO Cobranza_pdf_consecutivos (anio, ultimo)
+VALUES (%s, LAST_INSERT_ID(%s))
+ON DUPLICATE KEY UPDATE ultimo = LAST_INSERT_ID(ultimo + %s)
+""")
+ULTIMO_RESERVADO_MYSQL = queries.Query('ultimo_consecutivo_reservado',
+                                       "SELECT LAST_INSERT_ID() AS ultimo", types={'ultimo': 'int'})
+
+# SQLite (>= 3.35): UPSERT con RETURNING
+RESERVAR_SQLITE = queries.Query('reservar_consecutivos', """
+INSERT INTO Cobranza_pdf_consecutivos (anio, ultimo)
+VALUES (%s, %s)
+ON CONFLICT(anio) DO UPDATE SET ultimo = ultimo + excluded.ultimo
+RETURNING ultimo
+""", types={'ultimo': 'int'})
+
+
+# MySQL ER_NO_SUCH_TABLE
+MYSQL_TABLA_NO_EXISTE = 1146
+
+
+def tabla_consecutivos_faltante(error):
+    """
+    True si el error indica que Cobranza_pdf_consecutivos no existe
+    (scripts/create_consecutivo_sequence.sql aún no se ejecutó)
+    """
+    if getattr(error, 'args', None) and error.args[0] == MYSQL_TABLA_NO_EXISTE:
+        return True
+    # SQLite: OperationalError("no such table: ...")
+    return 'no such table' in str(error) and 'Cobranza_pdf_consecutivos' in str(error)
+
+
+def formatear_consecutivo(anio, numero):
+    """Consecutivo en formato YYYY-NNNNN"""
+    return f"{anio}-{numero:05d}"
+
+
+class ConsecutivoAllocator:
+    """
+    Reserva consecutivos por bloques y los entrega desde memoria
+
+    Con block_size=1 cada PDF hace una reserva (sin huecos salvo inserciones
+    fallidas). Con bloques mayores el proceso consulta la base una vez por
+    bloque; los números no usados de un bloque se pierden si el proceso se
+    reinicia (quedan huecos, nunca duplicados).
+    """
+
+    def __init__(self, pool, block_size=1):
+        """
+        Args:
+            pool: ConnectionPool de la base de datos
+            block_size: Consecutivos a reservar por viaje a la base
+        """
+        if block_size < 1:
+            raise ValueError("block_size debe ser al menos 1")
+
+        self.pool = pool
+        self.block_size = block_size
+
+        self._lock = threading.Lock()
+        self._disponibles = {}  # año -> deque de números ya reservados
+
+        # Contadores
+        self.issued = 0
+        self.reservations = 0
+
+    def reserve_block(self, anio, cantidad):
+        """
+        Reserva `cantidad` números del año en la base de datos
+
+        Returns:
+            range con los números reservados
+        """
+        with self.pool.connection() as conn:
+            if queries.is_sqlite(conn):
+                ultimo = queries.run_query(conn, RESERVAR_SQLITE, (anio, cantidad))['ultimo'].iloc[0]
+            else:
+                queries.execute(conn, RESERVAR_MYSQL, (anio, cantidad, cantidad))
+                ultimo = queries.run_query(conn, ULTIMO_RESERVADO_MYSQL)['ultimo'].iloc[0]
+            conn.commit()
+
+        with self._lock:
+            self.reservations += 1
+        ultimo = int(ultimo)
+        return range(ultimo - cantidad + 1, ultimo + 1)
+
+    def next(self, anio=None):
+        """Siguiente consecutivo (ej: '2026-00001')"""
+        anio = datetime.now().year if anio is None else anio
+        with self._lock:
+            disponibles = self._disponibles.get(anio)
+            if disponibles:
+                self.issued += 1
+                return formatear_consecutivo(anio, disponibles.popleft())
+
+        # La reserva se hace sin el lock: otros hilos no esperan la base de datos
+        bloque = self.reserve_block(anio, self.block_size)
+
+        with self._lock:
+            self._disponibles.setdefault(anio, deque()).extend(bloque[1:])
+            # Los bloques de años anteriores ya no se usarán
+            for viejo in [a for a in self._disponibles if a < anio]:
+                del self._disponibles[viejo]
+            self.issued += 1
+        return formatear_consecutivo(anio, bloque[0])
+
+    def stats(self):
+        """Estado del asignador"""
+        with self._lock:
+            return {
+                'emitidos': self.issued,
+                'reservas': self.reservations,
+                'en_memoria': sum(len(d) for d in self._disponibles.values()),
+            }
@@ -0,0 +1,684 @@
+"""
+Extracción por streaming de tablas MySQL a SQLite
+Lee cada tabla por páginas ordenadas por clave primaria (keyset), escribe cada
+página en una transacción con executemany y guarda en la misma transacción la
+última clave copiada: una corrida interrumpida continúa donde quedó y la
+memoria usada depende del tamaño de página, no del tamaño de la tabla
+
+Cada clave insertada, modificada (checksum distinto) o borrada queda en
+_extraccion_cambios, en la misma transacción que la escritura: los consumidores
+de la copia (ej: el feature store) aplican sólo esos cambios
+"""
+
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import Future
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from src.db import queries
+from src.db.local_db import tune_for_bulk_load
+
+
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS _extraccion_checkpoints (
+    tabla TEXT PRIMARY KEY,
+    columna_clave TEXT NOT NULL,
+    ultima_clave,
+    filas INTEGER NOT NULL DEFAULT 0,
+    completa INTEGER NOT NULL DEFAULT 0,
+    actualizado_en TEXT,
+    ultima_modificacion,
+    ultima_reconciliacion TEXT
+);
+
+-- Checksum de cada fila calculado por la base origen al copiarla
+CREATE TABLE IF NOT EXISTS _extraccion_checksums (
+    tabla TEXT NOT NULL,
+    clave INTEGER NOT NULL,
+    checksum INTEGER NOT NULL,
+    PRIMARY KEY (tabla, clave)
+) WITHOUT ROWID;
+"""
+
+# Registro de cambios de la copia local. clave NULL = la tabla completa se
+# reemplazó (copia desde cero o importación de un dump). La época identifica
+# el registro: si la base se vuelve a crear, seq empieza de nuevo con otra época
+CHANGELOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS _extraccion_cambios (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabla TEXT NOT NULL,
+    clave,
+    borrada INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_extraccion_cambios_tabla ON _extraccion_cambios (tabla, seq);
+
+CREATE TABLE IF NOT EXISTS _extraccion_registro (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    epoca TEXT NOT NULL
+);
+"""
+
+# Columna extra con el checksum de la fila en las consultas a la base origen
+CHECKSUM_COLUMN = '_fila_checksum'
+
+# Máximo de parámetros por sentencia IN (...) en SQLite
+_IN_CHUNK = 500
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _identifier(name):
+    """Valida un nombre de tabla/columna (se interpola en el SQL)"""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Identificador inválido: {name!r}")
+    return name
+
+
+def to_sqlite_value(value):
+    """Convierte un valor del driver MySQL a un tipo que sqlite3 guarda tal cual"""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    return str(value)
+
+
+def ensure_changelog(conn):
+    """Crea el registro de cambios (y su época) en la base SQLite si no existe"""
+    conn.executescript(CHANGELOG_SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO _extraccion_registro (id, epoca) VALUES (1, ?)", (uuid.uuid4().hex,))
+    conn.commit()
+
+
+def log_changes(conn, tabla, claves, borrada=False):
+    """Registra claves insertadas/modificadas (o borradas) sin confirmar la transacción"""
+    conn.executemany(
+        "INSERT INTO _extraccion_cambios (tabla, clave, borrada) VALUES (?, ?, ?)",
+        [(tabla, clave, int(borrada)) for clave in claves]
+    )
+
+
+def log_table_reset(conn, tabla):
+    """
+    Registra que la tabla completa se reemplazó (los consumidores la releen)
+
+    Los cambios anteriores de la tabla se descartan: quien lea el marcador
+    no los necesita
+    """
+    conn.execute("DELETE FROM _extraccion_cambios WHERE tabla = ?", (tabla,))
+    conn.execute("INSERT INTO _extraccion_cambios (tabla, clave, borrada) VALUES (?, NULL, 0)", (tabla,))
+
+
+def _sqlite_type(value):
+    """Afinidad SQLite para la columna según su primer valor no nulo"""
+    if isinstance(value, bool) or isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, (float, Decimal)):
+        return 'REAL'
+    if isinstance(value, (bytes, bytearray)):
+        return 'BLOB'
+    return 'TEXT'
+
+
+def _checksum_fila(*valores):
+    """Checksum de una fila (versión SQLite de la expresión MySQL)"""
+    texto = '|'.join('\\N' if valor is None else str(valor) for valor in valores)
+    return zlib.crc32(texto.encode('utf-8'))
+
+
+def checksum_expression(conn, columnas):
+    """
+    Expresión SQL que calcula en la base origen el checksum de cada fila
+
+    MySQL: CRC32 de las columnas concatenadas (NULL como \\N). En SQLite se
+    registra una función equivalente. El checksum siempre lo calcula la misma
+    base origen, así que es comparable entre corridas.
+    """
+    columnas = [_identifier(columna) for columna in columnas]
+    if queries.is_sqlite(conn):
+        raw = getattr(conn, 'raw', conn)
+        raw.create_function('checksum_fila', -1, _checksum_fila, deterministic=True)
+        return f"checksum_fila({', '.join(columnas)})"
+    partes = ', '.join(f"COALESCE(CAST({columna} AS CHAR), '\\\\N')" for columna in columnas)
+    return f"CRC32(CONCAT_WS('|', {partes}))"
+
+
+def source_columns(conn, tabla):
+    """Columnas de la tabla origen (sin leer filas)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT * FROM {_identifier(tabla)} WHERE 1 = 0")
+        columnas = [desc[0] for desc in cursor.description]
+        cursor.fetchall()
+    finally:
+        cursor.close()
+    return columnas
+
+
+# Tipos MySQL de clave entera (la reconciliación agrupa las claves en bloques numéricos)
+_MYSQL_INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint')
+
+MYSQL_KEY_COLUMN = queries.Query('tipo_columna_clave', """
+SELECT DATA_TYPE AS tipo
+FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+""")
+
+# Índices únicos (o PRIMARY) formados sólo por la columna
+MYSQL_UNIQUE_KEY = queries.Query('indice_unico_clave', """
+SELECT INDEX_NAME AS indice
+FROM information_schema.STATISTICS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0
+GROUP BY INDEX_NAME
+HAVING COUNT(*) = 1 AND MAX(COLUMN_NAME) = %s
+""")
+
+
+def _sqlite_key_info(conn, tabla, key):
+    """(tipo declarado, única) de la columna en una tabla SQLite (None si no existe)"""
+    raw = getattr(conn, 'raw', conn)
+    columnas = raw.execute(f"PRAGMA table_info({tabla})").fetchall()
+    tipos = {fila[1]: fila[2] for fila in columnas}
+    if key not in tipos:
+        return None
+    claves = [fila[1] for fila in columnas if fila[5]]
+    if claves == [key]:
+        return tipos[key], True
+    for indice in raw.execute(f"PRAGMA index_list({tabla})").fetchall():
+        if indice[2]:
+            columnas_indice = [fila[2] for fila in raw.execute(f"PRAGMA index_info({indice[1]})")]
+            if columnas_indice == [key]:
+                return tipos[key], True
+    return tipos[key], False
+
+
+def check_key(conn, tabla, key):
+    """
+    Verifica en la base origen que la columna clave exista y sea única
+    (PRIMARY KEY o índice UNIQUE de esa sola columna): la paginación keyset,
+    los checkpoints y la reconciliación dependen de ello
+
+    Returns:
+        True si la clave es entera (se puede reconciliar por bloques)
+
+    Raises:
+        ValueError: Si la columna no existe o no es única
+    """
+    tabla, key = _identifier(tabla), _identifier(key)
+    if queries.is_sqlite(conn):
+        info = _sqlite_key_info(conn, tabla, key)
+        if info is None:
+            raise ValueError(f"La tabla {tabla} no tiene la columna clave {key}")
+        tipo, unica = info
+        entera = 'INT' in (tipo or '').upper()
+    else:
+        df = queries.run_query(conn, MYSQL_KEY_COLUMN, (tabla, key))
+        if len(df) == 0:
+            raise ValueError(f"La tabla {tabla} no tiene la columna clave {key}")
+        tipo = df['tipo'].iloc[0]
+        if isinstance(tipo, (bytes, bytearray)):  # Algunas versiones de mysql.connector
+            tipo = tipo.decode('utf-8')
+        entera = tipo.lower() in _MYSQL_INTEGER_TYPES
+        unica = len(queries.run_query(conn, MYSQL_UNIQUE_KEY, (tabla, key))) > 0
+    if not unica:
+        raise ValueError(f"La columna {key} de {tabla} no es clave primaria ni tiene un índice único")
+    return entera
+
+
+def server_side_cursor(conn):
+    """
+    Cursor que no descarga todo el resultado al cliente
+
+    pymysql necesita SSCursor; mysql.connector ya es sin buffer por defecto;
+    sqlite3 siempre itera sobre el resultado.
+    """
+    raw = getattr(conn, 'raw', conn)
+    if type(raw).__module__.startswith('pymysql'):
+        import pymysql.cursors
+        return raw.cursor(pymysql.cursors.SSCursor)
+    return raw.cursor()
+
+
+def iter_pages(conn, tabla, key='id', after=None, page_size=10000, fetch_size=2000, select='*'):
+    """
+    Recorre la tabla por páginas de clave primaria
+
+    Args:
+        conn: Conexión origen (MySQL o SQLite)
+        tabla: Nombre de la tabla
+        key: Columna de clave primaria (numérica, única y creciente)
+        after: Última clave ya copiada (None = desde el principio)
+        page_size: Filas por consulta (LIMIT)
+        fetch_size: Filas por fetchmany dentro de cada página
+        select: Lista de columnas del SELECT (ej: con la columna de checksum)
+
+    Yields:
+        (columnas, filas) por cada bloque de fetchmany (un bloque vacío si
+        la tabla no tiene filas)
+    """
+    tabla, key = _identifier(tabla), _identifier(key)
+    desde_inicio = after is None
+    while True:
+        if after is None:
+            query = queries.Query(f'extraer_{tabla}_inicio',
+                                  f"SELECT {select} FROM {tabla} ORDER BY {key} LIMIT %s")
+            params = (page_size,)
+        else:
+            query = queries.Query(f'extraer_{tabla}',
+                                  f"SELECT {select} FROM {tabla} WHERE {key} > %s ORDER BY {key} LIMIT %s")
+            params = (after, page_size)
+
+        cursor = server_side_cursor(conn)
+        try:
+            cursor.execute(query.sql_for(conn), params)
+            columnas = [desc[0] for desc in cursor.description]
+            key_index = columnas.index(key)
+            leidas = 0
+            while True:
+                filas = cursor.fetchmany(fetch_size)
+                if not filas:
+                    if leidas == 0 and desde_inicio:
+                        # Tabla vacía: igual se crea la tabla destino
+                        yield columnas, []
+                    break
+                leidas += len(filas)
+                after = filas[-1][key_index]
+                yield columnas, filas
+        finally:
+            cursor.close()
+
+        desde_inicio = False
+        if leidas < page_size:
+            return
+
+
+class SQLiteWriter:
+    """
+    Escribe bloques de filas en la base SQLite destino con su checkpoint
+
+    Cada bloque y su checkpoint se confirman juntos: si el proceso se corta,
+    el checkpoint nunca apunta más allá de lo que quedó escrito.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        tune_for_bulk_load(self.conn)
+        self.conn.executescript(CHECKPOINT_SCHEMA)
+        self._migrate_checkpoints()
+        self.conn.commit()
+        ensure_changelog(self.conn)
+        self._insert_sql = {}
+
+    def _migrate_checkpoints(self):
+        """Agrega las columnas nuevas a checkpoints creados por versiones anteriores"""
+        existentes = {fila[1] for fila in self.conn.execute("PRAGMA table_info(_extraccion_checkpoints)")}
+        for columna in ('ultima_modificacion', 'ultima_reconciliacion'):
+            if columna not in existentes:
+                self.conn.execute(f"ALTER TABLE _extraccion_checkpoints ADD COLUMN {columna}")
+
+    def close(self):
+        self.conn.close()
+
+    def checkpoint(self, tabla):
+        """(última clave, filas copiadas, completa) o None si la tabla no se ha extraído"""
+        fila = self.conn.execute(
+            "SELECT ultima_clave, filas, completa FROM _extraccion_checkpoints WHERE tabla = ?", (tabla,)
+        ).fetchone()
+        return fila
+
+    def reset(self, tabla):
+        """Borra la tabla destino y su checkpoint (extracción desde cero)"""
+        tabla = _identifier(tabla)
+        self.conn.execute(f"DROP TABLE IF EXISTS {tabla}")
+        self.conn.execute("DELETE FROM _extraccion_checkpoints WHERE tabla = ?", (tabla,))
+        self.conn.execute("DELETE FROM _extraccion_checksums WHERE tabla = ?", (tabla,))
+        log_table_reset(self.conn, tabla)
+        self.conn.commit()
+        self._insert_sql.pop(tabla, None)
+
+    def _ensure_table(self, tabla, columnas, filas, key):
+        if tabla in self._insert_sql:
+            return self._insert_sql[tabla]
+
+        existe = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+        ).fetchone()
+        if not existe:
+            definiciones = []
+            for i, columna in enumerate(columnas):
+                ejemplo = next((fila[i] for fila in filas if fila[i] is not None), None)
+                tipo = _sqlite_type(ejemplo)
+                sufijo = ' PRIMARY KEY' if columna == key else ''
+                definiciones.append(f'"{columna}" {tipo}{sufijo}')
+            self.conn.execute(f"CREATE TABLE {tabla} ({', '.join(definiciones)})")
+
+        nombres = ', '.join(f'"{columna}"' for columna in columnas)
+        sql = f"INSERT OR REPLACE INTO {tabla} ({nombres}) VALUES ({', '.join('?' * len(columnas))})"
+        self._insert_sql[tabla] = sql
+        return sql
+
+    def _split_checksums(self, columnas, filas):
+        """Separa la columna de checksum (si viene) de los datos de la fila"""
+        if not columnas or columnas[-1] != CHECKSUM_COLUMN:
+            return columnas, filas, None
+        checksums = [fila[-1] for fila in filas]
+        return columnas[:-1], [fila[:-1] for fila in filas], checksums
+
+    def _stored_checksums(self, tabla, claves):
+        """{clave: checksum} guardados para las claves indicadas"""
+        guardados = {}
+        for i in range(0, len(claves), _IN_CHUNK):
+            chunk = claves[i:i + _IN_CHUNK]
+            guardados.update(self.conn.execute(
+                f"SELECT clave, checksum FROM _extraccion_checksums "
+                f"WHERE tabla = ? AND clave IN ({', '.join('?' * len(chunk))})",
+                [tabla] + chunk
+            ).fetchall())
+        return guardados
+
+    def _upsert(self, tabla, columnas, filas, key):
+        """
+        Inserta o reemplaza filas (y sus checksums) sin confirmar la transacción
+
+        Con checksums sólo se reescriben (y registran como cambio) las filas
+        nuevas o con checksum distinto
+
+        Returns:
+            (columnas, filas convertidas, claves escritas)
+        """
+        tabla, key = _identifier(tabla), _identifier(key)
+        columnas, filas, checksums = self._split_checksums(columnas, filas)
+        sql = self._ensure_table(tabla, columnas, filas, key)
+        convertidas = [tuple(to_sqlite_value(valor) for valor in fila) for fila in filas]
+        key_index = columnas.index(key)
+
+        if checksums is None:
+            escritas = convertidas
+        else:
+            checksums = [int(checksum) for checksum in checksums]
+            guardados = self._stored_checksums(tabla, [fila[key_index] for fila in convertidas])
+            distintas = [(fila, checksum) for fila, checksum in zip(convertidas, checksums)
+                         if guardados.get(fila[key_index]) != checksum]
+            escritas = [fila for fila, _ in distintas]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO _extraccion_checksums (tabla, clave, checksum) VALUES (?, ?, ?)",
+                [(tabla, fila[key_index], checksum) for fila, checksum in distintas]
+            )
+
+        self.conn.executemany(sql, escritas)
+        claves = [fila[key_index] for fila in escritas]
+        log_changes(self.conn, tabla, claves)
+        return columnas, convertidas, claves
+
+    def upsert(self, tabla, columnas, filas, key):
+        """Inserta o reemplaza un bloque de filas en su propia transacción"""
+        with self.conn:
+            return len(self._upsert(tabla, columnas, filas, key)[2])
+
+    def write(self, tabla, columnas, filas, key):
+        """Escribe un bloque y avanza el checkpoint en la misma transacción"""
+        with self.conn:
+            columnas, convertidas, _ = self._upsert(tabla, columnas, filas, key)
+            key_index = columnas.index(key)
+            self.conn.execute(
+                "INSERT INTO _extraccion_checkpoints (tabla, columna_clave, ultima_clave, filas, completa, actualizado_en) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(tabla) DO UPDATE SET columna_clave = excluded.columna_clave, "
+                "ultima_clave = COALESCE(excluded.ultima_clave, ultima_clave), filas = filas + excluded.filas, "
+                "completa = excluded.completa, actualizado_en = excluded.actualizado_en",
+                (tabla, key, convertidas[-1][key_index] if convertidas else None, len(convertidas),
+                 0, datetime.now().isoformat(sep=' ', timespec='seconds'))
+            )
+
+    def delete(self, tabla, key, claves):
+        """Borra filas por clave (y sus checksums) en una transacción"""
+        tabla, key = _identifier(tabla), _identifier(key)
+        claves = [(clave,) for clave in claves]
+        with self.conn:
+            self.conn.executemany(f"DELETE FROM {tabla} WHERE {key} = ?", claves)
+            self.conn.executemany("DELETE FROM _extraccion_checksums WHERE tabla = ? AND clave = ?",
+                                  [(tabla, clave) for (clave,) in claves])
+            log_changes(self.conn, tabla, [clave for (clave,) in claves], borrada=True)
+
+    def begin_scan(self, tabla):
+        """Empieza una relectura completa de la tabla (ver TableExtractor.rescan)"""
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _escaneo (tabla TEXT, clave, PRIMARY KEY (tabla, clave))")
+            self.conn.execute("DELETE FROM temp._escaneo WHERE tabla = ?", (tabla,))
+
+    def write_scan(self, tabla, columnas, filas, key):
+        """
+        Escribe un bloque de la relectura y anota sus claves como vistas
+
+        Returns:
+            Filas reescritas (nuevas o con checksum distinto)
+        """
+        with self.conn:
+            columnas, convertidas, claves = self._upsert(tabla, columnas, filas, key)
+            key_index = columnas.index(key)
+            self.conn.executemany("INSERT OR IGNORE INTO temp._escaneo (tabla, clave) VALUES (?, ?)",
+                                  [(tabla, fila[key_index]) for fila in convertidas])
+        return len(claves)
+
+    def finish_scan(self, tabla, key):
+        """
+        Termina la relectura: borra las filas locales que no se vieron
+
+        Returns:
+            Filas borradas
+        """
+        tabla, key = _identifier(tabla), _identifier(key)
+        faltantes = [fila[0] for fila in self.conn.execute(
+            f"SELECT {key} FROM {tabla} WHERE {key} NOT IN (SELECT clave FROM temp._escaneo WHERE tabla = ?)",
+            (tabla,)
+        )]
+        if faltantes:
+            self.delete(tabla, key, faltantes)
+        with self.conn:
+            self.conn.execute("DELETE FROM temp._escaneo WHERE tabla = ?", (tabla,))
+            self.conn.execute("UPDATE _extraccion_checkpoints SET completa = 1, actualizado_en = ? WHERE tabla = ?",
+                              (datetime.now().isoformat(sep=' ', timespec='seconds'), tabla))
+        return len(faltantes)
+
+    def query(self, sql, params=()):
+        """Consulta de lectura sobre la base destino"""
+        return self.conn.execute(sql, params).fetchall()
+
+    def set_marker(self, tabla, columna, valor):
+        """Guarda una marca del checkpoint (ultima_modificacion / ultima_reconciliacion)"""
+        if columna not in ('ultima_modificacion', 'ultima_reconciliacion'):
+            raise ValueError(f"Marca desconocida: {columna}")
+        with self.conn:
+            self.conn.execute(f"UPDATE _extraccion_checkpoints SET {columna} = ? WHERE tabla = ?",
+                              (to_sqlite_value(valor), tabla))
+
+    def marker(self, tabla, columna):
+        if columna not in ('ultima_modificacion', 'ultima_reconciliacion'):
+            raise ValueError(f"Marca desconocida: {columna}")
+        fila = self.conn.execute(f"SELECT {columna} FROM _extraccion_checkpoints WHERE tabla = ?",
+                                 (tabla,)).fetchone()
+        return None if fila is None else fila[0]
+
+    def mark_complete(self, tabla):
+        with self.conn:
+            self.conn.execute("UPDATE _extraccion_checkpoints SET completa = 1 WHERE tabla = ?", (tabla,))
+
+
+class QueuedWriter:
+    """
+    SQLiteWriter compartido por varios hilos de extracción
+
+    Un único hilo es dueño de la conexión SQLite y ejecuta, en orden de
+    llegada, las llamadas que los demás encolan (write, checkpoint, ...):
+    nunca hay dos escritores sobre el archivo, así que no aparece
+    'database is locked'. Cada llamada espera su resultado y propaga sus
+    excepciones al hilo que la hizo.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._queue = queue.Queue()
+        listo = Future()
+        self._thread = threading.Thread(target=self._run, args=(listo,), name='sqlite-writer', daemon=True)
+        self._thread.start()
+        listo.result()  # Errores al abrir la base se ven aquí
+
+    def _run(self, listo):
+        try:
+            writer = SQLiteWriter(self.path)
+        except BaseException as e:
+            listo.set_exception(e)
+            return
+        listo.set_result(None)
+
+        while True:
+            tarea = self._queue.get()
+            if tarea is None:
+                break
+            future, metodo, args, kwargs = tarea
+            try:
+                future.set_result(getattr(writer, metodo)(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        writer.close()
+
+    def __getattr__(self, metodo):
+        if metodo.startswith('_') or not callable(getattr(SQLiteWriter, metodo, None)):
+            raise AttributeError(metodo)
+
+        def llamada(*args, **kwargs):
+            future = Future()
+            self._queue.put((future, metodo, args, kwargs))
+            return future.result()
+        return llamada
+
+    def close(self):
+        """Termina las escrituras pendientes y cierra la base"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class TableExtractor:
+    """
+    Copia tablas de la base origen a un archivo SQLite por streaming
+
+    Con resume=True (por defecto) cada tabla continúa desde su último
+    checkpoint; una tabla ya completa sólo trae las filas con clave mayor.
+    """
+
+    def __init__(self, source_conn, sqlite_path=None, page_size=10000, fetch_size=2000, checksums=False,
+                 writer=None):
+        """
+        Args:
+            source_conn: Conexión DB-API a la base origen
+            sqlite_path: Archivo SQLite destino
+            page_size: Filas por consulta paginada
+            fetch_size: Filas por bloque escrito (fetchmany + executemany)
+            checksums: Si True, guarda el checksum de cada fila (para reconciliar)
+            writer: QueuedWriter compartido con otros extractores (en lugar
+                de sqlite_path; no se cierra con el extractor)
+        """
+        if (sqlite_path is None) == (writer is None):
+            raise ValueError("Indique sqlite_path o writer")
+        self.source_conn = source_conn
+        self._owns_writer = writer is None
+        self.writer = SQLiteWriter(sqlite_path) if writer is None else writer
+        self.page_size = page_size
+        self.fetch_size = fetch_size
+        self.checksums = checksums
+
+    def _select(self, tabla):
+        """Lista del SELECT: todas las columnas y, si aplica, el checksum de la fila"""
+        if not self.checksums:
+            return '*'
+        columnas = source_columns(self.source_conn, tabla)
+        return f"{tabla}.*, {checksum_expression(self.source_conn, columnas)} AS {CHECKSUM_COLUMN}"
+
+    def close(self):
+        if self._owns_writer:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def extract(self, tabla, key='id', resume=True):
+        """
+        Copia una tabla
+
+        Returns:
+            dict con filas copiadas en esta corrida, total, clave final y segundos
+        """
+        inicio = time.time()
+        checkpoint = self.writer.checkpoint(tabla)
+        if not resume or checkpoint is None:
+            # Sin checkpoint la tabla destino (si existe) no es reanudable
+            self.writer.reset(tabla)
+            checkpoint = None
+        after = checkpoint[0] if checkpoint else None
+
+        copiadas = 0
+        for columnas, filas in iter_pages(self.source_conn, tabla, key, after,
+                                          self.page_size, self.fetch_size, self._select(tabla)):
+            self.writer.write(tabla, columnas, filas, key)
+            copiadas += len(filas)
+        self.writer.mark_complete(tabla)
+
+        checkpoint = self.writer.checkpoint(tabla)
+        return {
+            'tabla': tabla,
+            'filas_copiadas': copiadas,
+            'filas_totales': checkpoint[1] if checkpoint else 0,
+            'ultima_clave': checkpoint[0] if checkpoint else None,
+            'segundos': time.time() - inicio,
+        }
+
+    def rescan(self, tabla, key):
+        """
+        Relee completa una tabla ya copiada sin vaciarla
+
+        Para tablas cuya clave no es entera (no se pueden reconciliar por
+        bloques de rango): sólo se reescriben las filas nuevas o con checksum
+        distinto y se borran las que ya no están en el origen, de modo que el
+        registro de cambios contiene únicamente lo que cambió
+
+        Returns:
+            dict con filas leídas, reescritas, borradas y segundos
+        """
+        inicio = time.time()
+        leidas = reescritas = 0
+        self.writer.begin_scan(tabla)
+        for columnas, filas in iter_pages(self.source_conn, tabla, key, None,
+                                          self.page_size, self.fetch_size, self._select(tabla)):
+            reescritas += self.writer.write_scan(tabla, columnas, filas, key)
+            leidas += len(filas)
+        borradas = self.writer.finish_scan(tabla, key)
+        return {
+            'tabla': tabla,
+            'filas_leidas': leidas,
+            'filas_reescritas': reescritas,
+            'filas_borradas': borradas,
+            'segundos': time.time() - inicio,
+        }
@@ -0,0 +1,103 @@
+"""
+Base SQLite local de análisis (credisonar.db)
+Perfil de carga masiva (WAL, synchronous relajado, caché grande) para los
+scripts que la llenan, y al terminar: índices para las consultas de
+feature engineering y ANALYZE para que el planificador los use
+"""
+
+import sqlite3
+from contextlib import contextmanager
+
+
+# Índices de las consultas de features: GROUP BY cedula_id, joins por
+# pagaré y la última asesoría por cliente (MAX(id) por cedula_id)
+LOCAL_INDEXES = {
+    'Cobranza_cartera': [('idx_cartera_cedula', ('cedula_id',))],
+    'Cobranza_pagos3': [('idx_pagos3_pagare', ('pagare_id',))],
+    'Cobranza_asesorias': [('idx_asesorias_cedula_id', ('cedula_id', 'id'))],
+}
+
+# Caché de páginas durante la carga (KiB; negativo = tamaño, no páginas)
+BULK_CACHE_KIB = 256 * 1024
+
+
+def tune_for_bulk_load(conn, synchronous='NORMAL'):
+    """
+    Configura la conexión para escrituras masivas
+
+    Args:
+        synchronous: 'NORMAL' (con WAL no corrompe la base ante un corte;
+            pueden perderse las últimas transacciones) u 'OFF' (más rápido,
+            para bases que se pueden regenerar, ej: importación del dump)
+    """
+    if synchronous not in ('OFF', 'NORMAL', 'FULL'):
+        raise ValueError(f"synchronous inválido: {synchronous}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA cache_size=-{BULK_CACHE_KIB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def _columns(conn, tabla):
+    return {fila[1] for fila in conn.execute(f'PRAGMA table_info("{tabla}")')}
+
+
+def build_indexes(conn, indexes=LOCAL_INDEXES):
+    """
+    Crea los índices que falten (omite tablas o columnas que no existan)
+
+    Returns:
+        lista de índices creados
+    """
+    creados = []
+    for tabla, definiciones in indexes.items():
+        columnas = _columns(conn, tabla)
+        for nombre, columnas_indice in definiciones:
+            if not set(columnas_indice) <= columnas:
+                continue
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (nombre,)
+            ).fetchone()
+            if existe:
+                continue
+            lista = ', '.join(f'"{columna}"' for columna in columnas_indice)
+            conn.execute(f'CREATE INDEX "{nombre}" ON "{tabla}" ({lista})')
+            creados.append(nombre)
+    conn.commit()
+    return creados
+
+
+def finalize(conn):
+    """
+    Deja la base lista para consultas después de una carga
+
+    Crea los índices, actualiza las estadísticas del planificador (ANALYZE)
+    y vuelca el WAL al archivo principal.
+
+    Returns:
+        lista de índices creados
+    """
+    creados = build_indexes(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return creados
+
+
+@contextmanager
+def bulk_load(path, synchronous='NORMAL'):
+    """
+    Conexión para cargar la base; al salir sin error llama a finalize()
+
+    Uso:
+        with bulk_load(SQLITE_DB) as conn:
+            ...
+    """
+    conn = sqlite3.connect(str(path))
+    try:
+        tune_for_bulk_load(conn, synchronous)
+        yield conn
+        conn.commit()
+        finalize(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,235 @@
+"""
+Pool de conexiones compartido para la base de datos MySQL
+Reutiliza conexiones abiertas entre consultas y entre sesiones de Streamlit
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """No hubo una conexión libre dentro del tiempo de espera"""
+
+
+def default_health_check(conn):
+    """Verifica que la conexión siga viva (ping si el driver lo soporta)"""
+    ping = getattr(conn, 'ping', None)
+    if ping is not None:
+        ping(reconnect=False)  # pymysql
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+class PooledConnection:
+    """
+    Conexión prestada por el pool
+
+    Se comporta como la conexión original; close() la devuelve al pool
+    en lugar de cerrarla, así el código existente no cambia.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+
+    @property
+    def raw(self):
+        """Conexión del driver"""
+        return self._conn
+
+    def close(self):
+        """Devuelve la conexión al pool"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn)
+
+    def discard(self):
+        """Cierra la conexión y la saca del pool (ej: después de un error de red)"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn, discard=True)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __del__(self):
+        # Red de seguridad: si nadie la devolvió, no perder el cupo del pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe con tamaño máximo, desalojo por
+    inactividad y verificación de salud al prestar una conexión
+
+    Funciona con cualquier driver DB-API (pymysql en producción, sqlite3 en pruebas).
+    """
+
+    def __init__(self, connect, max_size=5, max_idle_seconds=300,
+                 health_check_interval=30, timeout=10, health_check=default_health_check):
+        """
+        Args:
+            connect: Función sin argumentos que abre una conexión nueva
+            max_size: Máximo de conexiones abiertas (prestadas + libres)
+            max_idle_seconds: Conexiones libres más viejas que esto se cierran
+            health_check_interval: Segundos de inactividad tras los cuales se
+                verifica la conexión antes de prestarla
+            timeout: Segundos a esperar por una conexión libre
+            health_check: Función que recibe una conexión y lanza excepción si está caída
+        """
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._health_check = health_check
+
+        self._lock = threading.Condition()
+        self._idle = []  # [(conexión, última vez usada)] - la más reciente al final
+        self._size = 0
+
+        # Contadores
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.failed_checks = 0
+
+    def acquire(self):
+        """Presta una conexión (reutiliza una libre o abre una nueva)"""
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._lock:
+                self._evict_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Sin conexiones libres tras {self.timeout}s (máximo {self.max_size})"
+                        )
+                    self._lock.wait(remaining)
+                    self._evict_idle()
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn, last_used = None, None
+                    self._size += 1  # Reservar el cupo antes de conectar
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self.created += 1
+                return PooledConnection(self, conn)
+
+            # Conexión reutilizada: verificar si estuvo inactiva mucho tiempo
+            if time.monotonic() - last_used >= self.health_check_interval:
+                try:
+                    self._health_check(conn)
+                except Exception:
+                    self._close_quietly(conn)
+                    with self._lock:
+                        self.failed_checks += 1
+                        self._size -= 1
+                        self._lock.notify()
+                    continue
+
+            with self._lock:
+                self.reused += 1
+            return PooledConnection(self, conn)
+
+    def release(self, conn, discard=False):
+        """Devuelve una conexión al pool"""
+        if not discard:
+            try:
+                # Terminar cualquier transacción abierta para que la próxima
+                # consulta no vea una instantánea vieja
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager: presta una conexión y la devuelve al terminar"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Cierra las conexiones libres (las prestadas se cierran al devolverse)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Estado del pool"""
+        with self._lock:
+            return {
+                'abiertas': self._size,
+                'libres': len(self._idle),
+                'prestadas': self._size - len(self._idle),
+                'creadas': self.created,
+                'reutilizadas': self.reused,
+                'desalojadas': self.evicted,
+                'fallas_salud': self.failed_checks,
+            }
+
+    def _evict_idle(self):
+        """Cierra las conexiones libres que superan max_idle_seconds (con el lock tomado)"""
+        if not self._idle or self.max_idle_seconds is None:
+            return
+        limite = time.monotonic() - self.max_idle_seconds
+        viejas = [conn for conn, last_used in self._idle if last_used < limite]
+        if viejas:
+            self._idle = [(conn, last_used) for conn, last_used in self._idle if last_used >= limite]
+            self._size -= len(viejas)
+            self.evicted += len(viejas)
+            for conn in viejas:
+                self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,132 @@
+"""
+Caché de perfiles de cliente por cédula (LRU acotado con vencimiento)
+Compartido entre sesiones de Streamlit: repetir la evaluación de un mismo
+cliente no vuelve a consultar la base de datos
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProfileCache:
+    """
+    Perfiles de cliente en memoria, con tamaño máximo y tiempo de vida
+
+    Las entradas más viejas en uso se desalojan al llenarse (LRU) y las que
+    superan ttl_seconds se descartan al consultarlas. invalidate() borra un
+    cliente cuando cambian sus datos (ej: se registró una nueva evaluación).
+    """
+
+    def __init__(self, max_size=256, ttl_seconds=300):
+        """
+        Args:
+            max_size: Máximo de perfiles guardados
+            ttl_seconds: Segundos que un perfil se considera vigente
+        """
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # cédula -> (perfil, vence en) - el más reciente al final
+        self._generations = {}  # cédula -> número de invalidaciones (evita guardar cargas viejas)
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(cedula):
+        return str(cedula).strip()
+
+    def get(self, cedula):
+        """Perfil vigente de la cédula (una copia) o None si no está en caché"""
+        key = self._key(cedula)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            perfil = entry[0]
+        # Copia para que una sesión no modifique el perfil de otra
+        return copy.deepcopy(perfil)
+
+    def put(self, cedula, perfil, generation=None):
+        """
+        Guarda el perfil de la cédula
+
+        Args:
+            generation: Valor de generation(cedula) tomado antes de cargar el
+                perfil; si hubo una invalidación mientras tanto no se guarda
+        """
+        key = self._key(cedula)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key, 0):
+                return
+            self._entries[key] = (copy.deepcopy(perfil), time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def generation(self, cedula):
+        """Número de invalidaciones de la cédula (ver put)"""
+        with self._lock:
+            return self._generations.get(self._key(cedula), 0)
+
+    def get_or_load(self, cedula, loader):
+        """
+        Perfil desde la caché o, si no está, desde loader(cedula)
+
+        Los resultados None (cliente no encontrado o error) no se guardan.
+        """
+        perfil = self.get(cedula)
+        if perfil is not None:
+            return perfil
+
+        generation = self.generation(cedula)
+        perfil = loader(cedula)
+        if perfil is not None:
+            self.put(cedula, perfil, generation)
+        return perfil
+
+    def invalidate(self, cedula):
+        """Descarta el perfil de la cédula (y cualquier carga en curso)"""
+        key = self._key(cedula)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self.invalidations += 1
+
+    def clear(self):
+        """Descarta todos los perfiles"""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def stats(self):
+        """Estado de la caché"""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'entradas': len(self._entries),
+                'aciertos': self.hits,
+                'fallos': self.misses,
+                'tasa_aciertos': self.hits / consultas if consultas else 0.0,
+                'vencidas': self.expired,
+                'desalojadas': self.evicted,
+                'invalidaciones': self.invalidations,
+            }
@@ -0,0 +1,254 @@
+"""
+Consultas parametrizadas de la aplicación
+La cédula (y cualquier otro valor) viaja siempre como parámetro, nunca
+interpolado en el SQL: el servidor puede reutilizar el plan y no hay inyección
+"""
+
+import sqlite3
+import weakref
+from decimal import Decimal
+
+import pandas as pd
+
+
+def _to_int(value):
+    return int(value)
+
+
+def _to_float(value):
+    return float(value)
+
+
+def _to_datetime(value):
+    return pd.to_datetime(value, errors='coerce')
+
+
+DECODERS = {
+    'int': _to_int,
+    'float': _to_float,
+    'datetime': _to_datetime,
+    'str': str,
+}
+
+
+class Query:
+    """
+    Sentencia SQL con placeholders %s y tipos de sus columnas
+
+    Los tipos declarados se usan para decodificar el resultado (ej: los
+    Decimal que devuelve MySQL en SUM/AVG pasan a float). None se conserva.
+    """
+
+    def __init__(self, name, sql, types=None):
+        self.name = name
+        self.sql = sql
+        self.types = dict(types or {})
+        self._qmark_sql = sql.replace('%s', '?')
+
+    def sql_for(self, conn):
+        """SQL con el estilo de placeholder del driver de la conexión"""
+        return self._qmark_sql if is_sqlite(conn) else self.sql
+
+    def decode(self, rows, columns):
+        """Convierte las filas del cursor en un DataFrame con tipos"""
+        if rows and isinstance(rows[0], dict):  # DictCursor
+            rows = [tuple(row[col] for col in columns) for row in rows]
+
+        decoders = [DECODERS[self.types[col]] if col in self.types else None for col in columns]
+        decoded = []
+        for row in rows:
+            decoded.append(tuple(
+                value if value is None
+                else decoder(value) if decoder is not None
+                else float(value) if isinstance(value, Decimal)
+                else value
+                for value, decoder in zip(row, decoders)
+            ))
+        return pd.DataFrame.from_records(decoded, columns=columns)
+
+    def __repr__(self):
+        return f"Query({self.name!r})"
+
+
+def _raw(conn):
+    """Conexión del driver (desenvuelve las conexiones del pool)"""
+    return getattr(conn, 'raw', conn)
+
+
+def is_sqlite(conn):
+    """True si la conexión es de sqlite3 (base local o pruebas)"""
+    return isinstance(_raw(conn), sqlite3.Connection)
+
+
+# Cursores preparados por conexión: sólo para drivers con sentencias
+# preparadas del lado del servidor (mysql.connector). pymysql y sqlite3
+# usan cursores normales (sqlite3 ya cachea las sentencias por texto).
+_prepared_cursors = weakref.WeakKeyDictionary()
+
+
+def _supports_prepared(raw):
+    return type(raw).__module__.startswith('mysql.connector')
+
+
+def _cursor(conn, query):
+    """Cursor para ejecutar `query` (reutiliza el preparado si el driver lo soporta)"""
+    raw = _raw(conn)
+    if not _supports_prepared(raw):
+        return raw.cursor(), False
+
+    cursors = _prepared_cursors.setdefault(raw, {})
+    cursor = cursors.get(query.name)
+    if cursor is None:
+        cursor = raw.cursor(prepared=True)
+        cursors[query.name] = cursor
+    return cursor, True
+
+
+def run_query(conn, query, params=()):
+    """
+    Ejecuta una consulta parametrizada y devuelve un DataFrame con tipos
+
+    Args:
+        conn: Conexión DB-API (o conexión del pool)
+        query: Query a ejecutar
+        params: Tupla de parámetros para los placeholders
+
+    Returns:
+        DataFrame con las columnas de la consulta
+    """
+    cursor, cached = _cursor(conn, query)
+    try:
+        cursor.execute(query.sql_for(conn), tuple(params))
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        if not cached:
+            cursor.close()
+    return query.decode(list(rows), columns)
+
+
+def execute(conn, query, params=()):
+    """
+    Ejecuta una sentencia parametrizada sin resultado (INSERT/UPDATE)
+
+    Returns:
+        Número de filas afectadas
+    """
+    cursor, cached = _cursor(conn, query)
+    try:
+        cursor.execute(query.sql_for(conn), tuple(params))
+        return cursor.rowcount
+    finally:
+        if not cached:
+            cursor.close()
+
+
+# ========== PERFIL DEL CLIENTE ==========
+
+# Datos básicos del cliente
+CLIENTE = Query('cliente', "SELECT * FROM Cobranza_clientes WHERE cedula = %s")
+
+# Historial de cartera y créditos activos en una sola pasada sobre Cobranza_cartera
+CARTERA = Query('cartera', """
+SELECT
+    COUNT(*) as num_prestamos,
+    SUM(CASE WHEN estado = 'C' THEN 1 ELSE 0 END) as cancelados,
+    SUM(CASE WHEN estado = 'A' THEN 1 ELSE 0 END) as activos,
+    AVG(valor_desembolsado) as monto_promedio,
+    MAX(valor_desembolsado) as monto_maximo,
+    MIN(valor_desembolsado) as monto_minimo,
+    AVG(dias_mora) as mora_promedio,
+    MAX(dias_mora) as mora_maximo,
+    SUM(CASE WHEN calificacion = 'A' THEN 1 ELSE 0 END) as calif_A,
+    SUM(CASE WHEN calificacion = 'B' THEN 1 ELSE 0 END) as calif_B,
+    SUM(CASE WHEN calificacion = 'E' THEN 1 ELSE 0 END) as calif_E,
+    SUM(CASE WHEN restructurado = 'S' THEN 1 ELSE 0 END) as restructurados,
+    SUM(CASE WHEN en_juridica = 'S' THEN 1 ELSE 0 END) as juridica,
+    MIN(fecha_desembolso) as fecha_primer_prestamo,
+    MAX(fecha_desembolso) as fecha_ultimo_prestamo,
+    COUNT(CASE WHEN estado = 'A' THEN 1 END) as creditos_vigentes,
+    SUM(CASE WHEN estado = 'A' THEN saldo_capital END) as saldo_capital_total,
+    SUM(CASE WHEN estado = 'A' THEN valor_cuota END) as cuota_mensual_total,
+    AVG(CASE WHEN estado = 'A' THEN valor_desembolsado END) as monto_promedio_aprobado,
+    MAX(CASE WHEN estado = 'A' THEN valor_desembolsado END) as monto_maximo_aprobado,
+    GROUP_CONCAT(DISTINCT CASE WHEN estado = 'A' THEN calificacion END) as calificaciones
+FROM Cobranza_cartera
+WHERE cedula_id = %s
+""", types={
+    'num_prestamos': 'int', 'cancelados': 'int', 'activos': 'int',
+    'monto_promedio': 'float', 'monto_maximo': 'float', 'monto_minimo': 'float',
+    'mora_promedio': 'float', 'mora_maximo': 'float',
+    'calif_A': 'int', 'calif_B': 'int', 'calif_E': 'int',
+    'restructurados': 'int', 'juridica': 'int',
+    'fecha_primer_prestamo': 'datetime', 'fecha_ultimo_prestamo': 'datetime',
+    'creditos_vigentes': 'int', 'saldo_capital_total': 'float', 'cuota_mensual_total': 'float',
+    'monto_promedio_aprobado': 'float', 'monto_maximo_aprobado': 'float', 'calificaciones': 'str',
+})
+
+# Última asesoría (contacto y vivienda)
+ASESORIA = Query('asesoria', """
+SELECT vivienda_propia, tel_celular, direccion_of, fecha_asesoria
+FROM Cobranza_asesorias
+WHERE cedula_id = %s
+ORDER BY fecha_asesoria DESC
+LIMIT 1
+""", types={'fecha_asesoria': 'datetime'})
+
+# Últimos 10 préstamos (tabla de historia)
+HISTORIAL_PRESTAMOS = Query('historial_prestamos', """
+SELECT
+    c.pagare,
+    c.fecha_desembolso,
+    MAX(p.fecha_pago) as fecha_ultimo_pago,
+    c.valor_desembolsado as monto_aprobado,
+    MAX(pc.valor_a_pagar) as valor_cuota,
+    c.estado,
+    c.calificacion
+FROM Cobranza_cartera c
+LEFT JOIN Cobranza_pagos3 p ON c.pagare = p.pagare_id
+LEFT JOIN Cobranza_plan_cuotas pc ON c.pagare = pc.pagare_num_id
+WHERE c.cedula_id = %s
+GROUP BY c.pagare, c.fecha_desembolso, c.valor_desembolsado, c.estado, c.calificacion
+ORDER BY c.fecha_desembolso DESC
+LIMIT 10
+""", types={'monto_aprobado': 'float', 'valor_cuota': 'float'})
+
+# ========== REGISTRO DE PDFs ==========
+
+HISTORIAL_PDFS = Query('historial_pdfs', """
+SELECT
+    consecutivo,
+    fecha_generacion,
+    decision,
+    monto_solicitado,
+    monto_aprobado,
+    score_datacredito,
+    ingresos_reportados,
+    egresos_reportados,
+    probabilidad,
+    nivel_riesgo
+FROM Cobranza_pdf_evaluaciones
+WHERE cedula = %s
+ORDER BY fecha_generacion DESC
+LIMIT 10
+""", types={
+    'fecha_generacion': 'datetime', 'monto_solicitado': 'float', 'monto_aprobado': 'float',
+    'ingresos_reportados': 'float', 'egresos_reportados': 'float', 'probabilidad': 'float',
+})
+
+# Último consecutivo de un año (parámetro: patrón 'YYYY-%')
+ULTIMO_CONSECUTIVO = Query('ultimo_consecutivo', """
+SELECT consecutivo
+FROM Cobranza_pdf_evaluaciones
+WHERE consecutivo LIKE %s
+ORDER BY id DESC
+LIMIT 1
+""")
+
+INSERTAR_REGISTRO_PDF = Query('insertar_registro_pdf', """
+INSERT INTO Cobranza_pdf_evaluaciones
+(consecutivo, cedula, nombre_cliente, fecha_generacion, decision,
+ monto_solicitado, monto_aprobado, probabilidad, nivel_riesgo,
+ score_datacredito, ingresos_reportados, egresos_reportados, concepto_oficina, hash_pdf)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+""")
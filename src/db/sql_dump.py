@@ -0,0 +1,417 @@
+"""
+Importación por streaming de un dump SQL de MySQL a SQLite
+Recorre el archivo una sola vez con un tokenizador por bloques: los CREATE
+TABLE e INSERT de las tablas pedidas se traducen a SQLite y sus filas se
+insertan con executemany en transacciones grandes; el resto del dump se salta
+sin interpretarlo. La memoria depende del tamaño de bloque, no del archivo
+"""
+
+import re
+
+from src.db.extractor import ensure_changelog, log_table_reset
+
+
+# Un token por alternativa; las cadenas, comentarios e identificadores sin
+# cerrar también coinciden (hasta el final del buffer) para detectar que
+# falta leer más del archivo
+_CADENA = r"'[^'\\]*(?:(?:\\.?|'')[^'\\]*)*'?"
+_CADENA_DOBLE = r'"[^"\\]*(?:(?:\\.?|"")[^"\\]*)*"?'
+_IDENT = r"`[^`]*(?:``[^`]*)*`?"
+
+_TOKEN = re.compile(rf"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|\#[^\n]*|/\*(?:.*?\*/|.*))
+  | (?P<string>{_CADENA}|{_CADENA_DOBLE})
+  | (?P<ident>{_IDENT})
+  | (?P<hex>0[xX][0-9A-Fa-f]*)
+  | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<punct>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Para saltar sentencias sin tokenizarlas: tramos sin comillas ni ';'
+_SALTO = re.compile(rf"""[^'"`;]+|{_CADENA}|{_CADENA_DOBLE}|{_IDENT}|;""", re.DOTALL)
+_LINEA = re.compile(r"[^\n]*")
+
+# Camino rápido para VALUES: una tupla completa por búsqueda (cadenas
+# cerradas, literales sin comillas y el introductor opcional _binary '...')
+_VALOR = r"(?:_\w+\s*)?(?:'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|[^,()'\"`\s]+)"
+_TUPLA = re.compile(rf"\s*\(\s*({_VALOR}(?:\s*,\s*{_VALOR})*)\s*\)", re.DOTALL)
+_VALORES = re.compile(_VALOR, re.DOTALL)
+
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_ESCAPE = re.compile(r"\\(.)|''|\"\"", re.DOTALL)
+
+
+def _unescape(texto):
+    """Contenido de una cadena MySQL (sin comillas) con los escapes resueltos"""
+    if '\\' not in texto and "''" not in texto and '""' not in texto:
+        return texto
+    return _ESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)) if m.group(1) else m.group(0)[0], texto)
+
+
+def _quote(nombre):
+    return f'"{nombre}"'
+
+
+def sqlite_type(tipo_mysql):
+    """Afinidad SQLite para un tipo de columna MySQL"""
+    tipo = tipo_mysql.lower()
+    if 'int' in tipo or tipo in ('bit', 'bool', 'boolean', 'year'):
+        return 'INTEGER'
+    if tipo in ('decimal', 'numeric', 'float', 'double', 'real'):
+        return 'REAL'
+    if 'blob' in tipo or 'binary' in tipo:
+        return 'BLOB'
+    return 'TEXT'
+
+
+class DumpTokenizer:
+    """
+    Tokens de un archivo SQL leído por bloques
+
+    Un token que llega hasta el final del buffer puede estar cortado: se lee
+    el siguiente bloque y se vuelve a reconocer desde su inicio.
+    """
+
+    # Tuplas más largas que esto se leen token por token
+    max_tuple = 1 << 16
+
+    def __init__(self, archivo, chunk_size=1 << 20):
+        self.archivo = archivo
+        self.chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _refill(self):
+        bloque = self.archivo.read(self.chunk_size)
+        if not bloque:
+            self._eof = True
+        else:
+            self._buf = self._buf[self._pos:] + bloque
+            self._pos = 0
+
+    def _match(self, patron):
+        while True:
+            m = patron.match(self._buf, self._pos)
+            if m is None or (m.end() == len(self._buf) and not self._eof):
+                if self._eof:
+                    return m
+                self._refill()
+                continue
+            self._pos = m.end()
+            return m
+
+    def next(self):
+        """Siguiente token (tipo, texto) sin espacios ni comentarios; None al final"""
+        while True:
+            m = self._match(_TOKEN)
+            if m is None:
+                return None
+            tipo = m.lastgroup
+            if tipo not in ('ws', 'comment'):
+                return tipo, m.group()
+
+    def expect(self, texto):
+        token = self.next()
+        if token is None or token[1].upper() != texto:
+            raise ValueError(f"Se esperaba {texto!r} y se encontró {token!r}")
+
+    def match_tuple(self):
+        """
+        Textos de los valores de la siguiente tupla '(...)' de VALUES
+
+        Returns:
+            lista de literales, o None (sin avanzar) si la tupla no es simple
+        """
+        while True:
+            m = _TUPLA.match(self._buf, self._pos)
+            if not self._eof and (m.end() == len(self._buf) if m is not None
+                                  else len(self._buf) - self._pos < self.max_tuple):
+                self._refill()
+                continue
+            if m is None:
+                return None
+            self._pos = m.end()
+            return _VALORES.findall(m.group(1))
+
+    def skip_statement(self):
+        """Avanza hasta después del siguiente ';' (fuera de cadenas)"""
+        while True:
+            m = self._match(_SALTO)
+            if m is None or m.group() == ';':
+                return
+
+    def read_line(self):
+        """Resto de la línea actual (ej: el argumento de DELIMITER)"""
+        m = self._match(_LINEA)
+        return '' if m is None else m.group()
+
+    def skip_past(self, texto):
+        """Avanza hasta después de la siguiente aparición literal de texto"""
+        while True:
+            i = self._buf.find(texto, self._pos)
+            if i >= 0:
+                self._pos = i + len(texto)
+                return
+            if self._eof:
+                self._pos = len(self._buf)
+                return
+            self._pos = max(self._pos, len(self._buf) - len(texto))
+            self._refill()
+
+
+def _name(tokens):
+    """Nombre de tabla (`db`.`tabla` → tabla)"""
+    token = tokens.next()
+    nombre = token[1].strip('`') if token else None
+    siguiente = tokens.next()
+    if siguiente == ('punct', '.'):
+        return _name(tokens)
+    return nombre, siguiente
+
+
+def _literal(texto):
+    """Valor Python de un literal SQL de VALUES"""
+    inicial = texto[0]
+    if inicial == '_' and "'" in texto:
+        texto = texto[texto.index("'"):]  # _binary '...'
+        inicial = "'"
+    if inicial in '\'"':
+        return _unescape(texto[1:-1])
+    if inicial.isdigit() or inicial in '-.':
+        if texto[:2] in ('0x', '0X'):
+            return bytes.fromhex(texto[2:])
+        try:
+            return int(texto)
+        except ValueError:
+            return float(texto)
+    palabra = texto.upper()
+    if palabra == 'NULL':
+        return None
+    if palabra in ('TRUE', 'FALSE'):
+        return int(palabra == 'TRUE')
+    return texto
+
+
+def _value(token):
+    """Valor Python de un token de VALUES"""
+    if token[0] in ('punct', 'ident'):
+        raise ValueError(f"Valor inesperado en VALUES: {token[1]!r}")
+    return _literal(token[1])
+
+
+def _parse_create(tokens):
+    """
+    Definición de columnas de un CREATE TABLE (después del '(')
+
+    Returns:
+        ([(columna, tipo SQLite)], [columnas de la clave primaria])
+    """
+    columnas, clave = [], []
+    item, profundidad = [], 0
+    while True:
+        token = tokens.next()
+        if token is None:
+            raise ValueError("CREATE TABLE incompleto")
+        if profundidad == 0 and token in (('punct', ','), ('punct', ')')):
+            if item and item[0][0] == 'ident':
+                tipo = item[1][1] if len(item) > 1 else ''
+                columnas.append((item[0][1].strip('`'), sqlite_type(tipo)))
+                palabras = [texto.upper() for clase, texto in item if clase == 'word']
+                if 'PRIMARY' in palabras:
+                    clave.append(columnas[-1][0])
+            elif item and item[0][1].upper() == 'PRIMARY':
+                clave = [texto.strip('`') for clase, texto in item if clase == 'ident']
+            item = []
+            if token[1] == ')':
+                break
+            continue
+        if token == ('punct', '('):
+            profundidad += 1
+        elif token == ('punct', ')'):
+            profundidad -= 1
+        item.append(token)
+    tokens.skip_statement()  # ENGINE=... ;
+    return columnas, clave
+
+
+def _parse_rows(tokens):
+    """Filas de VALUES (...), (...); (después de VALUES)"""
+    while True:
+        valores = tokens.match_tuple()
+        if valores is not None:
+            yield tuple(_literal(valor) for valor in valores)
+        else:
+            yield _parse_tuple(tokens)
+
+        token = tokens.next()
+        if token is None or token == ('punct', ';'):
+            return
+        if token != ('punct', ','):
+            raise ValueError(f"Separador inesperado entre filas: {token!r}")
+
+
+def _parse_tuple(tokens):
+    """Una tupla de VALUES leída token por token"""
+    token = tokens.next()
+    if token != ('punct', '('):
+        raise ValueError(f"Se esperaba '(' en VALUES y se encontró {token!r}")
+    fila = []
+    while True:
+        token = tokens.next()
+        if token is None:
+            raise ValueError("INSERT incompleto")
+        if token[0] == 'word' and token[1].startswith('_'):
+            continue  # Introductor de charset: _binary '...'
+        fila.append(_value(token))
+        separador = tokens.next()
+        if separador == ('punct', ')'):
+            return tuple(fila)
+        if separador != ('punct', ','):
+            raise ValueError(f"Separador inesperado en VALUES: {separador!r}")
+
+
+def iter_dump(archivo, tablas, chunk_size=1 << 20):
+    """
+    Recorre un dump SQL y entrega sólo lo que corresponde a `tablas`
+
+    Yields:
+        ('create', tabla, [(columna, tipo)], [clave primaria]) por cada CREATE TABLE
+        ('row', tabla, columnas del INSERT o None, fila) por cada fila insertada
+    """
+    tablas = set(tablas)
+    tokens = DumpTokenizer(archivo, chunk_size)
+    while True:
+        token = tokens.next()
+        if token is None:
+            return
+        if token == ('punct', ';'):
+            continue
+        palabra = token[1].upper() if token[0] == 'word' else None
+
+        if palabra == 'DELIMITER':
+            # Rutinas y triggers: se saltan completos hasta volver a ';'
+            if tokens.read_line().strip() != ';':
+                tokens.skip_past('DELIMITER ;')
+            continue
+
+        if palabra == 'CREATE':
+            token = tokens.next()
+            if token is None or token[1].upper() != 'TABLE':
+                tokens.skip_statement()
+                continue
+            tabla, siguiente = _name(tokens)
+            if tabla and tabla.upper() == 'IF':  # IF NOT EXISTS
+                tokens.expect('EXISTS')
+                tabla, siguiente = _name(tokens)
+            if tabla not in tablas or siguiente != ('punct', '('):
+                tokens.skip_statement()
+                continue
+            columnas, clave = _parse_create(tokens)
+            yield 'create', tabla, columnas, clave
+            continue
+
+        if palabra in ('INSERT', 'REPLACE'):
+            token = tokens.next()
+            while token is not None and token[1].upper() in ('IGNORE', 'LOW_PRIORITY', 'DELAYED', 'HIGH_PRIORITY'):
+                token = tokens.next()
+            if token is None or token[1].upper() != 'INTO':
+                tokens.skip_statement()
+                continue
+            tabla, siguiente = _name(tokens)
+            if tabla not in tablas:
+                tokens.skip_statement()
+                continue
+            columnas = None
+            if siguiente == ('punct', '('):
+                columnas = []
+                while True:
+                    token = tokens.next()
+                    if token == ('punct', ')'):
+                        break
+                    if token != ('punct', ','):
+                        columnas.append(token[1].strip('`'))
+                siguiente = tokens.next()
+            if siguiente is None or siguiente[1].upper() not in ('VALUES', 'VALUE'):
+                tokens.skip_statement()
+                continue
+            for fila in _parse_rows(tokens):
+                yield 'row', tabla, columnas, fila
+            continue
+
+        tokens.skip_statement()
+
+
+def import_dump(archivo, sqlite_conn, tablas, batch_size=5000, commit_every=200000, progress=None,
+                chunk_size=1 << 20):
+    """
+    Importa a SQLite las tablas pedidas de un dump MySQL en una sola pasada
+
+    Cada CREATE TABLE reemplaza la tabla destino (y queda en el registro de
+    cambios como tabla reemplazada); las filas se insertan con INSERT OR
+    IGNORE por lotes de batch_size y se confirman cada commit_every.
+
+    Args:
+        archivo: Archivo de texto abierto con el dump
+        sqlite_conn: Conexión sqlite3 destino
+        tablas: Nombres de las tablas a importar
+        progress: Función opcional progress(tabla, filas) llamada en cada commit
+        chunk_size: Caracteres leídos del archivo por bloque
+
+    Returns:
+        dict {tabla: filas insertadas} (tablas sin CREATE TABLE no aparecen)
+    """
+    definiciones = {}   # tabla -> columnas del CREATE TABLE
+    sentencias = {}     # (tabla, columnas) -> INSERT
+    filas_por_tabla = {}
+    lote, clave_lote = [], None
+    pendientes = 0
+    ensure_changelog(sqlite_conn)
+
+    def vaciar():
+        if lote:
+            sqlite_conn.executemany(sentencias[clave_lote], lote)
+            lote.clear()
+
+    for evento in iter_dump(archivo, tablas, chunk_size):
+        if evento[0] == 'create':
+            _, tabla, columnas, clave = evento
+            vaciar()
+            definicion = [f"{_quote(columna)} {tipo}" for columna, tipo in columnas]
+            if clave:
+                definicion.append(f"PRIMARY KEY ({', '.join(map(_quote, clave))})")
+            sqlite_conn.execute(f"DROP TABLE IF EXISTS {_quote(tabla)}")
+            sqlite_conn.execute(f"CREATE TABLE {_quote(tabla)} ({', '.join(definicion)})")
+            log_table_reset(sqlite_conn, tabla)
+            definiciones[tabla] = [columna for columna, _ in columnas]
+            filas_por_tabla[tabla] = 0
+            continue
+
+        _, tabla, columnas, fila = evento
+        if tabla not in definiciones:
+            continue  # INSERT sin CREATE TABLE previo en el dump
+        columnas = tuple(columnas or definiciones[tabla])
+        if (tabla, columnas) != clave_lote:
+            vaciar()
+            clave_lote = (tabla, columnas)
+            if clave_lote not in sentencias:
+                sentencias[clave_lote] = (f"INSERT OR IGNORE INTO {_quote(tabla)} ({', '.join(map(_quote, columnas))}) "
+                                          f"VALUES ({', '.join('?' * len(columnas))})")
+        lote.append(fila)
+        filas_por_tabla[tabla] += 1
+        pendientes += 1
+
+        if len(lote) >= batch_size:
+            vaciar()
+        if pendientes >= commit_every:
+            vaciar()
+            sqlite_conn.commit()
+            pendientes = 0
+            if progress:
+                progress(tabla, filas_por_tabla[tabla])
+
+    vaciar()
+    sqlite_conn.commit()
+    return filas_por_tabla
@@ -14,18 +14,24 @@ from sklearn.metrics import (
     confusion_matrix
 )
 import joblib
-import shap
+from pathlib import Path
+
+from src.models.explanations import ExplanationService
+from src.models.model_bundle import BUNDLE_SUFFIX, artifact_version, is_bundle, load_bundle, write_bundle
+from src.models.scoring_policy import get_scoring_policy
 
 
 class CreditScoringModel:
     """Modelo de credit scoring con múltiples algoritmos"""
 
-    def __init__(self, model_type='xgboost', min_score=300, max_score=850):
+    def __init__(self, model_type='xgboost', min_score=300, max_score=850, scoring_policy=None):
         """
         Args:
             model_type: 'xgboost', 'random_forest', 'logistic'
             min_score: Score mínimo (ej: 300)
             max_score: Score máximo (ej: 850)
+            scoring_policy: ScoringPolicy fija; si es None se usa la de
+                config/config.yaml (recargada en caliente)
         """
         self.model_type = model_type
         self.model = None
@@ -33,6 +39,8 @@ class CreditScoringModel:
         self.max_score = max_score
         self.feature_importance = None
         self.explainer = None
+        self.version = None  # Versión del artefacto cargado (ver load)
+        self._scoring_policy = scoring_policy
 
         # Inicializar modelo según tipo
         if model_type == 'xgboost':
@@ -64,6 +72,7 @@ class CreditScoringModel:
         print(f"🚀 Entrenando modelo {self.model_type}...")
 
         self.model.fit(X_train, y_train)
+        self.explainer = None  # El explicador anterior ya no corresponde
 
         # Calcular importancia de features
         if hasattr(self.model, 'feature_importances_'):
@@ -139,18 +148,34 @@ class CreditScoringModel:
 
         return int(score)
 
-    def get_decision(self, score, threshold_reject=500, threshold_approve=650):
+    @property
+    def scoring_policy(self):
+        """Política de umbrales y tasas vigente"""
+        if self._scoring_policy is not None:
+            return self._scoring_policy
+        return get_scoring_policy()
+
+    def get_decision(self, score, threshold_reject=None, threshold_approve=None):
         """
         Determina decisión basada en score
 
         Args:
             score: Score crediticio
-            threshold_reject: Umbral para rechazar
-            threshold_approve: Umbral para aprobar
+            threshold_reject: Umbral para rechazar (por defecto el de la política)
+            threshold_approve: Umbral para aprobar (por defecto el de la política)
 
         Returns:
             'RECHAZAR', 'REVISAR MANUAL', o 'APROBAR'
         """
+        if threshold_reject is None and threshold_approve is None:
+            return self.scoring_policy.get_decision(score)
+
+        policy = self.scoring_policy
+        if threshold_reject is None:
+            threshold_reject = policy.decision_breakpoints[0]
+        if threshold_approve is None:
+            threshold_approve = policy.decision_breakpoints[1]
+
         if score < threshold_reject:
             return 'RECHAZAR'
         elif score < threshold_approve:
@@ -159,44 +184,71 @@ class CreditScoringModel:
             return 'APROBAR'
 
     def get_interest_rate(self, score):
-        """Sugiere tasa de interés según score"""
-        if score >= 800:
-            return 15.0
-        elif score >= 700:
-            return 18.0
-        elif score >= 600:
-            return 22.0
-        elif score >= 500:
-            return 28.0
-        else:
-            return 0.0  # No se aprueba
+        """Sugiere tasa de interés según score (tabla de la política)"""
+        return self.scoring_policy.get_interest_rate(score)
 
-    def predict_complete(self, X):
+    def calculate_scores(self, probabilities):
+        """Versión vectorizada de calculate_score para un arreglo de probabilidades"""
+        probabilities = np.asarray(probabilities)
+        scores = self.min_score + ((1 - probabilities) * (self.max_score - self.min_score))
+        return scores.astype(int)
+
+    def get_decisions(self, scores):
+        """Versión vectorizada de get_decision (np.digitize contra los umbrales)"""
+        return self.scoring_policy.get_decisions(scores)
+
+    def get_interest_rates(self, scores):
+        """Versión vectorizada de get_interest_rate (np.digitize contra la tabla de tasas)"""
+        return self.scoring_policy.get_interest_rates(scores)
+
+    def predict_columnar(self, X, policy=None):
+        """
+        Predicción completa en formato columnar (vectorizada con NumPy)
+
+        Args:
+            X: Features
+            policy: Política a aplicar (por defecto la vigente)
+
+        Returns:
+            DataFrame con probabilidad_default, score, decision,
+            tasa_sugerida y confianza (una fila por muestra de X)
+        """
+        probas = self.predict_proba(X)
+        scores = self.calculate_scores(probas)
+        if policy is None:
+            policy = self.scoring_policy  # Una sola política para todo el lote
+
+        return pd.DataFrame({
+            'probabilidad_default': np.round(probas.astype(np.float64), 4),
+            'score': scores,
+            'decision': policy.get_decisions(scores),
+            'tasa_sugerida': policy.get_interest_rates(scores),
+            'confianza': np.round(np.abs(0.5 - probas) * 2, 2)  # Qué tan seguro está
+        }, index=X.index if isinstance(X, pd.DataFrame) else None)
+
+    def predict_complete(self, X, policy=None):
         """
         Predicción completa con score, decisión y explicación
 
         Returns:
             Lista de diccionarios con resultado completo
         """
-        # Probabilidades
-        probas = self.predict_proba(X)
+        return self.predict_columnar(X, policy).to_dict('records')
 
-        results = []
-        for i, proba in enumerate(probas):
-            score = self.calculate_score(proba)
-            decision = self.get_decision(score)
-            rate = self.get_interest_rate(score)
-
-            result = {
-                'probabilidad_default': round(float(proba), 4),
-                'score': score,
-                'decision': decision,
-                'tasa_sugerida': rate,
-                'confianza': round(abs(0.5 - proba) * 2, 2)  # Qué tan seguro está
-            }
-            results.append(result)
+    def get_explainer(self, background=None):
+        """
+        Servicio de explicaciones SHAP del modelo actual
 
-        return results
+        Se construye una sola vez por versión del modelo (load lo construye
+        al cargar); se reconstruye sólo si cambió la versión o se pasa un fondo
+
+        Args:
+            background: Datos de fondo opcionales (feature_perturbation='interventional')
+        """
+        if (self.explainer is None or self.explainer.model is not self.model
+                or self.explainer.version != self.version or background is not None):
+            self.explainer = ExplanationService(self.model, version=self.version, background=background)
+        return self.explainer
 
     def explain_prediction(self, X, sample_index=0):
         """
@@ -209,37 +261,22 @@ class CreditScoringModel:
         Returns:
             Explicación de la predicción
         """
-        if self.explainer is None:
-            print("🔍 Inicializando explicador SHAP...")
-            self.explainer = shap.TreeExplainer(self.model)
-
-        shap_values = self.explainer.shap_values(X)
-
-        if isinstance(shap_values, list):
-            shap_values = shap_values[1]  # Para clasificación binaria
+        # SHAP sólo para la fila pedida
+        return self.get_explainer().explain(X, rows=[sample_index])[0]
 
-        # Top features que influyen
-        sample_shap = shap_values[sample_index]
-        feature_names = X.columns
-
-        # Ordenar por valor absoluto
-        importance_idx = np.argsort(np.abs(sample_shap))[::-1][:5]
-
-        explanation = []
-        for idx in importance_idx:
-            feature = feature_names[idx]
-            value = X.iloc[sample_index, idx]
-            shap_val = sample_shap[idx]
-            direction = "incrementa" if shap_val > 0 else "reduce"
+    def explain_batch(self, X, top_k=5, feature_names=None):
+        """
+        Explica varias predicciones en una sola llamada a SHAP
 
-            explanation.append({
-                'feature': feature,
-                'value': float(value),
-                'shap_value': float(shap_val),
-                'effect': direction
-            })
+        Args:
+            X: Features (DataFrame o arreglo)
+            top_k: Factores por fila
+            feature_names: Nombres de columnas si X es un arreglo
 
-        return explanation
+        Returns:
+            Lista (una por fila) de explicaciones como explain_prediction
+        """
+        return self.get_explainer().explain(X, top_k=top_k, feature_names=feature_names)
 
     def get_feature_importance(self, top_n=10):
         """Retorna top N features más importantes"""
@@ -247,27 +284,63 @@ class CreditScoringModel:
             return self.feature_importance.head(top_n)
         return None
 
-    def save(self, path):
-        """Guarda el modelo"""
-        joblib.dump({
-            'model': self.model,
-            'model_type': self.model_type,
-            'min_score': self.min_score,
-            'max_score': self.max_score,
-            'feature_importance': self.feature_importance
-        }, path)
+    def save(self, path, processor=None, version='1'):
+        """
+        Guarda el modelo
+
+        Con extensión .bundle se escribe un paquete con memory-map; si se
+        pasa el procesador, sus objetos van en el mismo archivo (un solo
+        artefacto versionado para la API)
+        """
+        if Path(path).suffix == BUNDLE_SUFFIX:
+            objetos = {'model': self.model, 'feature_importance': self.feature_importance}
+            if processor is not None:
+                objetos.update(processor.bundle_objects())
+            write_bundle(path, objetos, version=version,
+                         feature_names=processor.feature_names if processor is not None else None,
+                         metadata={
+                             'model_type': self.model_type,
+                             'min_score': self.min_score,
+                             'max_score': self.max_score
+                         })
+        else:
+            joblib.dump({
+                'model': self.model,
+                'model_type': self.model_type,
+                'min_score': self.min_score,
+                'max_score': self.max_score,
+                'feature_importance': self.feature_importance
+            }, path)
         print(f"💾 Modelo guardado en: {path}")
 
     def load(self, path):
-        """Carga el modelo"""
-        data = joblib.load(path)
+        """Carga el modelo (joblib o paquete .bundle)"""
+        if is_bundle(path):
+            bundle = load_bundle(path)
+            data = {
+                'model': bundle['model'],
+                'feature_importance': bundle.get('feature_importance'),
+                **bundle.metadata
+            }
+        else:
+            data = joblib.load(path)
         self.model = data['model']
         self.model_type = data['model_type']
         self.min_score = data['min_score']
         self.max_score = data['max_score']
         self.feature_importance = data.get('feature_importance')
+        self.version = artifact_version(path)
         print(f"✅ Modelo cargado desde: {path}")
 
+        # El explicador SHAP se arma al cargar (no en la primera explicación);
+        # si falla, la carga sigue y get_explainer() lo reintenta al explicar
+        self.explainer = None
+        if self.model_type != 'logistic':
+            try:
+                self.get_explainer()
+            except Exception as e:
+                print(f"⚠️ No se pudo inicializar el explicador SHAP: {e}")
+                self.explainer = None
 
 if __name__ == "__main__":
     print("Este módulo debe ser importado, no ejecutado directamente")
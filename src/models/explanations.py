@@ -0,0 +1,144 @@
+"""
+Explicaciones SHAP de las predicciones
+El TreeExplainer se construye una sola vez por modelo (al cargarlo) junto con
+su fondo (background) y la versión del modelo; los SHAP values se calculan
+sólo para las filas pedidas y el top-k de cada fila sale de un solo
+argpartition sobre la matriz del lote
+"""
+
+import numpy as np
+import pandas as pd
+import shap
+
+
+# Factores por explicación (igual que explain_prediction)
+TOP_K = 5
+
+# Filas de fondo para feature_perturbation='interventional'
+MAX_BACKGROUND = 100
+
+
+class ExplanationService:
+    """
+    Explicador SHAP de un modelo de árboles
+
+    Uso:
+        servicio = ExplanationService(modelo, version=modelo_version)
+        factores = servicio.explain(X, top_k=5)   # una lista por fila
+    """
+
+    def __init__(self, model, version=None, background=None, feature_names=None):
+        """
+        Args:
+            model: Modelo de árboles ajustado (XGBoost, RandomForest, GradientBoosting...)
+            version: Versión del modelo explicado (ver CreditScoringModel.version)
+            background: Datos de fondo opcionales; sin fondo se usa
+                tree_path_dependent (no necesita datos)
+            feature_names: Nombres de las features (si X no los trae)
+        """
+        self.model = model
+        self.version = version
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        if self.feature_names is None and hasattr(model, 'feature_names_in_'):
+            self.feature_names = list(model.feature_names_in_)
+
+        self.background = None
+        if background is not None:
+            fondo = np.asarray(background, dtype=np.float64)
+            if len(fondo) > MAX_BACKGROUND:
+                fondo = shap.sample(fondo, MAX_BACKGROUND, random_state=0)
+            self.background = fondo
+
+        print("🔍 Inicializando explicador SHAP...")
+        if self.background is None:
+            self.explainer = shap.TreeExplainer(model)
+        else:
+            self.explainer = shap.TreeExplainer(model, data=self.background,
+                                                feature_perturbation='interventional')
+
+    def shap_values(self, X, rows=None):
+        """
+        SHAP values de la clase positiva sólo para las filas pedidas
+
+        Args:
+            X: Features (DataFrame o arreglo)
+            rows: Índices posicionales de las filas (None = todas)
+
+        Returns:
+            np.ndarray (filas, features)
+        """
+        datos = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        if datos.ndim == 1:
+            datos = datos.reshape(1, -1)
+        if rows is not None:
+            datos = datos[np.atleast_1d(rows)]
+
+        valores = self.explainer.shap_values(datos)
+        if isinstance(valores, list):
+            valores = valores[1]  # Para clasificación binaria
+        valores = np.asarray(valores)
+        if valores.ndim == 3:
+            valores = valores[:, :, 1]  # (filas, features, clases)
+        return valores
+
+    def top_k(self, shap_values, k=TOP_K):
+        """
+        Índices de las k features de mayor |SHAP| de cada fila, de mayor a menor
+
+        Returns:
+            np.ndarray (filas, k) de índices de features
+        """
+        magnitud = np.abs(shap_values)
+        k = min(k, magnitud.shape[1])
+        if k < magnitud.shape[1]:
+            # argpartition: las k mayores de cada fila sin ordenar toda la fila
+            indices = np.argpartition(-magnitud, k - 1, axis=1)[:, :k]
+        else:
+            indices = np.broadcast_to(np.arange(k), magnitud.shape).copy()
+        orden = np.argsort(-np.take_along_axis(magnitud, indices, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(indices, orden, axis=1)
+
+    def explain(self, X, rows=None, top_k=TOP_K, feature_names=None):
+        """
+        Factores principales de cada fila pedida
+
+        Args:
+            X: Features (DataFrame o arreglo)
+            rows: Índices posicionales de las filas (None = todas)
+            top_k: Factores por fila
+            feature_names: Nombres de columnas si X es un arreglo
+
+        Returns:
+            Lista (una por fila) de listas de dicts con feature, value,
+            shap_value y effect
+        """
+        if isinstance(X, pd.DataFrame):
+            nombres = list(X.columns)
+        else:
+            nombres = list(feature_names) if feature_names is not None else self.feature_names
+        datos = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        if datos.ndim == 1:
+            datos = datos.reshape(1, -1)
+        if rows is not None:
+            datos = datos[np.atleast_1d(rows)]
+        if nombres is None:
+            nombres = [f"feature_{i}" for i in range(datos.shape[1])]
+        nombres = [str(nombre) for nombre in nombres]
+
+        valores = self.shap_values(datos)
+        indices = self.top_k(valores, top_k)
+        top_shap = np.take_along_axis(valores, indices, axis=1).tolist()
+        top_valores = np.take_along_axis(datos, indices, axis=1).astype(np.float64).tolist()
+
+        return [
+            [
+                {
+                    'feature': nombres[idx],
+                    'value': valor,
+                    'shap_value': shap_val,
+                    'effect': "incrementa" if shap_val > 0 else "reduce"
+                }
+                for idx, valor, shap_val in zip(fila_indices, fila_valores, fila_shap)
+            ]
+            for fila_indices, fila_valores, fila_shap in zip(indices.tolist(), top_valores, top_shap)
+        ]
@@ -0,0 +1,185 @@
+"""
+Inferencia compartida por las apps (hello, app_prediccion_v2, app_prediccion_v3)
+Arma el vector de features en un buffer NumPy (sin DataFrame por llamada),
+lo escala en el mismo buffer y evalúa el modelo una sola vez: la
+probabilidad y la decisión salen de la misma evaluación. Un vector ya
+evaluado se responde desde la caché de predicciones
+"""
+
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from sklearn.preprocessing import StandardScaler
+
+from src.models.prediction_cache import PredictionCache
+from src.models.tree_predictor import predict_with_proba
+
+
+# Predicciones guardadas por modelo cargado
+PREDICCION_CACHE_MAX = 4096
+
+# Versión para modelos sin una propia: cada carga es una versión nueva
+_cargas = itertools.count(1)
+
+
+class CreditPredictor:
+    """
+    Modelo + scaler + orden de features listos para evaluar
+
+    Uso:
+        predictor = CreditPredictor(modelo, scaler, feature_names)
+        probabilidad, decision = predictor.predict(datos)
+    """
+
+    def __init__(self, modelo, scaler, feature_names, umbral=None, version=None, cache_size=PREDICCION_CACHE_MAX):
+        """
+        Args:
+            modelo: Clasificador binario ajustado
+            scaler: Scaler ajustado (StandardScaler se aplica directo sobre el buffer)
+            feature_names: Orden de las features que espera el modelo
+            umbral: Probabilidad desde la que se decide la clase classes_[1];
+                None usa la decisión del propio modelo (igual a predict)
+            version: Versión del modelo para la caché (ej: artifact_version
+                del paquete); None = una versión nueva por cada predictor
+            cache_size: Predicciones guardadas (0 = sin caché)
+        """
+        self.modelo = modelo
+        self.scaler = scaler
+        self.feature_names = list(feature_names)
+        self.umbral = umbral
+        self.classes_ = np.asarray(modelo.classes_)
+        self._local = threading.local()
+
+        # La caché es de este predictor: cargar otro modelo empieza con una vacía
+        version = f"carga-{next(_cargas)}" if version is None else version
+        self.cache = PredictionCache(cache_size, model_version=version) if cache_size else None
+
+        # StandardScaler: (x - mean_) / scale_ en el buffer, las mismas
+        # operaciones que su transform; otros scalers pasan por transform
+        self._media = self._escala = None
+        self._scaler_directo = type(scaler) is StandardScaler
+        if self._scaler_directo:
+            nombres = getattr(scaler, 'feature_names_in_', None)
+            if nombres is not None and list(nombres) != self.feature_names:
+                raise ValueError("El scaler fue ajustado con otro orden de features")
+            if scaler.with_mean:
+                self._media = np.asarray(scaler.mean_, dtype=np.float64)
+            if scaler.with_std:
+                self._escala = np.asarray(scaler.scale_, dtype=np.float64)
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def new_buffer(self, filas=1):
+        """Buffer de features para reutilizar entre llamadas (filas × features)"""
+        return np.empty((filas, self.n_features), dtype=np.float64)
+
+    def _buffer(self):
+        """Buffer de una fila propio de cada hilo (las sesiones corren en hilos)"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = self.new_buffer()
+        return buffer
+
+    def fill(self, datos, buffer, fila=0):
+        """
+        Copia las features de un registro (dict) a una fila del buffer
+
+        Raises:
+            KeyError: Si falta alguna feature
+        """
+        destino = buffer[fila]
+        for i, nombre in enumerate(self.feature_names):
+            destino[i] = datos[nombre]
+        return buffer
+
+    def scale(self, buffer):
+        """Escala el buffer (en el mismo buffer si el scaler lo permite)"""
+        if not self._scaler_directo:
+            return self.scaler.transform(pd.DataFrame(buffer, columns=self.feature_names))
+        if self._media is not None:
+            np.subtract(buffer, self._media, out=buffer)
+        if self._escala is not None:
+            np.divide(buffer, self._escala, out=buffer)
+        return buffer
+
+    def predict_scaled(self, X):
+        """
+        Probabilidad de classes_[1] y clase de cada fila ya escalada
+
+        Returns:
+            (probabilidades, clases) como arreglos
+        """
+        probabilidades, clases = predict_with_proba(self.modelo, X)
+        if self.umbral is not None:
+            clases = self.classes_[(probabilidades >= self.umbral).astype(int)]
+        return probabilidades, clases
+
+    def predict(self, datos, buffer=None):
+        """
+        Evalúa un registro
+
+        Args:
+            datos: dict con (al menos) las features del modelo
+            buffer: Buffer de una fila preasignado (ver new_buffer); si no se
+                pasa se usa uno propio del hilo
+
+        Returns:
+            (probabilidad, decision)
+        """
+        buffer = self._buffer() if buffer is None else buffer
+        self.fill(datos, buffer)
+
+        # Vector ya evaluado: sin escalar ni evaluar el modelo
+        clave = self.cache.vector_key(buffer[0]) if self.cache is not None else None
+        if clave is not None:
+            resultado = self.cache.get(clave)
+            if resultado is not None:
+                return resultado
+
+        probabilidades, clases = self.predict_scaled(self.scale(buffer[:1]))
+        resultado = (probabilidades[0], clases[0])
+        if clave is not None:
+            self.cache.put(clave, resultado)
+        return resultado
+
+    def predict_many(self, registros, buffer=None):
+        """
+        Evalúa varios registros (lista de dicts o DataFrame) en una sola llamada
+
+        Returns:
+            (probabilidades, clases) como arreglos
+        """
+        if isinstance(registros, pd.DataFrame):
+            X = registros[self.feature_names].to_numpy(dtype=np.float64, copy=True)
+        else:
+            n = len(registros)
+            if buffer is None or buffer.shape[0] < n:
+                buffer = self.new_buffer(n)
+            for fila, datos in enumerate(registros):
+                self.fill(datos, buffer, fila)
+            X = buffer[:n]
+        return self.predict_scaled(self.scale(X))
+
+
+# Predictores por artefactos cargados; el predictor guarda referencias al
+# modelo y al scaler, así que sus id() no se reutilizan mientras estén aquí
+_PREDICTORES = {}
+_MAX_PREDICTORES = 4
+_PREDICTORES_LOCK = threading.Lock()
+
+
+def get_predictor(modelo, scaler, feature_names, version=None):
+    """CreditPredictor para los artefactos cargados (cacheado)"""
+    clave = (id(modelo), id(scaler), tuple(feature_names), version)
+    with _PREDICTORES_LOCK:
+        predictor = _PREDICTORES.get(clave)
+        if predictor is None:
+            if len(_PREDICTORES) >= _MAX_PREDICTORES:
+                _PREDICTORES.pop(next(iter(_PREDICTORES)))  # El más antiguo
+            predictor = _PREDICTORES[clave] = CreditPredictor(modelo, scaler, feature_names, version=version)
+    return predictor
@@ -0,0 +1,188 @@
+"""
+Paquete de modelo versionado en un solo archivo
+Manifiesto JSON + objetos (modelo, scaler, encoders...) serializados con
+pickle protocolo 5: los arreglos NumPy van fuera de banda, alineados en el
+archivo, y al cargar se leen con memory-map sin copiarse. Varios procesos que
+abren el mismo paquete comparten esas páginas y el arranque sólo lee lo que
+se usa
+
+Formato:
+    MAGIC | segmentos alineados a 64 bytes | manifiesto JSON
+          | offset del manifiesto (u64) | largo del manifiesto (u64) | MAGIC
+"""
+
+import json
+import mmap
+import pickle
+import struct
+from datetime import datetime
+from pathlib import Path
+
+
+MAGIC = b'CSBUNDLE'
+FORMAT_VERSION = 1
+BUNDLE_SUFFIX = '.bundle'
+
+_ALIGN = 64
+_TRAILER = struct.Struct('<QQ8s')
+
+
+def _pad(f):
+    resto = f.tell() % _ALIGN
+    if resto:
+        f.write(b'\0' * (_ALIGN - resto))
+
+
+def _write_segment(f, data):
+    """Escribe un segmento alineado y retorna [offset, largo]"""
+    _pad(f)
+    offset = f.tell()
+    return [offset, f.write(data)]
+
+
+def write_bundle(path, objects, version, feature_names=None, metadata=None):
+    """
+    Guarda los objetos en un paquete
+
+    Args:
+        path: Archivo destino (.bundle)
+        objects: dict {nombre: objeto} (ej: {'model': ..., 'scaler': ...})
+        version: Versión del paquete (ej: 'v2'); los lectores pueden exigirla
+        feature_names: Orden de las features de entrada (va en el manifiesto)
+        metadata: dict adicional para el manifiesto (JSON)
+
+    Returns:
+        dict con el manifiesto
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporal = path.with_name(path.name + '.tmp')
+
+    manifiesto = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'creado_en': datetime.now().isoformat(timespec='seconds'),
+        'feature_names': list(feature_names) if feature_names is not None else None,
+        'metadata': metadata or {},
+        'objects': {},
+    }
+    with open(temporal, 'wb') as f:
+        f.write(MAGIC)
+        for nombre, objeto in objects.items():
+            buffers = []
+            datos = pickle.dumps(objeto, protocol=5, buffer_callback=buffers.append)
+            entrada = {'pickle': _write_segment(f, datos), 'buffers': []}
+            for buffer in buffers:
+                entrada['buffers'].append(_write_segment(f, buffer.raw()))
+            manifiesto['objects'][nombre] = entrada
+
+        crudo = json.dumps(manifiesto, ensure_ascii=False).encode('utf-8')
+        offset = f.tell()
+        f.write(crudo)
+        f.write(_TRAILER.pack(offset, len(crudo), MAGIC))
+
+    temporal.replace(path)  # Un proceso que recarga nunca ve un paquete a medias
+    return manifiesto
+
+
+def is_bundle(path):
+    """True si el archivo es un paquete (por su firma, no por la extensión)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class ModelBundle:
+    """
+    Paquete abierto con memory-map
+
+    Los objetos se deserializan la primera vez que se piden; sus arreglos
+    NumPy quedan respaldados por el archivo (sólo lectura).
+    """
+
+    def __init__(self, path, expected_version=None):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        vista = memoryview(self._mmap)
+        offset, largo, firma = _TRAILER.unpack(vista[-_TRAILER.size:])
+        if vista[:len(MAGIC)] != MAGIC or firma != MAGIC:
+            raise ValueError(f"{self.path} no es un paquete de modelo")
+        self.manifest = json.loads(bytes(vista[offset:offset + largo]).decode('utf-8'))
+        if self.manifest['format_version'] > FORMAT_VERSION:
+            raise ValueError(f"Formato de paquete {self.manifest['format_version']} no soportado")
+        if expected_version is not None and self.version != expected_version:
+            raise ValueError(f"Paquete versión {self.version!r}, se esperaba {expected_version!r}")
+
+        self._vista = vista
+        self._cache = {}
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def feature_names(self):
+        return self.manifest['feature_names']
+
+    @property
+    def metadata(self):
+        return self.manifest['metadata']
+
+    def names(self):
+        return list(self.manifest['objects'])
+
+    def __contains__(self, nombre):
+        return nombre in self.manifest['objects']
+
+    def _segment(self, offset, largo):
+        return self._vista[offset:offset + largo]
+
+    def __getitem__(self, nombre):
+        if nombre not in self._cache:
+            entrada = self.manifest['objects'][nombre]
+            buffers = [self._segment(*segmento) for segmento in entrada['buffers']]
+            self._cache[nombre] = pickle.loads(self._segment(*entrada['pickle']), buffers=buffers)
+        return self._cache[nombre]
+
+    def get(self, nombre, default=None):
+        return self[nombre] if nombre in self else default
+
+
+def load_bundle(path, expected_version=None):
+    """Abre un paquete de modelo"""
+    return ModelBundle(path, expected_version)
+
+
+def artifact_version(path):
+    """
+    Identificador de la versión de un artefacto de modelo
+
+    Paquete: versión + fecha de creación del manifiesto (cambia al
+    reentrenar aunque se conserve la versión); otros archivos: nombre +
+    fecha de modificación.
+    """
+    if is_bundle(path):
+        manifiesto = load_bundle(path).manifest
+        return f"{manifiesto['version']}@{manifiesto['creado_en']}"
+    return f"{Path(path).name}@{Path(path).stat().st_mtime_ns}"
+
+
+def load_model_artifacts(bundle_path, model_file, scaler_file, feature_names_file, expected_version=None):
+    """
+    (modelo, scaler, feature_names) para las apps
+
+    Usa el paquete si existe; si no, los tres pickles de versiones anteriores.
+    """
+    if Path(bundle_path).exists():
+        bundle = load_bundle(bundle_path, expected_version)
+        return bundle['model'], bundle['scaler'], bundle.feature_names
+
+    artefactos = []
+    for archivo in (model_file, scaler_file, feature_names_file):
+        with open(archivo, 'rb') as f:
+            artefactos.append(pickle.load(f))
+    return tuple(artefactos)
@@ -0,0 +1,150 @@
+"""
+Caché de predicciones direccionada por contenido (LRU acotado)
+La clave es un hash del vector de features canónico (valores redondeados)
+más la versión del modelo: la misma solicitud reenviada (refresco de la
+página, reintento del PDF) no vuelve a preprocesar ni a evaluar el modelo.
+Al cambiar la versión del modelo la caché se vacía
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Resultados de predicción por vector de features
+
+    Uso:
+        cache = PredictionCache(max_size=4096)
+        cache.set_model_version(version)      # al cargar el modelo
+        clave = cache.vector_key(x)
+        resultado = cache.get(clave)
+        if resultado is None:
+            resultado = predecir(x)
+            cache.put(clave, resultado)
+    """
+
+    def __init__(self, max_size=4096, decimals=6, model_version=None):
+        """
+        Args:
+            max_size: Máximo de resultados guardados
+            decimals: Decimales a los que se redondea cada feature antes del hash
+            model_version: Versión del modelo (parte de la clave)
+        """
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+
+        self.max_size = max_size
+        self.decimals = decimals
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> resultado - el más reciente al final
+        self._model_version = None
+        self._prefix = b''
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.invalidations = 0
+
+        self.set_model_version(model_version)
+
+    @property
+    def model_version(self):
+        return self._model_version
+
+    def set_model_version(self, version):
+        """
+        Fija la versión del modelo; si cambió descarta todos los resultados
+
+        Returns:
+            True si la caché se invalidó
+        """
+        version = None if version is None else str(version)
+        with self._lock:
+            if version == self._model_version:
+                return False
+            self._model_version = version
+            self._prefix = (version or '').encode('utf-8') + b'\0'
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            return True
+
+    def _hash(self, data):
+        return hashlib.blake2b(self._prefix + data, digest_size=16).digest()
+
+    def vector_key(self, valores):
+        """Clave de un vector numérico de features (en el orden del modelo)"""
+        x = np.round(np.asarray(valores, dtype=np.float64), self.decimals) + 0.0  # -0.0 → 0.0
+        x[np.isnan(x)] = np.nan  # Un solo NaN canónico
+        return self._hash(x.tobytes())
+
+    def _canonical(self, valor):
+        if valor is None or isinstance(valor, str):
+            return valor
+        if isinstance(valor, (bool, np.bool_)):
+            return int(valor)
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            return str(valor)
+        if math.isnan(numero):
+            return 'nan'
+        return round(numero, self.decimals) + 0.0
+
+    def record_key(self, datos, columnas=None):
+        """
+        Clave de un registro con valores mixtos (dict)
+
+        Args:
+            columnas: Columnas que entran en la clave (por defecto todas, ordenadas)
+        """
+        columnas = sorted(datos) if columnas is None else columnas
+        canonico = [[columna, self._canonical(datos.get(columna))] for columna in columnas]
+        return self._hash(json.dumps(canonico, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    def get(self, clave):
+        """Resultado guardado para la clave o None"""
+        with self._lock:
+            resultado = self._entries.get(clave)
+            if resultado is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(clave)
+            self.hits += 1
+            return resultado
+
+    def put(self, clave, resultado):
+        """Guarda un resultado (desaloja el menos usado si la caché está llena)"""
+        with self._lock:
+            self._entries[clave] = resultado
+            self._entries.move_to_end(clave)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self):
+        """Descarta todos los resultados"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Estado de la caché"""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'entradas': len(self._entries),
+                'version_modelo': self._model_version,
+                'aciertos': self.hits,
+                'fallos': self.misses,
+                'tasa_aciertos': self.hits / consultas if consultas else 0.0,
+                'desalojadas': self.evicted,
+                'invalidaciones': self.invalidations,
+            }
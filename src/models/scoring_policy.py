@@ -0,0 +1,186 @@
+"""
+Política de scoring (umbrales de decisión y tabla de tasas)
+Se construye desde config/config.yaml y se recarga en caliente si el archivo cambia
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # PyYAML es opcional: sin él se usa la política por defecto
+    yaml = None
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "config.yaml"
+
+# Cada cuántos segundos se revisa si el archivo de configuración cambió
+RELOAD_CHECK_SECONDS = 5.0
+
+
+class ScoringPolicy:
+    """
+    Umbrales de decisión y tasas como arreglos ordenados de NumPy
+
+    Las búsquedas usan np.digitize (búsqueda binaria), así que funcionan
+    igual para un score o para un arreglo de scores.
+    """
+
+    DECISION_LABELS = ('RECHAZAR', 'REVISAR MANUAL', 'APROBAR')
+
+    def __init__(self, threshold_reject=500, threshold_approve=650,
+                 rate_breakpoints=(500, 600, 700, 800), rates=(0.0, 28.0, 22.0, 18.0, 15.0),
+                 source=None):
+        """
+        Args:
+            threshold_reject: Score menor a este = RECHAZAR
+            threshold_approve: Score desde este = APROBAR (entre ambos = REVISAR MANUAL)
+            rate_breakpoints: Límites inferiores de cada tramo de tasa (sin el primero)
+            rates: Tasa de cada tramo (un elemento más que rate_breakpoints)
+            source: Origen de la política (ruta del YAML) para diagnóstico
+        """
+        if threshold_reject > threshold_approve:
+            raise ValueError("El umbral de rechazo no puede ser mayor al de aprobación")
+
+        self.decision_breakpoints = np.array([threshold_reject, threshold_approve], dtype=np.float64)
+        self.decision_labels = np.array(self.DECISION_LABELS, dtype=object)
+        self.rate_breakpoints = np.asarray(rate_breakpoints, dtype=np.float64)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.source = source
+        self.loaded_at = time.time()
+
+        if len(self.rates) != len(self.rate_breakpoints) + 1:
+            raise ValueError("La tabla de tasas debe tener un tramo más que sus límites")
+        if np.any(np.diff(self.rate_breakpoints) < 0):
+            raise ValueError("Los límites de la tabla de tasas deben estar ordenados")
+
+        # Versión por contenido: igual en todos los procesos que cargaron la misma política
+        contenido = b'|'.join(arreglo.tobytes() for arreglo in
+                              (self.decision_breakpoints, self.rate_breakpoints, self.rates))
+        self.version = hashlib.blake2b(contenido, digest_size=8).hexdigest()
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_CONFIG_PATH):
+        """Construye la política desde la sección `scoring` del YAML"""
+        if yaml is None:
+            raise ImportError("PyYAML no está instalado")
+
+        with open(path, encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+
+        scoring = config['scoring']
+        thresholds = scoring['thresholds']
+
+        # Tramos ordenados por score_min; el primero cubre todo lo que está por debajo
+        tramos = sorted(scoring['tasas'], key=lambda tramo: tramo['score_min'])
+        breakpoints = [tramo['score_min'] for tramo in tramos[1:]]
+        rates = [tramo['tasa'] for tramo in tramos]
+
+        return cls(
+            threshold_reject=thresholds['rechazar'],
+            threshold_approve=thresholds['aprobar'],
+            rate_breakpoints=breakpoints,
+            rates=rates,
+            source=str(path)
+        )
+
+    def get_decisions(self, scores):
+        """Decisión para uno o varios scores"""
+        return self.decision_labels[np.digitize(scores, self.decision_breakpoints)]
+
+    def get_interest_rates(self, scores):
+        """Tasa sugerida para uno o varios scores"""
+        return self.rates[np.digitize(scores, self.rate_breakpoints)]
+
+    def get_decision(self, score):
+        """Decisión para un solo score"""
+        return str(self.get_decisions(score))
+
+    def get_interest_rate(self, score):
+        """Tasa sugerida para un solo score"""
+        return float(self.get_interest_rates(score))
+
+    def to_dict(self):
+        """Resumen de la política (para diagnóstico)"""
+        return {
+            'umbral_rechazo': float(self.decision_breakpoints[0]),
+            'umbral_aprobacion': float(self.decision_breakpoints[1]),
+            'limites_tasas': self.rate_breakpoints.tolist(),
+            'tasas': self.rates.tolist(),
+            'version': self.version,
+            'origen': self.source,
+            'cargada_en': self.loaded_at,
+        }
+
+
+class _PolicyCache:
+    """Política cargada por archivo, recargada cuando cambia su fecha de modificación"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # ruta -> [mtime, última revisión, política]
+
+    def get(self, path):
+        path = str(path)
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and now - entry[1] < RELOAD_CHECK_SECONDS:
+            return entry[2]
+
+        with self._lock:
+            entry = self._entries.get(path)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+
+            if entry is not None and entry[0] == mtime:
+                entry[1] = now
+                return entry[2]
+
+            policy = self._load(path, mtime, entry)
+            self._entries[path] = [mtime, now, policy]
+            return policy
+
+    def _load(self, path, mtime, entry):
+        if mtime is not None and yaml is None and entry is None:
+            print(f"⚠️ PyYAML no está instalado: se ignora {path} y se usa la política de scoring por defecto")
+        if mtime is None or yaml is None:
+            return entry[2] if entry is not None else ScoringPolicy()
+        try:
+            policy = ScoringPolicy.from_config(path)
+            if entry is not None:
+                print(f"🔄 Política de scoring recargada desde: {path}")
+            return policy
+        except Exception as e:
+            # Configuración inválida: conservar la política vigente
+            print(f"❌ Error al cargar la política de scoring ({path}): {e}")
+            return entry[2] if entry is not None else ScoringPolicy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _PolicyCache()
+
+
+def get_scoring_policy(path=DEFAULT_CONFIG_PATH):
+    """
+    Política vigente para `path`
+
+    Se construye una vez y se vuelve a leer sólo si el archivo cambió
+    (revisando como máximo cada RELOAD_CHECK_SECONDS), así que cada worker
+    toma la nueva política sin reiniciarse.
+    """
+    return _cache.get(path)
+
+
+def reload_scoring_policy():
+    """Fuerza la relectura de la política en la próxima consulta"""
+    _cache.clear()
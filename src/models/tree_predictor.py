@@ -0,0 +1,224 @@
+"""
+Predictor compilado para GradientBoostingClassifier (binario)
+Los árboles ajustados se aplanan en arreglos NumPy contiguos: cada árbol se
+completa hasta la profundidad máxima del ensamble y sus nodos quedan en orden
+por niveles (hijos de j en 2j+1 y 2j+2), de modo que feature/threshold son
+matrices (árboles × nodos internos) y value (árboles × hojas). Un lote se
+evalúa comparando todos los nodos de todos los árboles a la vez y bajando un
+nivel por iteración; probabilidad y clase salen de la misma pasada
+
+Reproduce bit a bit la aritmética de sklearn: X en float32 contra el umbral,
+hojas ya multiplicadas por learning_rate y suma en el orden de las etapas
+partiendo de la predicción inicial
+
+Evaluar el árbol completo cuesta 2^profundidad comparaciones por árbol: sólo
+conviene para ensambles chicos de árboles poco profundos (el modelo v2 usa 50
+árboles con max_depth=2). Para los demás se sigue usando sklearn (un solo
+predict_proba)
+"""
+
+import weakref
+
+import numpy as np
+import sklearn
+from scipy.special import expit
+
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import GradientBoostingClassifier
+
+
+# Nodos internos (árboles × (2^profundidad - 1)) a partir de los cuales sklearn
+# es más rápido que el recorrido denso
+MAX_NODOS = 1024
+
+# Decisiones (nodo, fila) por bloque: los arreglos intermedios quedan en caché
+NODOS_POR_BLOQUE = 1 << 17
+
+# sklearn >= 1.4 decide la clase con raw >= 0; antes con argmax([1 - p, p])
+# (en el empate p = 0.5 gana la clase 0)
+_CLASE_POR_RAW = tuple(int(parte) for parte in sklearn.__version__.split('.')[:2]) >= (1, 4)
+
+
+def _floor_float32(umbrales):
+    """
+    Mayor float32 <= cada umbral float64
+
+    Para x float32, x <= t equivale a x <= _floor_float32(t): la comparación
+    se hace en float32 sin cambiar ninguna decisión.
+    """
+    reducidos = umbrales.astype(np.float32)
+    return np.where(reducidos.astype(np.float64) > umbrales,
+                    np.nextafter(reducidos, np.float32(-np.inf)), reducidos)
+
+
+class CompiledGBC:
+    """
+    GradientBoostingClassifier binario compilado a arreglos
+
+    Uso:
+        predictor = CompiledGBC.from_sklearn(modelo)
+        probabilidad, clase = predictor.predict_with_proba(X)
+    """
+
+    def __init__(self, feature, threshold, value, depth, init_raw, classes, n_features):
+        self.feature = feature        # (árboles, 2^depth - 1) intp
+        self.threshold = threshold    # (árboles, 2^depth - 1) float32
+        self.value = value            # (árboles, 2^depth) float64
+        self.depth = depth
+        self.init_raw = init_raw
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_sklearn(cls, modelo, max_nodos=MAX_NODOS):
+        """
+        Compila un GradientBoostingClassifier ajustado
+
+        Raises:
+            ValueError: Si el modelo no es binario, usa un init no constante o
+                los árboles completos superan max_nodos nodos internos
+        """
+        if not isinstance(modelo, GradientBoostingClassifier):
+            raise ValueError(f"Modelo no soportado: {type(modelo).__name__}")
+        if modelo.estimators_.shape[1] != 1:
+            raise ValueError("Sólo se soporta clasificación binaria")
+        if not (modelo.init_ == 'zero' or isinstance(modelo.init_, DummyClassifier)):
+            raise ValueError("Sólo se soporta init constante (DummyClassifier o 'zero')")
+
+        arboles = [arbol.tree_ for arbol in modelo.estimators_[:, 0]]
+        depth = max(1, max(tree.max_depth for tree in arboles))
+        internos, hojas = 2 ** depth - 1, 2 ** depth
+        if len(arboles) * internos > max_nodos:
+            raise ValueError(f"{len(arboles)} árboles de profundidad {depth}: "
+                             f"{len(arboles) * internos} nodos (máximo {max_nodos})")
+
+        feature = np.zeros((len(arboles), internos), dtype=np.intp)
+        # Nodos de relleno: umbral +inf (siempre a la izquierda; ambos lados
+        # llevan el mismo valor)
+        threshold = np.full((len(arboles), internos), np.inf)
+        value = np.zeros((len(arboles), hojas))
+
+        for t, tree in enumerate(arboles):
+            pendientes = [(0, 0, 0)]  # (nodo sklearn, posición por niveles, nivel)
+            while pendientes:
+                nodo, posicion, nivel = pendientes.pop()
+                if tree.children_left[nodo] == -1:
+                    # Una hoja a menor profundidad ocupa todas las hojas de su subárbol
+                    ancho = 2 ** (depth - nivel)
+                    primera = (posicion + 1) * ancho - 1 - internos
+                    value[t, primera:primera + ancho] = modelo.learning_rate * tree.value[nodo, 0, 0]
+                    continue
+                feature[t, posicion] = tree.feature[nodo]
+                threshold[t, posicion] = tree.threshold[nodo]
+                pendientes.append((tree.children_left[nodo], 2 * posicion + 1, nivel + 1))
+                pendientes.append((tree.children_right[nodo], 2 * posicion + 2, nivel + 1))
+
+        # Predicción inicial: constante para todas las filas; se toma de sklearn
+        n_features = modelo.n_features_in_
+        init_raw = float(modelo._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0])
+
+        return cls(
+            feature=feature,
+            threshold=_floor_float32(threshold),
+            value=value,
+            depth=depth,
+            init_raw=init_raw,
+            classes=np.asarray(modelo.classes_),
+            n_features=n_features,
+        )
+
+    def _check_X(self, X):
+        X = np.asarray(X, dtype=np.float32)  # sklearn también evalúa en float32
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} features, X tiene forma {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("X contiene NaN o infinitos")
+        return X
+
+    def _raw_block(self, X):
+        """Log-odds de un bloque de filas"""
+        arboles, internos = self.feature.shape
+        hojas = self.value.shape[1]
+        XT = np.ascontiguousarray(X.T)
+        filas = XT.shape[1]
+
+        # Decisión de todos los nodos (árbol, nodo, fila): True = a la derecha
+        derecha = (np.take(XT, self.feature, axis=0) > self.threshold[:, :, None]).ravel()
+        base = (np.arange(arboles) * (internos * filas))[:, None] + np.arange(filas)
+        hoja = np.zeros((arboles, filas), dtype=np.intp)
+        for nivel in range(self.depth):
+            hoja = 2 * hoja + derecha.take(base + (2 ** nivel - 1 + hoja) * filas)
+
+        aportes = np.empty((arboles + 1, filas))
+        aportes[0] = self.init_raw
+        aportes[1:] = self.value.take((np.arange(arboles) * hojas)[:, None] + hoja)
+        # cumsum acumula en orden (como predict_stages); una suma por pares no
+        # daría los mismos bits
+        return np.cumsum(aportes, axis=0)[-1]
+
+    def decision_function(self, X):
+        """Log-odds (raw) por fila"""
+        X = self._check_X(X)
+        raw = np.empty(X.shape[0])
+        bloque = min(512, max(64, NODOS_POR_BLOQUE // self.feature.size))
+        for inicio in range(0, X.shape[0], bloque):
+            raw[inicio:inicio + bloque] = self._raw_block(X[inicio:inicio + bloque])
+        return raw
+
+    def predict_with_proba(self, X):
+        """
+        Una sola pasada por los árboles
+
+        Returns:
+            (probabilidad de la clase classes_[1], clase predicha) por fila
+        """
+        raw = self.decision_function(X)
+        probabilidad = expit(raw)
+        if _CLASE_POR_RAW:
+            codigos = (raw >= 0).astype(int)
+        else:
+            codigos = (probabilidad > 1 - probabilidad).astype(int)
+        return probabilidad, self.classes_[codigos]
+
+    def predict_proba(self, X):
+        probabilidad = expit(self.decision_function(X))
+        return np.column_stack([1 - probabilidad, probabilidad])
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[1]
+
+
+_COMPILADOS = weakref.WeakKeyDictionary()
+
+
+def compile_predictor(modelo):
+    """CompiledGBC del modelo (cacheado por modelo), o None si no es compilable"""
+    if isinstance(modelo, CompiledGBC):
+        return modelo
+    try:
+        return _COMPILADOS[modelo]
+    except (KeyError, TypeError):
+        pass
+    try:
+        predictor = CompiledGBC.from_sklearn(modelo)
+    except ValueError:
+        predictor = None
+    try:
+        _COMPILADOS[modelo] = predictor
+    except TypeError:
+        pass
+    return predictor
+
+
+def predict_with_proba(modelo, X):
+    """
+    Probabilidad de classes_[1] y clase de cada fila en una sola evaluación
+
+    Usa el predictor compilado si el modelo lo admite; si no, un solo
+    predict_proba del modelo (la clase sale de las mismas probabilidades)
+    """
+    predictor = compile_predictor(modelo)
+    if predictor is not None:
+        return predictor.predict_with_proba(X)
+    proba = modelo.predict_proba(X)
+    return proba[:, 1], modelo.classes_[np.argmax(proba, axis=1)]
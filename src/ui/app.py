@@ -14,6 +14,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.models.credit_model import CreditScoringModel
 from src.data.data_processor import CreditDataProcessor
+from src.models.scoring_policy import get_scoring_policy
 
 # Configuración de la página
 st.set_page_config(
@@ -74,11 +75,13 @@ def load_model():
 
 
 def crear_gauge(score, min_val=300, max_val=850):
-    """Crea un gauge visual para el score"""
+    """Crea un gauge visual para el score (tramos según la política vigente)"""
+    umbral_rechazo, umbral_aprobacion = get_scoring_policy().decision_breakpoints.tolist()
+
     # Determinar color según score
-    if score < 500:
+    if score < umbral_rechazo:
         color = "red"
-    elif score < 650:
+    elif score < umbral_aprobacion:
         color = "orange"
     else:
         color = "green"
@@ -95,9 +98,9 @@ def crear_gauge(score, min_val=300, max_val=850):
             'borderwidth': 2,
             'bordercolor': "gray",
             'steps': [
-                {'range': [min_val, 500], 'color': '#ffcccc'},
-                {'range': [500, 650], 'color': '#ffe0b3'},
-                {'range': [650, max_val], 'color': '#ccffcc'}
+                {'range': [min_val, umbral_rechazo], 'color': '#ffcccc'},
+                {'range': [umbral_rechazo, umbral_aprobacion], 'color': '#ffe0b3'},
+                {'range': [umbral_aprobacion, max_val], 'color': '#ccffcc'}
             ],
             'threshold': {
                 'line': {'color': "black", 'width': 4},
@@ -111,6 +114,31 @@ def crear_gauge(score, min_val=300, max_val=850):
     return fig
 
 
+def describir_politica(min_val=300, max_val=850):
+    """Rangos de score y tasas de la política vigente (markdown)"""
+    politica = get_scoring_policy()
+    umbral_rechazo, umbral_aprobacion = (int(umbral) for umbral in politica.decision_breakpoints)
+
+    lineas = [
+        "#### Rangos de Score",
+        "",
+        f"- **{min_val}-{umbral_rechazo}**: Alto riesgo → Rechazar",
+        f"- **{umbral_rechazo}-{umbral_aprobacion}**: Riesgo medio → Revisar manualmente",
+        f"- **{umbral_aprobacion}-{max_val}**: Bajo riesgo → Aprobar",
+        "",
+        "#### Tasas de Interés Sugeridas",
+        "",
+    ]
+
+    # Tramos de mayor a menor score (los de tasa 0 corresponden a rechazo)
+    limites = [min_val] + [int(limite) for limite in politica.rate_breakpoints] + [max_val]
+    for i in reversed(range(len(politica.rates))):
+        if politica.rates[i] > 0:
+            lineas.append(f"- **{limites[i]}-{limites[i + 1]}**: {politica.rates[i]:g}% anual")
+
+    return "\n".join(lineas)
+
+
 def main():
     """Función principal de la UI"""
 
@@ -308,20 +336,11 @@ def main():
         2. **Información Financiera**: Ingresos, monto solicitado, endeudamiento
         3. **Historial Crediticio**: Préstamos previos, puntualidad de pagos
         4. **Comportamiento**: Antigüedad como cliente, consultas de crédito
+        """)
 
-        #### Rangos de Score
-
-        - **300-500**: Alto riesgo → Rechazar
-        - **500-650**: Riesgo medio → Revisar manualmente
-        - **650-850**: Bajo riesgo → Aprobar
-
-        #### Tasas de Interés Sugeridas
-
-        - **800-850**: 15% anual
-        - **700-800**: 18% anual
-        - **600-700**: 22% anual
-        - **500-600**: 28% anual
+        st.markdown(describir_politica())
 
+        st.markdown("""
         ---
 
         💼 **Producto B2B de Credisonar**
@@ -139,6 +139,41 @@ def test_evaluar_cliente_medio():
     print()
 
 
+def test_evaluar_lote():
+    """Prueba la evaluación en lote con un cliente inválido"""
+    print("📦 Probando evaluación en lote...")
+
+    cliente = {
+        "edad": 35,
+        "genero": "M",
+        "estado_civil": "casado",
+        "nivel_educacion": "universitario",
+        "ocupacion": "empleado",
+        "antiguedad_trabajo_meses": 48,
+        "ingreso_mensual": 25000,
+        "monto_solicitado": 50000,
+        "plazo_meses": 12,
+        "ratio_deuda_ingreso": 0.35
+    }
+    lote = [dict(cliente, edad=edad) for edad in range(20, 70)]
+    lote.append(dict(cliente, edad=10))  # Inválido: menor de edad
+
+    response = requests.post(f"{API_URL}/evaluar/lote", json={"clientes": lote})
+
+    if response.status_code == 200:
+        resultado = response.json()
+        print(f"   Total: {resultado['total']}")
+        print(f"   Evaluados: {resultado['evaluados']}")
+        print(f"   Errores: {resultado['errores']}")
+        for item in resultado['resultados']:
+            if item['error']:
+                print(f"   Cliente {item['indice']}: {item['error']}")
+    else:
+        print(f"   ERROR: {response.status_code}")
+        print(f"   {response.json()}")
+    print()
+
+
 def main():
     print("="*60)
     print("🧪 PRUEBAS DE LA API - Credisonar Credit Scoring")
@@ -153,6 +188,7 @@ def main():
         test_evaluar_cliente_bueno()
         test_evaluar_cliente_medio()
         test_evaluar_cliente_malo()
+        test_evaluar_lote()
 
         print("="*60)
         print("✅ Todas las pruebas completadas")